@@ -0,0 +1,217 @@
+import os
+import time
+import shutil
+from array import array
+from PyQt6.QtCore import QCoreApplication
+from benchmarks.corpus import file_tree, tree_files, huge_file, document_text
+
+TIMEOUT_SECONDS = 600
+
+
+def wait_until(predicate, timeout=TIMEOUT_SECONDS):
+    # Runs the event loop until predicate() holds, so queued signals from worker threads are delivered
+    app = QCoreApplication.instance()
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("benchmark step timed out")
+        app.processEvents()
+        time.sleep(0.0005)
+
+
+def tree_load(scale):
+    from src.documents import TaggedFileSystemModel
+    return load_tree(TaggedFileSystemModel(), scale)
+
+
+def vtree_load(scale):
+    from src.virtualtree import VirtualFileTreeModel
+    return load_tree(VirtualFileTreeModel(), scale)
+
+
+def tree_load_sorted(scale):
+    # Through the Documents tab's proxy, sorted by name as the tree opens
+    from src.documents import TaggedFileSystemModel
+    return load_tree(TaggedFileSystemModel(), scale, sort_column=0)
+
+
+def tree_load_by_size(scale):
+    # Sorted by folder size while size totals keep arriving, as during a background scan
+    from src.documents import TaggedFileSystemModel
+    return load_tree(TaggedFileSystemModel(), scale, sort_column=1)
+
+
+def load_tree(model, scale, sort_column=None):
+    from PyQt6.QtCore import Qt
+    from src.foldersizes import FolderSizeProxyModel
+    root = os.path.abspath(file_tree(max(1000, int(100000 * scale))))
+    loaded = set()
+    model.directoryLoaded.connect(loaded.add)
+    proxy = None
+    if sort_column is not None:
+        proxy = FolderSizeProxyModel()
+        proxy.setSourceModel(model)
+        proxy.sort(sort_column, Qt.SortOrder.AscendingOrder)
+        if sort_column == 1:
+            model.directoryLoaded.connect(lambda path: proxy.update_sizes({path: (len(path), 1)}))
+
+    def show(index):
+        # A view maps every folder it shows, so the proxy sorts its rows as they arrive
+        if proxy is not None:
+            proxy.rowCount(proxy.mapFromSource(index))
+
+    samples = array('d')
+    started = time.perf_counter()
+    root_index = model.setRootPath(root)
+    show(root_index)
+    wait_until(lambda: root in loaded)
+    samples.append(time.perf_counter() - started)
+    # Folders are expanded one at a time, as a user opening them would
+    for row in range(model.rowCount(root_index)):
+        index = model.index(row, 0, root_index)
+        path = model.filePath(index)
+        opened = time.perf_counter()
+        show(index)
+        model.fetchMore(index)
+        wait_until(lambda: path in loaded)
+        samples.append(time.perf_counter() - opened)
+    if proxy is not None:
+        proxy.sizes_settled()
+    total = time.perf_counter() - started
+    items = sum(model.rowCount(model.index(row, 0, root_index)) for row in range(model.rowCount(root_index)))
+    return {"samples": samples, "total": total, "items": items}
+
+
+def preview(item_paths, rounds):
+    from src.preview import PreviewLoader
+    loader = PreviewLoader()
+    done = {}
+    loader.preview_loaded.connect(lambda request_id, item_path, text: done.setdefault(request_id, time.perf_counter()))
+    loader.preview_failed.connect(lambda request_id, item_path, error: done.setdefault(request_id, time.perf_counter()))
+    loader.start()
+    samples = array('d')
+    started = time.perf_counter()
+    try:
+        for _ in range(rounds):
+            for item_path in item_paths:
+                # Cold reads every time; the cache would otherwise answer all but the first round
+                loader.cache.clear()
+                requested = time.perf_counter()
+                request_id = loader.request(item_path)
+                wait_until(lambda: request_id in done)
+                samples.append(done[request_id] - requested)
+    finally:
+        loader.stop()
+    return {"samples": samples, "total": time.perf_counter() - started, "items": len(samples)}
+
+
+def preview_small(scale):
+    item_paths = tree_files(file_tree(max(1000, int(100000 * scale))))
+    step = max(1, len(item_paths) // 500)
+    return preview(item_paths[::step][:500], 1)
+
+
+def preview_huge(scale):
+    return preview([huge_file(max(16, int(512 * scale)) * 1024 * 1024)], 50)
+
+
+def tagged_batch(scale):
+    from src.tags import TagStore, DEFAULT_TAG
+    from src.fileops import FileOperationJob
+    count = max(100, int(2000 * scale))
+    source = os.path.abspath("tagged")
+    shutil.copytree(file_tree(max(1000, int(100000 * scale))), source, ignore=shutil.ignore_patterns(".complete"))
+    item_paths = tree_files(source)[:count]
+    store = TagStore()
+    store.tag(item_paths, DEFAULT_TAG)
+    tagged = sorted(store.paths_with_tags([DEFAULT_TAG]))
+    destination = os.path.abspath("copies")
+    os.makedirs(destination)
+
+    samples = array('d')
+    started = time.perf_counter()
+    for operation, paths, dest_dir in (("copy", tagged, destination), ("delete", tagged, None)):
+        finished = []
+        last = [time.perf_counter()]
+
+        def progressed(done, total):
+            # Time between completions, i.e. per-item latency as the job sees it
+            now = time.perf_counter()
+            if done:
+                samples.append(now - last[0])
+            last[0] = now
+
+        job = FileOperationJob(operation, paths, dest_dir)
+        job.progress.connect(progressed)
+        job.completed.connect(lambda *result: finished.append(result))
+        job.start()
+        wait_until(lambda: finished)
+        job.wait()
+        if finished[0][2]:
+            raise RuntimeError(f"{operation} failed for {len(finished[0][2])} items")
+    total = time.perf_counter() - started
+    store.close()
+    return {"samples": samples, "total": total, "items": len(tagged) * 2}
+
+
+def save_all(scale):
+    from src.documenter import Documenter
+    count = max(20, int(300 * scale))
+    documenter = Documenter()
+    tabs = [documenter.add_document_tab(f"bench-{number}", "txt", document_text(number, 200), modified=True) for number in range(count)]
+    saved = []
+    documenter.save_worker.batch_saved.connect(lambda label, ok, failed: saved.append((ok, failed)))
+
+    samples = array('d')
+    blocking = array('d')
+    started = time.perf_counter()
+    for round_number in range(5):
+        if round_number:
+            for tab in tabs:
+                tab.text_edit.insertPlainText(f"edit {round_number}\n")
+        clicked = time.perf_counter()
+        documenter.save_documents()
+        blocking.append(time.perf_counter() - clicked)
+        wait_until(lambda: len(saved) > round_number)
+        samples.append(time.perf_counter() - clicked)
+        if saved[-1][1]:
+            raise RuntimeError(f"{len(saved[-1][1])} documents failed to save")
+    total = time.perf_counter() - started
+    documenter.shutdown()
+    return {"samples": samples, "total": total, "items": count * 5, "gui_block_max": max(blocking)}
+
+
+def log_appends(scale):
+    from src.logging import log_bus, LoggingWindow
+    count = max(10000, int(1000000 * scale))
+    bus = log_bus()
+    # The viewer stays open so appends reach its model, as they do in the app
+    window = LoggingWindow()
+    app = QCoreApplication.instance()
+    samples = array('d', bytes(8 * count))
+    clock = time.perf_counter
+    started = clock()
+    for number in range(count):
+        before = clock()
+        bus.log_interaction("Benchmark record", action="bench", path="/bench/file.txt")
+        samples[number] = clock() - before
+        if number % 10000 == 9999:
+            # Lets the viewer take its batches as it would between user events
+            app.processEvents()
+    bus.shutdown()
+    total = clock() - started
+    window.close()
+    return {"samples": samples, "total": total, "items": count}
+
+
+CASES = {
+    "tree_load": tree_load,
+    "vtree_load": vtree_load,
+    "tree_load_sorted": tree_load_sorted,
+    "tree_load_by_size": tree_load_by_size,
+    "preview_small": preview_small,
+    "preview_huge": preview_huge,
+    "tagged_batch": tagged_batch,
+    "save_all": save_all,
+    "log_appends": log_appends,
+}
@@ -0,0 +1,57 @@
+import os
+import tempfile
+
+# Corpora are generated once and reused by later runs; delete this directory to regenerate them
+CORPUS_DIRECTORY = os.path.join(tempfile.gettempdir(), "docman-bench-corpus")
+FILES_PER_DIRECTORY = 1000
+LINE = b"The quick brown fox jumps over the lazy dog while the analyst takes notes.\n"
+
+
+def corpus_path(name):
+    return os.path.join(CORPUS_DIRECTORY, name)
+
+
+def is_complete(path):
+    return os.path.exists(os.path.join(path, ".complete")) or os.path.exists(path + ".complete")
+
+
+def mark_complete(path):
+    open(os.path.join(path, ".complete") if os.path.isdir(path) else path + ".complete", "w").close()
+
+
+def file_tree(count):
+    # count small text files spread over folders of FILES_PER_DIRECTORY each
+    root = corpus_path(f"tree-{count}")
+    if is_complete(root):
+        return root
+    for number in range(count):
+        directory = os.path.join(root, f"d{number // FILES_PER_DIRECTORY:04d}")
+        if number % FILES_PER_DIRECTORY == 0:
+            os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"f{number:07d}.txt"), "wb") as file:
+            file.write(b"file %d\n" % number + LINE * (1 + number % 8))
+    mark_complete(root)
+    return root
+
+
+def tree_files(root):
+    return sorted(os.path.join(directory, name) for directory, _, names in os.walk(root) for name in names if name != ".complete")
+
+
+def huge_file(size):
+    path = corpus_path(f"huge-{size}.txt")
+    if is_complete(path):
+        return path
+    os.makedirs(CORPUS_DIRECTORY, exist_ok=True)
+    block = LINE * (1024 * 1024 // len(LINE))
+    with open(path, "wb") as file:
+        written = 0
+        while written < size:
+            file.write(block[:size - written])
+            written += len(block)
+    mark_complete(path)
+    return path
+
+
+def document_text(number, lines):
+    return "".join(f"Document {number}, line {line}: {LINE.decode()}" for line in range(lines))
@@ -0,0 +1,154 @@
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(REPO_ROOT, "benchmarks", "baseline.json")
+# A metric this much worse than the baseline is reported as a regression
+REGRESSION_THRESHOLD = 0.25
+# Tail percentiles are printed but not compared; they are too noisy between runs to gate on
+COMPARED_METRICS = ("p50_ms", "total_s", "peak_rss_mb")
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(result):
+    ordered = sorted(result["samples"])
+    summary = {
+        "items": result["items"],
+        "total_s": round(result["total"], 3),
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 4),
+        "p90_ms": round(percentile(ordered, 0.90) * 1000, 4),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if "gui_block_max" in result:
+        summary["gui_block_max_ms"] = round(result["gui_block_max"] * 1000, 3)
+    return summary
+
+
+def run_case(name, scale):
+    # Runs inside the child process, whose working directory is a scratch copy of the app's data layout
+    from PyQt6.QtWidgets import QApplication
+    from benchmarks.cases import CASES
+    app = QApplication([])
+    print(json.dumps(summarize(CASES[name](scale))))
+    app.processEvents()
+
+
+def spawn_case(name, scale):
+    # Each case gets its own process, so peak RSS belongs to that case alone, and its own working directory,
+    # so src/data and src/docs never touch the real ones
+    workspace = tempfile.mkdtemp(prefix=f"docman-bench-{name}-")
+    os.makedirs(os.path.join(workspace, "src", "docs"))
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen", PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    try:
+        process = subprocess.run([sys.executable, "-m", "benchmarks.run", "--case", name, "--scale", str(scale)],
+                                 cwd=workspace, env=env, capture_output=True, text=True)
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"{name} failed:\n{process.stderr.strip()}")
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, summary in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = previous.get(metric), summary.get(metric)
+            if old and new is not None and new > old * (1 + threshold):
+                regressions.append(f"{name}.{metric}: {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def change(old, new):
+    if not old or new is None:
+        return ""
+    return f" ({(new / old - 1) * 100:+.0f}%)"
+
+
+def print_table(results, baseline):
+    print(f"{'case':<15}{'items':>9}{'p50 ms':>18}{'p90 ms':>11}{'p99 ms':>18}{'max ms':>11}{'total s':>18}{'peak MB':>16}")
+    for name, summary in results.items():
+        previous = baseline.get(name, {})
+        print(f"{name:<15}{summary['items']:>9}"
+              f"{summary['p50_ms']:>10.3f}{change(previous.get('p50_ms'), summary['p50_ms']):>8}"
+              f"{summary['p90_ms']:>11.3f}"
+              f"{summary['p99_ms']:>10.3f}{change(previous.get('p99_ms'), summary['p99_ms']):>8}"
+              f"{summary['max_ms']:>11.1f}"
+              f"{summary['total_s']:>10.2f}{change(previous.get('total_s'), summary['total_s']):>8}"
+              f"{summary['peak_rss_mb'] or 0:>8.0f}{change(previous.get('peak_rss_mb'), summary['peak_rss_mb']):>8}")
+        if "gui_block_max_ms" in summary:
+            print(f"{'':<15}longest GUI-thread stall: {summary['gui_block_max_ms']:.1f} ms")
+
+
+def main(argv=None):
+    from benchmarks.cases import CASES
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description="Run DocMan's benchmarks headlessly and compare them with a baseline.")
+    parser.add_argument("--only", action="append", choices=sorted(CASES), help="run only this case; may be repeated")
+    parser.add_argument("--scale", type=float, default=1.0, help="corpus size factor; 0.1 gives a quick run")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="relative slowdown reported as a regression")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.case:
+        run_case(args.case, args.scale)
+        return 0
+
+    try:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+    except (OSError, ValueError):
+        baseline = {}
+
+    results = {}
+    for name in args.only or CASES:
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = spawn_case(name, args.scale)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(dict(baseline, **results), file, indent=2)
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,32 +1,52 @@
+import time
+STARTED_AT = time.perf_counter()
+
 import os
 import sys
+import importlib
 from PyQt6.QtCore import Qt, pyqtSignal, QThread, QDateTime
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QToolBar, QLabel, QVBoxLayout, QWidget,
     QPushButton, QDockWidget, QFrame, QStackedWidget, QTextEdit
 )
-from PyQt6.QtGui import QPixmap, QAction, QIcon
-import logging
-
-# Import custom windows
-from src.documents import DocumentsWindow
-from src.documenter import Documenter
-from src.help import HelpWindow
-from src.home import HomeWindow
-from src.logging import LoggingWindow
+from PyQt6.QtGui import QPixmap, QImage, QAction, QIcon, QKeySequence, QShortcut
+
+from src.logging import log_bus
+from src.journal import read_journal
+from src.startup import StartupTimer
+from src.tracing import tracer, serve_metrics
+
+IMPORTED_AT = time.perf_counter()
+
+# Pages are imported and built the first time they are shown: key -> (module, class, display name)
+PAGES = {
+    "home": ("src.home", "HomeWindow", "Home"),
+    "help": ("src.help", "HelpWindow", "Help"),
+    "documents": ("src.documents", "DocumentsWindow", "Documents"),
+    "documenter": ("src.documenter", "Documenter", "Documenter"),
+    "logs": ("src.logging", "LoggingWindow", "Logs"),
+    "performance": ("src.performance", "PerformanceWindow", "Performance"),
+}
+# Pre-scaled copy of side_logo.png, so startup does not decode the full-size image
+LOGO_PATH = os.path.join('src', 'assets', 'icons', 'side_logo_small.png')
+LOGO_WIDTH = 100
 
 class ImageLoader(QThread):
-    image_loaded = pyqtSignal(QPixmap)
+    image_loaded = pyqtSignal(QImage)
     finished = pyqtSignal()
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, width=None):
         super().__init__()
         self.file_path = file_path
+        self.width = width
 
     def run(self):
-        pixmap = QPixmap()
-        if pixmap.load(self.file_path):
-            self.image_loaded.emit(pixmap)
+        # QImage rather than QPixmap, which may only be used on the GUI thread
+        image = QImage()
+        if image.load(self.file_path):
+            if self.width and image.width() != self.width:
+                image = image.scaledToWidth(self.width, Qt.TransformationMode.SmoothTransformation)
+            self.image_loaded.emit(image)
         self.finished.emit()
 
 class SideMenu(QWidget):
@@ -112,14 +132,13 @@ management.""")
         self.layout.addStretch()
 
     def load_logo_image_async(self):
-        file_path = os.path.join('src', 'assets', 'icons', 'side_logo.png')
-        self.image_loader = ImageLoader(file_path)
+        self.image_loader = ImageLoader(LOGO_PATH, LOGO_WIDTH)
         self.image_loader.image_loaded.connect(self.update_logo)
         self.image_loader.finished.connect(self.cleanup_thread)
         self.image_loader.start()
 
-    def update_logo(self, pixmap):
-        self.logo_label.setPixmap(pixmap.scaledToWidth(100))
+    def update_logo(self, image):
+        self.logo_label.setPixmap(QPixmap.fromImage(image))
 
     def cleanup_thread(self):
         if self.image_loader is not None:
@@ -132,59 +151,47 @@ management.""")
         sender = self.sender()
         if sender:
             item_name = sender.objectName()
-            self.parent.log_interaction(f"Button clicked: {item_name}")
+            self.parent.log_interaction(f"Button clicked: {item_name}", action="click")
             if item_name == "🗂 DOCUMENTS":
-                self.parent.show_window(DocumentsWindow)
+                self.parent.show_window("documents")
             elif item_name == "🖋 DOCUMENTER":
-                self.parent.show_window(Documenter)
+                self.parent.show_window("documenter")
 
     def closeEvent(self, event):
         self.cleanup_thread()
         event.accept()
 
 class MainStackedWidget(QStackedWidget):
-    window_opened = pyqtSignal(str)
-
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.home_window = HomeWindow()
-        self.help_window = HelpWindow()
-        self.documents_window = DocumentsWindow()
-        self.documenter_window = Documenter()
-        self.logging_window = LoggingWindow()
-
-        self.addWidget(self.home_window)
-        self.addWidget(self.help_window)
-        self.addWidget(self.documents_window)
-        self.addWidget(self.documenter_window)
-        self.addWidget(self.logging_window)
+        self.pages = {}
 
         self.current_window_start_time = None
         self.current_window_name = None
 
-    def show_window(self, window):
+    def page(self, key):
+        page = self.pages.get(key)
+        if page is None:
+            module_name, class_name, name = PAGES[key]
+            started = time.perf_counter()
+            page = getattr(importlib.import_module(module_name), class_name)()
+            self.pages[key] = page
+            self.addWidget(page)
+            duration = time.perf_counter() - started
+            tracer().record("build_window", duration, name)
+            log_bus().log_interaction(f"Built {name} in {duration * 1000:.0f} ms", action="build_window", duration=round(duration, 3))
+        return page
+
+    def show_window(self, key):
         if self.current_window_name:
-            duration = QDateTime.currentDateTime().toSecsSinceEpoch() - self.current_window_start_time.toSecsSinceEpoch()
-            self.window_opened.emit(f"Closed {self.current_window_name}, duration: {duration} seconds")
+            duration = self.current_window_start_time.msecsTo(QDateTime.currentDateTime()) / 1000
+            log_bus().log_interaction(f"Closed {self.current_window_name}, duration: {int(duration)} seconds", action="close_window", duration=duration)
 
         self.current_window_start_time = QDateTime.currentDateTime()
-        if window == HomeWindow:
-            self.setCurrentWidget(self.home_window)
-            self.current_window_name = "Home"
-        elif window == HelpWindow:
-            self.setCurrentWidget(self.help_window)
-            self.current_window_name = "Help"
-        elif window == DocumentsWindow:
-            self.setCurrentWidget(self.documents_window)
-            self.current_window_name = "Documents"
-        elif window == Documenter:
-            self.setCurrentWidget(self.documenter_window)
-            self.current_window_name = "Documenter"
-        elif window == LoggingWindow:
-            self.setCurrentWidget(self.logging_window)
-            self.current_window_name = "Logs"
-        
-        self.window_opened.emit(f"Opened {self.current_window_name}")
+        self.setCurrentWidget(self.page(key))
+        self.current_window_name = PAGES[key][2]
+
+        log_bus().log_interaction(f"Opened {self.current_window_name}", action="open_window")
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -199,6 +206,7 @@ class MainWindow(QMainWindow):
         self.setup_side_menu()
 
         self.setup_logging()
+        QShortcut(QKeySequence("Ctrl+P"), self, self.show_quick_open)
 
         self.setStyleSheet("""
             QMainWindow {
@@ -225,6 +233,7 @@ class MainWindow(QMainWindow):
         self.add_toolbar_button(toolbar, "ʜᴏᴍᴇ")
         self.add_toolbar_button(toolbar, "ʜᴇʟᴘ")
         self.add_toolbar_button(toolbar, "ʟᴏɢꜱ")
+        self.add_toolbar_button(toolbar, "ᴘᴇʀꜰᴏʀᴍᴀɴᴄᴇ")
 
     def add_toolbar_button(self, toolbar, text):
         button = QPushButton(text)
@@ -236,18 +245,21 @@ class MainWindow(QMainWindow):
         sender = self.sender()
         if sender:
             item_name = sender.text()
-            self.log_interaction(f"Toolbar button clicked: {item_name}")
+            self.log_interaction(f"Toolbar button clicked: {item_name}", action="click")
             if item_name == "ʜᴏᴍᴇ":
-                self.show_window(HomeWindow)
+                self.show_window("home")
             elif item_name == "ʜᴇʟᴘ":
-                self.show_window(HelpWindow)
+                self.show_window("help")
             elif item_name == "ʟᴏɢꜱ":
-                self.show_window(LoggingWindow)
+                self.show_window("logs")
+            elif item_name == "ᴘᴇʀꜰᴏʀᴍᴀɴᴄᴇ":
+                self.show_window("performance")
 
     def setup_central_widget(self):
         central_widget = QWidget()
         central_layout = QVBoxLayout()
         self.stacked_widget = MainStackedWidget()
+        self.stacked_widget.show_window("home")
         central_layout.addWidget(self.stacked_widget)
 
         central_frame = QFrame()
@@ -269,30 +281,73 @@ class MainWindow(QMainWindow):
         dock.setTitleBarWidget(QWidget())
         self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, dock)
 
-    def show_window(self, window):
-        self.stacked_widget.show_window(window)
+    def show_window(self, key):
+        self.stacked_widget.show_window(key)
+
+    def offer_recovery(self):
+        # The Documenter is only built when first shown, so unsaved work left by a crash brings it up here
+        if read_journal():
+            self.show_window("documenter")
+
+    def resume_ingest(self):
+        # Imported here rather than at the top so the ingest machinery stays off the startup path
+        from src.ingest import ingest_pipeline, watch_folder
+        folder = watch_folder()
+        if not folder:
+            return
+        if not os.path.isdir(folder):
+            self.log_error(f"Watch folder {folder} is missing", action="ingest", path=folder)
+            return
+        ingest_pipeline().start(folder)
+        self.log_interaction(f"Watching folder {folder}", action="ingest", path=folder)
+
+    def show_quick_open(self):
+        # Imported here so the path index stays off the startup path
+        from src.quickopen import QuickOpenDialog
+        dialog = QuickOpenDialog(self)
+        dialog.path_chosen.connect(self.open_quick_result)
+        dialog.finished.connect(dialog.deleteLater)
+        dialog.show()
+        self.log_interaction("Opened quick open", action="quick_open")
+
+    def open_quick_result(self, item_path, reveal):
+        if reveal:
+            self.show_window("documents")
+            self.stacked_widget.page("documents").reveal_path(item_path)
+        else:
+            self.show_window("documenter")
+            self.stacked_widget.page("documenter").load_file(item_path)
+        self.log_interaction(f"Quick opened {item_path}", action="quick_open", path=item_path)
 
     def setup_logging(self):
-        self.logging_window = self.stacked_widget.logging_window
-        self.stacked_widget.window_opened.connect(self.log_interaction)
-
-        logging.basicConfig(filename='docman.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+        self.logger = log_bus()
 
-    def log_interaction(self, message):
-        self.logging_window.log_interaction(message)
-        logging.info(message)
+    def log_interaction(self, message, **fields):
+        self.logger.log_interaction(message, **fields)
 
-    def log_error(self, message):
-        self.logging_window.log_error(message)
-        logging.error(message)
+    def log_error(self, message, **fields):
+        self.logger.log_error(message, **fields)
 
     def closeEvent(self, event):
-        self.log_interaction("Application closed")
+        self.log_interaction("Application closed", action="quit")
         event.accept()
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     app.setWindowIcon(QIcon('src/assets/icons/side_logo.png'))
+    startup = StartupTimer(STARTED_AT)
+    startup.mark("imports", IMPORTED_AT)
+    startup.mark("application")
     main_window = MainWindow()
+    startup.mark("main window")
+    startup.watch(main_window)
+    startup.first_paint.connect(main_window.offer_recovery)
+    startup.first_paint.connect(main_window.resume_ingest)
+    # Set DOCMAN_METRICS_PORT to let a local Prometheus scrape http://127.0.0.1:<port>/metrics
+    if os.environ.get("DOCMAN_METRICS_PORT"):
+        try:
+            serve_metrics(int(os.environ["DOCMAN_METRICS_PORT"]))
+        except (OSError, ValueError) as e:
+            log_bus().log_error(f"Could not serve metrics: {e}", action="metrics", error=str(e))
     main_window.show()
     sys.exit(app.exec())
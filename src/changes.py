@@ -0,0 +1,171 @@
+import os
+from collections import OrderedDict
+from PyQt6.QtCore import QObject, QThread, QTimer, QMutex, QMutexLocker, QWaitCondition, QFileSystemWatcher, pyqtSignal
+from src.tracing import tracer
+
+CREATED = "created"
+DELETED = "deleted"
+MODIFIED = "modified"
+RENAMED = "renamed"
+# Bursts of watcher events and DocMan's own operations are gathered this long before anything is refreshed
+COALESCE_MS = 250
+# inotify watches are a limited resource; the least recently loaded folders stop being watched past this
+WATCHED_DIRECTORIES = 2048
+
+
+def list_directory(directory):
+    # name -> (is_dir, size, mtime_ns)
+    listing = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                    listing[entry.name] = (entry.is_dir(follow_symlinks=False), stat.st_size, stat.st_mtime_ns)
+                except OSError:
+                    continue
+    except OSError:
+        return None
+    return listing
+
+
+def diff_listings(directory, old, new):
+    changes = []
+    new = new or {}
+    for name, entry in new.items():
+        previous = old.get(name)
+        if previous is None:
+            changes.append((CREATED, os.path.join(directory, name), None))
+        elif previous != entry and not entry[0]:
+            changes.append((MODIFIED, os.path.join(directory, name), None))
+    changes.extend((DELETED, os.path.join(directory, name), None) for name in old if name not in new)
+    return changes
+
+
+class DirectoryScanner(QThread):
+    # Re-lists changed directories and compares them with the last listing it took
+    scanned = pyqtSignal(list, list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.mutex = QMutex()
+        self.condition = QWaitCondition()
+        self.pending = set()
+        self.forgotten = set()
+        self.running = True
+        self.listings = {}
+
+    def request(self, directories):
+        with QMutexLocker(self.mutex):
+            self.pending.update(directories)
+            self.forgotten.difference_update(directories)
+            self.condition.wakeOne()
+
+    def forget(self, directory):
+        with QMutexLocker(self.mutex):
+            self.pending.discard(directory)
+            self.forgotten.add(directory)
+            self.condition.wakeOne()
+
+    def stop(self):
+        with QMutexLocker(self.mutex):
+            self.running = False
+            self.condition.wakeOne()
+        self.wait()
+
+    def run(self):
+        while True:
+            with QMutexLocker(self.mutex):
+                while self.running and not self.pending and not self.forgotten:
+                    self.condition.wait(self.mutex)
+                if not self.running:
+                    return
+                directories, self.pending = self.pending, set()
+                forgotten, self.forgotten = self.forgotten, set()
+            for directory in forgotten:
+                self.listings.pop(directory, None)
+            changes = []
+            with tracer().span("change_scan", f"{len(directories)} folders"):
+                for directory in directories:
+                    listing = list_directory(directory)
+                    old = self.listings.get(directory)
+                    if listing is None:
+                        self.listings.pop(directory, None)
+                    else:
+                        self.listings[directory] = listing
+                    # The first listing of a folder is only a baseline
+                    if old is not None:
+                        changes.extend(diff_listings(directory, old, listing))
+            self.scanned.emit(list(directories), changes)
+
+
+class ChangeTracker(QObject):
+    # Merges filesystem-watcher events for loaded folders with DocMan's own file operations into batches of
+    # (kind, path, new_path) changes, so consumers refresh only what changed
+    changes_ready = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.watched = OrderedDict()
+        self.recorded = []
+        # Paths of DocMan's own operations that the next listing of their folder will also see
+        self.expected = set()
+        self.dirty_directories = set()
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.directory_changed)
+        self.scanner = DirectoryScanner(self)
+        self.scanner.scanned.connect(self.merge_scanned)
+        self.scanner.start()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(COALESCE_MS)
+        self.timer.timeout.connect(self.flush)
+
+    def stop(self):
+        self.timer.stop()
+        self.scanner.stop()
+
+    def watch(self, directory):
+        directory = os.path.abspath(directory)
+        if directory in self.watched:
+            self.watched.move_to_end(directory)
+            return
+        if not self.watcher.addPath(directory):
+            return
+        self.watched[directory] = True
+        self.scanner.request([directory])
+        while len(self.watched) > WATCHED_DIRECTORIES:
+            oldest, _ = self.watched.popitem(last=False)
+            self.watcher.removePath(oldest)
+            self.scanner.forget(oldest)
+
+    def directory_changed(self, directory):
+        self.dirty_directories.add(directory)
+        self.timer.start()
+
+    def record(self, kind, item_path, new_path=None):
+        # DocMan's own operations are reported as they are, so a rename stays a rename
+        item_path = os.path.abspath(item_path)
+        new_path = new_path and os.path.abspath(new_path)
+        self.recorded.append((kind, item_path, new_path))
+        for changed_path in (item_path, new_path):
+            if changed_path and os.path.dirname(changed_path) in self.watched:
+                self.dirty_directories.add(os.path.dirname(changed_path))
+                self.expected.add(changed_path)
+        self.timer.start()
+
+    def flush(self):
+        if self.dirty_directories:
+            self.scanner.request(self.dirty_directories)
+            self.dirty_directories = set()
+        if self.recorded:
+            self.changes_ready.emit(self.recorded)
+            self.recorded = []
+
+    def merge_scanned(self, directories, changes):
+        # A folder listing also sees DocMan's own operations, which were already reported
+        changes = [change for change in changes if change[1] not in self.expected]
+        directories = set(directories)
+        self.expected = {item_path for item_path in self.expected if os.path.dirname(item_path) not in directories}
+        if changes:
+            self.changes_ready.emit(changes)
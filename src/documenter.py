@@ -1,21 +1,92 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QPushButton, QTextEdit, QComboBox, QLineEdit,
-    QMessageBox, QTabWidget, QHBoxLayout, QFileDialog, QStatusBar, QMenu
+    QMessageBox, QTabWidget, QHBoxLayout, QFileDialog, QStatusBar, QMenu, QInputDialog, QSplitter, QTextBrowser
 )
-from PyQt6.QtCore import pyqtSignal, Qt
-from src.logging import LoggingWindow
+from PyQt6.QtCore import pyqtSignal, Qt, QCoreApplication, QTimer, QThread
+from PyQt6.QtGui import QAction
+from src.logging import log_bus
+from src.versions import VersionStore, HistoryDialog
+from src.saving import SaveWorker
+from src.journal import JournalWriter, read_journal
+from src.largefile import LargeFileView, LARGE_FILE_BYTES
+from src.tracing import tracer
+from src.extract import text_extractor, needs_extraction
+from src.markdownpreview import MarkdownRenderer, MARKDOWN_TYPES
 import os 
+import uuid
+
+DOCS_DIRECTORY = "src/docs"
+FILE_TYPES = ["doc", "txt", "md", "pdf", "html"]
+# Edits are journaled once typing has paused for this long
+JOURNAL_DEBOUNCE_MS = 1000
+# Markdown previews are re-rendered once typing has paused for this long
+RENDER_DEBOUNCE_MS = 300
+# HTML is opened as source; these formats are opened as their extracted text, to be saved as .txt
+EXTRACTED_TYPES = {"pdf", "doc", "docx", "docm", "odt", "ott"}
+
+
+class TextExtractionLoader(QThread):
+    loaded = pyqtSignal(str, str)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+
+    def run(self):
+        try:
+            with tracer().span("document_extract", self.file_path):
+                text = text_extractor().text(self.file_path)
+        except Exception as e:
+            self.failed.emit(self.file_path, str(e))
+            return
+        self.loaded.emit(self.file_path, text)
+
 
 class Documenter(QWidget):
     open_document = pyqtSignal(str)
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.logger = LoggingWindow()
+        self.logger = log_bus()
+        self.versions = VersionStore()
+        self.next_document_id = 0
+
+        # Files are written on a worker thread; the GUI only snapshots the text of modified tabs
+        self.save_worker = SaveWorker(parent=self)
+        self.save_worker.batch_saved.connect(self.finish_save)
+        self.save_worker.start()
+        QCoreApplication.instance().aboutToQuit.connect(self.shutdown)
+
+        # Unsaved edits go to a crash-recovery journal; read what the last session left before writing to it
+        self.session_id = uuid.uuid4().hex
+        self.recovered_documents = read_journal()
+        self.journal = JournalWriter(parent=self)
+        self.journal.start()
+        self.journal_pending = set()
+        self.journal_timer = QTimer(self)
+        self.journal_timer.setSingleShot(True)
+        self.journal_timer.setInterval(JOURNAL_DEBOUNCE_MS)
+        self.journal_timer.timeout.connect(self.flush_journal)
+        # Markdown tabs get a rendered preview, built on a worker thread from the latest text of each tab
+        self.markdown_renderer = MarkdownRenderer(self)
+        self.markdown_renderer.rendered.connect(self.show_rendered_markdown)
+        self.markdown_renderer.start()
+        self.render_pending = set()
+        self.render_timer = QTimer(self)
+        self.render_timer.setSingleShot(True)
+        self.render_timer.setInterval(RENDER_DEBOUNCE_MS)
+        self.render_timer.timeout.connect(self.flush_render)
+        tracer().gauge("markdown", self.markdown_renderer.pending_count)
+        tracer().gauge("save", self.save_worker.pending)
+        tracer().gauge("journal", self.journal.records.qsize)
+
         self.layout = QVBoxLayout(self)
 
         # Create tab widget
         self.tab_widget = QTabWidget()
+        self.tab_widget.tabBar().setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.tab_widget.tabBar().customContextMenuRequested.connect(self.show_tab_context_menu)
         self.layout.addWidget(self.tab_widget)
 
         # Add buttons layout
@@ -24,7 +95,7 @@ class Documenter(QWidget):
 
         # Add buttons: Add Document, Delete Document, Save All, Save Individual, Open File
         self.add_tab_button = QPushButton("Add Document")
-        self.add_tab_button.clicked.connect(self.add_document_tab)
+        self.add_tab_button.clicked.connect(lambda: self.add_document_tab())
         self.buttons_layout.addWidget(self.add_tab_button)
 
         self.delete_tab_button = QPushButton("Delete Document")
@@ -43,113 +114,254 @@ class Documenter(QWidget):
         self.open_button.clicked.connect(self.open_file_dialog)
         self.buttons_layout.addWidget(self.open_button)
 
+        self.history_button = QPushButton("History")
+        self.history_button.clicked.connect(self.show_history)
+        self.buttons_layout.addWidget(self.history_button)
+
         # Add Status Bar
         self.status_bar = QStatusBar()
         self.layout.addWidget(self.status_bar)
 
         # Initialize with one document tab
         self.add_document_tab()
+        if self.recovered_documents:
+            QTimer.singleShot(0, self.offer_recovery)
 
         self.setLayout(self.layout)
 
-        # Initialize logging window
-        self.logger = LoggingWindow()
-
-    def add_document_tab(self):
+    def add_document_tab(self, file_name="", file_type=None, content="", title=None, modified=False):
         tab = QWidget()
         tab_layout = QVBoxLayout(tab)
 
         text_edit = QTextEdit()
-        tab_layout.addWidget(text_edit)
+        text_edit.setPlainText(content)
+        markdown_view = QTextBrowser()
+        markdown_view.setOpenExternalLinks(True)
+        markdown_view.hide()
+        editor_splitter = QSplitter()
+        editor_splitter.addWidget(text_edit)
+        editor_splitter.addWidget(markdown_view)
+        tab_layout.addWidget(editor_splitter)
 
         file_widget_layout = QVBoxLayout()
         tab_layout.addLayout(file_widget_layout)
 
         file_type_combo = QComboBox()
-        file_type_combo.addItems(["doc", "txt", "md", "pdf", "html"])  # Added more file formats
+        file_type_combo.addItems(FILE_TYPES)  # Added more file formats
+        if file_type:
+            if file_type_combo.findText(file_type) == -1:
+                file_type_combo.addItem(file_type)
+            file_type_combo.setCurrentText(file_type)
         file_widget_layout.addWidget(file_type_combo)
 
         file_name_input = QLineEdit()
         file_name_input.setPlaceholderText("Enter file name...")
+        file_name_input.setText(file_name)
         file_widget_layout.addWidget(file_name_input)
 
-        self.tab_widget.addTab(tab, f"Document {self.tab_widget.count()}")
+        tab.document_id = self.next_document_id
+        self.next_document_id += 1
+        tab.text_edit = text_edit
+        tab.markdown_view = markdown_view
+        tab.file_type_combo = file_type_combo
+        tab.file_name_input = file_name_input
+        tab.title = title or f"Document {self.tab_widget.count()}"
+
+        # A tab counts as modified until its current text has been handed to the writer
+        document = text_edit.document()
+        document.setModified(modified)
+        document.modificationChanged.connect(lambda modified: self.update_tab_title(tab))
+        file_type_combo.currentTextChanged.connect(lambda: document.setModified(True))
+        file_name_input.textChanged.connect(lambda: document.setModified(True))
+        text_edit.textChanged.connect(lambda: self.schedule_journal(tab))
+        file_type_combo.currentTextChanged.connect(lambda: self.schedule_journal(tab))
+        file_name_input.textChanged.connect(lambda: self.schedule_journal(tab))
+        text_edit.textChanged.connect(lambda: self.schedule_render(tab))
+        file_type_combo.currentTextChanged.connect(lambda: self.update_markdown_view(tab))
+
+        self.tab_widget.addTab(tab, tab.title)
         self.tab_widget.setCurrentWidget(tab)
+        self.update_tab_title(tab)
+
+        self.update_markdown_view(tab)
+
+        self.logger.log_interaction(f"Added new document tab: {tab.title}")
+        return tab
+
+    def is_markdown_tab(self, tab):
+        return tab.file_type_combo.currentText().lower() in MARKDOWN_TYPES
+
+    def update_markdown_view(self, tab):
+        tab.markdown_view.setVisible(self.is_markdown_tab(tab))
+        if self.is_markdown_tab(tab):
+            self.markdown_renderer.request(tab.document_id, tab.text_edit.toPlainText())
+
+    def schedule_render(self, tab):
+        if self.is_markdown_tab(tab):
+            self.render_pending.add(tab.document_id)
+            self.render_timer.start()
+
+    def flush_render(self):
+        for tab in self.tabs():
+            if tab.document_id in self.render_pending and self.is_markdown_tab(tab):
+                self.markdown_renderer.request(tab.document_id, tab.text_edit.toPlainText())
+        self.render_pending.clear()
+
+    def show_rendered_markdown(self, document_id, document):
+        for tab in self.tabs():
+            if tab.document_id == document_id:
+                # Keeps the reader's place in the preview while the text under it changes
+                scroll_bar = tab.markdown_view.verticalScrollBar()
+                position = scroll_bar.value()
+                # Parented to the view, so the next swap deletes it along with the view's old document
+                document.setParent(tab.markdown_view)
+                tab.markdown_view.setDocument(document)
+                scroll_bar.setValue(position)
+                return
+
+    def journal_key(self, tab):
+        return f"{self.session_id}:{tab.document_id}"
+
+    def schedule_journal(self, tab):
+        self.journal_pending.add(tab.document_id)
+        self.journal_timer.start()
+
+    def flush_journal(self):
+        self.journal_timer.stop()
+        edits = []
+        for tab in self.tabs():
+            if tab.document_id in self.journal_pending and tab.text_edit.document().isModified():
+                edits.append((self.journal_key(tab), tab.file_name_input.text(), tab.file_type_combo.currentText(),
+                              tab.title, tab.text_edit.toPlainText()))
+        self.journal_pending.clear()
+        if edits:
+            self.journal.write_edits(edits)
+
+    def stop_journal(self):
+        self.flush_journal()
+        self.journal.stop()
+
+    def shutdown(self):
+        # Every worker thread this tab started, so none is still running when the widget is destroyed
+        self.save_worker.stop()
+        self.stop_journal()
+        self.markdown_renderer.stop()
+
+    def offer_recovery(self):
+        documents = self.recovered_documents
+        self.recovered_documents = []
+        reply = QMessageBox.question(self, "Restore Unsaved Documents",
+                                     f"DocMan found {len(documents)} unsaved documents from a previous session. Restore them?",
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        # Either way the old journal is dropped; restored tabs are journaled again under this session
+        self.journal.discard()
+        if reply == QMessageBox.StandardButton.Yes:
+            for document in documents:
+                tab = self.add_document_tab(document["name"], document["type"], document["content"], document["title"], modified=True)
+                self.schedule_journal(tab)
+            self.flush_journal()
+            self.logger.log_interaction(f"Restored {len(documents)} unsaved documents from the journal")
+        else:
+            self.logger.log_interaction(f"Discarded {len(documents)} unsaved documents from the journal")
 
-        self.logger.log_interaction(f"Added new document tab: Document {self.tab_widget.count()}")
+    def update_tab_title(self, tab):
+        index = self.tab_widget.indexOf(tab)
+        if index != -1:
+            if isinstance(tab, LargeFileView):
+                self.tab_widget.setTabText(index, f"{tab.title} (read-only)")
+                return
+            modified = tab.text_edit.document().isModified()
+            self.tab_widget.setTabText(index, f"{tab.title} *" if modified else tab.title)
+
+    def document_path(self, tab):
+        return os.path.join(DOCS_DIRECTORY, f"{tab.file_name_input.text()}.{tab.file_type_combo.currentText().lower()}")
+
+    def tabs(self):
+        # Editable document tabs only; large-file views are read-only and never saved or journaled
+        return [tab for tab in (self.tab_widget.widget(i) for i in range(self.tab_widget.count())) if not isinstance(tab, LargeFileView)]
+
+    def queue_save(self, label, tabs):
+        documents = []
+        with tracer().span("save_snapshot", f"{len(tabs)} tabs"):
+            for tab in tabs:
+                document = tab.text_edit.document()
+                content = tab.text_edit.toPlainText()
+                if not content:
+                    continue
+                documents.append((tab.document_id, self.document_path(tab), content))
+                # Cleared now so edits made while the write is in flight mark the tab modified again
+                document.setModified(False)
+        if documents:
+            self.save_worker.save(label, documents)
+            self.status_bar.showMessage(f"Saving {len(documents)} documents...")
+        else:
+            self.status_bar.showMessage("No modified documents to save.")
+        return len(documents)
+
+    def finish_save(self, label, saved, failed):
+        tabs = {tab.document_id: tab for tab in self.tabs()}
+        clean = [self.journal_key(tabs[document_id]) for document_id, _, _ in saved
+                 if document_id in tabs and not tabs[document_id].text_edit.document().isModified()]
+        self.journal.mark_clean(clean)
+        for document_id, file_path, revision in saved:
+            self.logger.log_interaction(f"{label}: {os.path.basename(file_path)}" + (f" (revision {revision})" if revision else ""), action="save", path=file_path)
+        for document_id, file_path, error in failed:
+            if document_id in tabs:
+                tabs[document_id].text_edit.document().setModified(True)
+            self.logger.log_error(f"Failed to save document: {os.path.basename(file_path)}, Error: {error}", action="save", path=file_path, error=error)
+        if failed:
+            details = "\n".join(f"{file_path}: {error}" for _, file_path, error in failed)
+            QMessageBox.critical(self, "Error", f"Failed to save {len(failed)} documents:\n{details}")
+        self.status_bar.showMessage(f"Saved {len(saved)} documents." + (f" {len(failed)} failed." if failed else ""))
 
     def delete_current_tab(self):
         current_index = self.tab_widget.currentIndex()
         if current_index != -1:
+            tab = self.tab_widget.widget(current_index)
+            if isinstance(tab, LargeFileView):
+                tab.close_file()
+                tab.deleteLater()
+            else:
+                self.journal.mark_closed([self.journal_key(tab)])
             self.tab_widget.removeTab(current_index)
             self.logger.log_interaction(f"Deleted document tab: Document {current_index + 1}")
 
 
     def save_documents(self):
-        docs_directory = "src/docs"
-        if not os.path.exists(docs_directory):
-            os.makedirs(docs_directory)
-
-        for i in range(self.tab_widget.count()):
-            tab_widget = self.tab_widget.widget(i)
-            text_edit = tab_widget.findChild(QTextEdit)
-            file_type_combo = tab_widget.findChild(QComboBox)
-            file_name_input = tab_widget.findChild(QLineEdit)
-
-            content = text_edit.toPlainText()
-            file_type = file_type_combo.currentText()
-            file_name = file_name_input.text()
-
-            if not file_name:
-                QMessageBox.warning(self, "Warning", "Please enter a file name for all documents.")
-                return
+        modified = [tab for tab in self.tabs() if tab.text_edit.document().isModified()]
+        if any(not tab.file_name_input.text() for tab in modified if tab.text_edit.toPlainText()):
+            QMessageBox.warning(self, "Warning", "Please enter a file name for all documents.")
+            return
+        self.queue_save("Saved document", modified)
 
-            if content:
-                file_path = os.path.join(docs_directory, f"{file_name}.{file_type.lower()}")
-                try:
-                    with open(file_path, "w") as file:
-                        file.write(content)
-                    self.logger.log_interaction(f"Saved document: {file_name}.{file_type.lower()}")
-                except Exception as e:
-                    QMessageBox.critical(self, "Error", f"Failed to save file {file_path}: {e}")
-                    self.logger.log_error(f"Failed to save document: {file_name}.{file_type.lower()}, Error: {str(e)}")
-                    return
+    def save_individual_documents(self):
+        modified = [tab for tab in self.tabs() if tab.text_edit.document().isModified() and tab.file_name_input.text()]
+        self.queue_save("Saved individual document", modified)
 
-        QMessageBox.information(self, "Success", "Documents saved successfully.")
+    def show_history(self):
+        tab = self.tab_widget.currentWidget()
+        if isinstance(tab, LargeFileView):
+            QMessageBox.information(self, "History", "Large files opened read-only have no Documenter history.")
+            return
+        if tab is None or not tab.file_name_input.text():
+            QMessageBox.warning(self, "Warning", "Please enter a file name for this document.")
+            return
 
-    def save_individual_documents(self):
-        docs_directory = "src/docs"
-        if not os.path.exists(docs_directory):
-            os.makedirs(docs_directory)
+        file_path = self.document_path(tab)
+        if not self.versions.history(file_path):
+            QMessageBox.information(self, "History", f"No saved revisions of {file_path} yet.")
+            return
+        dialog = HistoryDialog(self.versions, file_path, self)
+        dialog.restore_revision.connect(lambda content: self.restore_content(tab, content))
+        dialog.show()
+        self.logger.log_interaction(f"Opened history for {file_path}", action="history", path=file_path)
 
-        for i in range(self.tab_widget.count()):
-            tab_widget = self.tab_widget.widget(i)
-            text_edit = tab_widget.findChild(QTextEdit)
-            file_type_combo = tab_widget.findChild(QComboBox)
-            file_name_input = tab_widget.findChild(QLineEdit)
-
-            content = text_edit.toPlainText()
-            file_type = file_type_combo.currentText()
-            file_name = file_name_input.text()
-
-            if not file_name:
-                continue
-
-            if content:
-                file_path = os.path.join(docs_directory, f"{file_name}.{file_type.lower()}")
-                try:
-                    with open(file_path, "w") as file:
-                        file.write(content)
-                    self.logger.log_interaction(f"Saved individual document: {file_name}.{file_type.lower()}")
-                except Exception as e:
-                    QMessageBox.critical(self, "Error", f"Failed to save file {file_path}: {e}")
-                    self.logger.log_error(f"Failed to save individual document: {file_name}.{file_type.lower()}, Error: {str(e)}")
-                    return
-
-        QMessageBox.information(self, "Success", "Individual documents saved successfully.")
+    def restore_content(self, tab, content):
+        tab.text_edit.setPlainText(content)
+        tab.text_edit.document().setModified(True)
 
     def open_file_dialog(self):
-        docs_directory = "src/docs"
+        docs_directory = DOCS_DIRECTORY
         file_dialog = QFileDialog()
         file_path, _ = file_dialog.getOpenFileName(self, "Open File", docs_directory)
         if file_path:
@@ -157,23 +369,54 @@ class Documenter(QWidget):
 
     def load_file(self, file_path):
         try:
-            with open(file_path, 'r') as file:
-                content = file.read()
+            file_type = os.path.splitext(file_path)[1].lstrip(".").lower()
+            if file_type in EXTRACTED_TYPES and needs_extraction(file_path):
+                self.load_extracted_file(file_path)
+                return
 
-            file_name = os.path.basename(file_path)
-            file_name = os.path.splitext(file_name)[0]
+            if os.path.getsize(file_path) > LARGE_FILE_BYTES:
+                self.load_large_file(file_path)
+                return
 
-            text_edit = QTextEdit()
-            text_edit.setPlainText(content)
-            self.tab_widget.addTab(text_edit, file_name)
-            self.tab_widget.setCurrentWidget(text_edit.parentWidget())
+            with tracer().span("document_load", file_path):
+                with open(file_path, 'r') as file:
+                    content = file.read()
+
+                file_name, extension = os.path.splitext(os.path.basename(file_path))
+                self.add_document_tab(file_name, extension.lstrip(".").lower() or None, content, title=file_name)
 
             self.status_bar.showMessage(f"File '{file_name}' loaded successfully.")
-            self.logger.log_interaction(f"Loaded file: {file_path}")
+            self.logger.log_interaction(f"Loaded file: {file_path}", action="load", path=file_path)
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load file {file_path}: {e}")
-            self.logger.log_error(f"Failed to load file: {file_path}, Error: {str(e)}")
+            self.logger.log_error(f"Failed to load file: {file_path}, Error: {str(e)}", action="load", path=file_path, error=str(e))
+
+    def load_extracted_file(self, file_path):
+        loader = TextExtractionLoader(file_path, self)
+        loader.loaded.connect(self.show_extracted_file)
+        loader.failed.connect(self.show_extraction_error)
+        loader.finished.connect(loader.deleteLater)
+        QCoreApplication.instance().aboutToQuit.connect(loader.wait)
+        loader.start()
+        self.status_bar.showMessage(f"Extracting text from '{os.path.basename(file_path)}'...")
+
+    def show_extracted_file(self, file_path, text):
+        file_name = os.path.splitext(os.path.basename(file_path))[0]
+        self.add_document_tab(file_name, "txt", text, title=f"{file_name} (text)")
+        self.status_bar.showMessage(f"Text of '{file_name}' loaded.")
+        self.logger.log_interaction(f"Loaded extracted text: {file_path}", action="load", path=file_path)
+
+    def show_extraction_error(self, file_path, error):
+        QMessageBox.critical(self, "Error", f"Failed to extract text from {file_path}: {error}")
+        self.logger.log_error(f"Failed to extract text: {file_path}, Error: {error}", action="load", path=file_path, error=error)
+
+    def load_large_file(self, file_path):
+        view = LargeFileView(file_path)
+        self.tab_widget.addTab(view, f"{view.title} (read-only)")
+        self.tab_widget.setCurrentWidget(view)
+        self.status_bar.showMessage(f"File '{view.title}' opened in large-file mode.")
+        self.logger.log_interaction(f"Loaded large file: {file_path} ({os.path.getsize(file_path)} bytes)", action="load", path=file_path)
 
     def show_tab_context_menu(self, position):
         tab_index = self.tab_widget.tabBar().tabAt(position)
@@ -190,44 +433,31 @@ class Documenter(QWidget):
             menu.exec(self.tab_widget.tabBar().mapToGlobal(position))
 
     def save_tab_content(self, tab_index):
-        tab_widget = self.tab_widget.widget(tab_index)
-        text_edit = tab_widget.findChild(QTextEdit)
-        file_type_combo = tab_widget.findChild(QComboBox)
-        file_name_input = tab_widget.findChild(QLineEdit)
-
-        content = text_edit.toPlainText()
-        file_type = file_type_combo.currentText()
-        file_name = file_name_input.text()
-
-        if not file_name:
+        tab = self.tab_widget.widget(tab_index)
+        if isinstance(tab, LargeFileView):
+            return
+        if not tab.file_name_input.text():
             QMessageBox.warning(self, "Warning", "Please enter a file name for this document.")
             return
-
-        if content:
-            docs_directory = "src/docs"
-            if not os.path.exists(docs_directory):
-                os.makedirs(docs_directory)
-
-            file_path = os.path.join(docs_directory, f"{file_name}.{file_type.lower()}")
-            try:
-                with open(file_path, "w") as file:
-                    file.write(content)
-                QMessageBox.information(self, "Success", f"Document '{file_name}' saved successfully.")
-                self.logger.log_interaction(f"Saved tab content: {file_name}.{file_type.lower()}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to save file {file_path}: {e}")
-                self.logger.log_error(f"Failed to save tab content: {file_name}.{file_type.lower()}, Error: {str(e)}")
+        self.queue_save("Saved tab content", [tab])
 
     def rename_tab(self, tab_index):
         tab_widget = self.tab_widget.widget(tab_index)
-        current_tab_text = self.tab_widget.tabText(tab_index)
+        current_tab_text = tab_widget.title
         new_tab_text, ok_pressed = QInputDialog.getText(self, "Rename Document", "Enter new name:", text=current_tab_text)
         if ok_pressed and new_tab_text:
-            self.tab_widget.setTabText(tab_index, new_tab_text)
+            tab_widget.title = new_tab_text
+            self.update_tab_title(tab_widget)
             self.status_bar.showMessage(f"Document renamed to '{new_tab_text}'.")
             self.logger.log_interaction(f"Renamed tab: Document {tab_index + 1} to {new_tab_text}")
 
     def clear_all_tabs(self):
+        self.journal.mark_closed([self.journal_key(tab) for tab in self.tabs()])
+        for i in range(self.tab_widget.count()):
+            tab = self.tab_widget.widget(i)
+            if isinstance(tab, LargeFileView):
+                tab.close_file()
+                tab.deleteLater()
         self.tab_widget.clear()
         self.logger.log_interaction("Cleared all document tabs.")
 
@@ -1,15 +1,34 @@
-import sys
 import os
-import shutil
-from src.logging import LoggingWindow
+from src.logging import log_bus
+from src.preview import PreviewLoader
+from src.search import SearchIndex, IndexWorker
+from src.fileops import FileOperationJob
+from src.tags import TaggedModelMixin
+from src.hashes import HashJob, HashResultsDialog
+from src.tracing import tracer
+from src.ingest import ingest_pipeline, watch_folder, set_watch_folder
+from src.markdownpreview import is_markdown
+from src.changes import ChangeTracker, CREATED, DELETED, RENAMED
+from src.foldersizes import FolderSizeWorker, FolderSizeProxyModel, format_size
+from src.thumbnails import ThumbnailLoader, ThumbnailDelegate, is_image, GRID_THUMBNAIL_SIZE
+from src.virtualtree import VirtualFileTreeModel, use_virtual_tree, set_use_virtual_tree
+from src.namefilter import NameIndexBuilder, NameMatchModel
+from src.quickopen import path_index
 from PyQt6.QtWidgets import (
-    QApplication, QMainWindow, QVBoxLayout, QWidget, QTreeView, QInputDialog, 
-    QMessageBox, QToolBar, QLabel, QSplitter, QMenu, QFileDialog
+    QVBoxLayout, QWidget, QTreeView, QInputDialog,
+    QMessageBox, QToolBar, QLabel, QSplitter, QMenu, QFileDialog, QLineEdit, QListWidget, QListWidgetItem,
+    QProgressBar, QPushButton, QHBoxLayout, QListView, QStackedWidget
 )
-from PyQt6.QtGui import QIcon, QAction, QFileSystemModel, QPixmap, QPainter, QPen, QStandardItemModel, QStandardItem, QFileSystemModel
-from PyQt6.QtCore import Qt, QSize, pyqtSignal, QModelIndex, QAbstractItemModel
+from PyQt6.QtGui import QIcon, QAction, QKeySequence, QShortcut, QFileSystemModel, QPixmap, QPainter, QPen
+from PyQt6.QtCore import Qt, QSize, pyqtSignal, QItemSelectionModel, QCoreApplication, QTimer
 
 
+# Rows on each side of the current one whose previews are loaded ahead of time
+PREFETCH_NEIGHBOURS = 2
+# Image previews are scaled to fit the preview pane
+PREVIEW_IMAGE_SIZE = 300
+# Failures listed in the summary after a batch operation; the rest go to the log only
+JOB_ERROR_LINES = 20
 
 
 class ToolbarWithDividers(QToolBar):
@@ -20,35 +39,21 @@ class ToolbarWithDividers(QToolBar):
         painter.drawLine(0, 0, 0, self.height())
 
 
-class TaggedFileSystemModel(QFileSystemModel):
-    def __init__(self, parent=None):
+class TaggedFileSystemModel(TaggedModelMixin, QFileSystemModel):
+    def __init__(self, parent=None, tag_store=None):
         super().__init__(parent)
-        self.tagged_items = set()
-
-    def flags(self, index):
-        return super().flags(index) | Qt.ItemFlag.ItemIsUserCheckable
-
-    def data(self, index, role):
-        if role == Qt.ItemDataRole.CheckStateRole and self.filePath(index) in self.tagged_items:
-            return Qt.CheckState.Checked
-        return super().data(index, role)
-
-    def set_tagged(self, index, tagged):
-        file_path = self.filePath(index)
-        if tagged:
-            self.tagged_items.add(file_path)
-        else:
-            self.tagged_items.discard(file_path)
-        self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+        self.setup_tags(tag_store)
 
     def create_folder(self, path, name):
-        self.untag_all()
         return super().mkdir(path, name)
 
-    def untag_all(self):
-        if self.tagged_items:
-            self.tagged_items.clear()
-            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, 0), [Qt.ItemDataRole.CheckStateRole])
+    def contains_path(self, item_path):
+        # Without loading anything, unlike index(path) on the compact model
+        return self.index(item_path).isValid()
+
+    def apply_changes(self, changes):
+        # QFileSystemModel follows its own watcher
+        pass
 
 
 class DocumentsWindow(QWidget):
@@ -56,72 +61,293 @@ class DocumentsWindow(QWidget):
 
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.logger = LoggingWindow()
+        self.logger = log_bus()
         self.clipboard = []
+        self.clipboard_tagged = False
         self.tagging_active = False
+        self.active_job = None
         self.setup_ui()
 
     def setup_ui(self):
-        self.model = TaggedFileSystemModel()
+        # The compact model keeps very large trees within a memory cap; the choice applies from the next start
+        self.model = VirtualFileTreeModel() if use_virtual_tree() else TaggedFileSystemModel()
         self.model.setRootPath('src/docs')
         self.model.setReadOnly(False)
 
+        # Views see the files through a proxy that adds recursive folder sizes and sorts by them
+        self.proxy = FolderSizeProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.size_worker = FolderSizeWorker('src/docs', parent=self)
+        self.size_worker.sizes_ready.connect(self.show_folder_sizes)
+        self.size_worker.scan_finished.connect(self.proxy.sizes_settled)
+        self.size_worker.start()
+        QCoreApplication.instance().aboutToQuit.connect(self.size_worker.stop)
+
+        # Watcher events and DocMan's own file operations reach the index and folder sizes as coalesced changes
+        self.changes = ChangeTracker(self)
+        self.changes.changes_ready.connect(self.apply_changes)
+        self.model.directoryLoaded.connect(self.changes.watch)
+        self.changes.watch('src/docs')
+        QCoreApplication.instance().aboutToQuit.connect(self.changes.stop)
+
         self.tree = QTreeView()
-        self.tree.setModel(self.model)
-        self.tree.setRootIndex(self.model.index('src/docs'))
+        self.tree.setModel(self.proxy)
+        self.tree.setRootIndex(self.view_index('src/docs'))
+        self.tree.setSortingEnabled(True)
+        self.tree.sortByColumn(0, Qt.SortOrder.AscendingOrder)
         self.tree.setSelectionMode(QTreeView.SelectionMode.ExtendedSelection)
         self.tree.setContextMenuPolicy(Qt.ContextMenuPolicy.ActionsContextMenu)
         self.tree.setDragDropMode(QTreeView.DragDropMode.DragDrop)
         self.tree.doubleClicked.connect(self.handle_double_click)
+        if isinstance(self.model, VirtualFileTreeModel):
+            # Folders expanded or shown as the root are never unloaded to stay under the memory cap
+            self.tree.expanded.connect(lambda index: self.model.set_expanded(self.proxy.mapToSource(index), True))
+            self.tree.collapsed.connect(lambda index: self.model.set_expanded(self.proxy.mapToSource(index), False))
         self.tree.selectionModel().selectionChanged.connect(self.update_preview)
 
         self.preview = QLabel("𝗣𝗿𝗲𝘃𝗶𝗲𝘄 𝗣𝗮𝗻𝗲")
         self.preview.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
         self.preview.setWordWrap(True)
+        self.preview.setTextFormat(Qt.TextFormat.PlainText)
         self.preview.setFixedWidth(300)
 
+        self.thumbnail_loader = ThumbnailLoader(self)
+        self.thumbnail_loader.thumbnail_loaded.connect(self.show_image_preview)
+        self.thumbnail_loader.thumbnail_failed.connect(self.show_image_preview_error)
+        self.thumbnail_loader.start()
+        QCoreApplication.instance().aboutToQuit.connect(self.thumbnail_loader.stop)
+        tracer().gauge("thumbnails", self.thumbnail_loader.queue_length)
+        self.preview_image_key = None
+
+        # Folder contents as a grid of thumbnails, sharing the tree's model and selection
+        self.grid = QListView()
+        self.grid.setModel(self.proxy)
+        self.grid.setSelectionModel(self.tree.selectionModel())
+        self.grid.setViewMode(QListView.ViewMode.IconMode)
+        self.grid.setResizeMode(QListView.ResizeMode.Adjust)
+        self.grid.setMovement(QListView.Movement.Static)
+        self.grid.setUniformItemSizes(True)
+        self.grid.setLayoutMode(QListView.LayoutMode.Batched)
+        self.grid.setBatchSize(200)
+        self.grid.setWordWrap(True)
+        self.grid.setIconSize(QSize(GRID_THUMBNAIL_SIZE, GRID_THUMBNAIL_SIZE))
+        self.grid.setGridSize(QSize(GRID_THUMBNAIL_SIZE + 24, GRID_THUMBNAIL_SIZE + 40))
+        self.grid.setSelectionMode(QListView.SelectionMode.ExtendedSelection)
+        self.grid.setItemDelegate(ThumbnailDelegate(self.grid, self.thumbnail_loader))
+        self.grid.doubleClicked.connect(self.handle_double_click)
+
+        # Typing narrows the current folder to the matching names, looked up in a name index and listed in place of
+        # the tree; re-filtering the tree itself costs time for every entry in the folder on each keystroke
+        self.name_filter = QLineEdit()
+        self.name_filter.setPlaceholderText("Filter this folder...")
+        self.name_filter.setClearButtonEnabled(True)
+        self.name_filter.textChanged.connect(self.filter_names)
+        self.name_filter.returnPressed.connect(lambda: self.filter_view.setFocus())
+        QShortcut(QKeySequence("Escape"), self.name_filter, self.name_filter.clear, context=Qt.ShortcutContext.WidgetShortcut)
+        self.name_index = None
+        self.name_index_builder = NameIndexBuilder(self)
+        self.name_index_builder.index_ready.connect(self.set_name_index)
+        self.name_index_builder.start()
+        QCoreApplication.instance().aboutToQuit.connect(self.name_index_builder.stop)
+        self.name_matches = NameMatchModel(self)
+        self.filter_view = QListView()
+        self.filter_view.setModel(self.name_matches)
+        self.filter_view.setUniformItemSizes(True)
+        self.filter_view.setSelectionMode(QListView.SelectionMode.ExtendedSelection)
+        self.filter_view.selectionModel().selectionChanged.connect(self.select_filter_matches)
+        self.filter_view.activated.connect(self.open_filter_match)
+
+        self.views = QStackedWidget()
+        self.views.addWidget(self.tree)
+        self.views.addWidget(self.grid)
+        self.views.addWidget(self.filter_view)
+        self.browse_view = self.tree
+        self.request_name_index()
+        browser = QWidget()
+        browser_layout = QVBoxLayout(browser)
+        browser_layout.setContentsMargins(0, 0, 0, 0)
+        browser_layout.addWidget(self.name_filter)
+        browser_layout.addWidget(self.views)
+
+        self.preview_loader = PreviewLoader(self)
+        self.preview_loader.preview_loaded.connect(self.show_preview)
+        self.preview_loader.preview_failed.connect(self.show_preview_error)
+        self.preview_loader.start()
+        QCoreApplication.instance().aboutToQuit.connect(self.preview_loader.stop)
+        tracer().gauge("preview_prefetch", lambda: len(self.preview_loader.prefetch_paths))
+
         splitter = QSplitter()
-        splitter.addWidget(self.tree)
+        splitter.addWidget(browser)
         splitter.addWidget(self.preview)
         splitter.setStretchFactor(0, 3)
         splitter.setStretchFactor(1, 1)
 
         self.layout = QVBoxLayout(self)
+        self.setup_search()
         self.layout.addWidget(splitter)
 
+        self.job_progress = QProgressBar()
+        self.job_progress.hide()
+        self.job_cancel_button = QPushButton("Cancel")
+        self.job_cancel_button.clicked.connect(self.cancel_job)
+        self.job_cancel_button.hide()
+        self.ingest_status = QLabel()
+        self.ingest_status.hide()
+        ingest_pipeline().status_changed.connect(self.show_ingest_status)
+        job_layout = QHBoxLayout()
+        job_layout.addWidget(self.ingest_status)
+        job_layout.addWidget(self.job_progress)
+        job_layout.addWidget(self.job_cancel_button)
+        self.layout.addLayout(job_layout)
+        QCoreApplication.instance().aboutToQuit.connect(self.stop_job)
+
         self.toolbar = ToolbarWithDividers()
         self.toolbar.setIconSize(QSize(16, 16))
         self.layout.addWidget(self.toolbar, alignment=Qt.AlignmentFlag.AlignRight)
         self.setup_actions()
         self.setLayout(self.layout)
 
+    def setup_search(self):
+        self.search_index = SearchIndex()
+        self.index_worker = IndexWorker(os.path.abspath('src/docs'), parent=self)
+        self.index_worker.progress.connect(self.show_index_progress)
+        self.index_worker.failed.connect(lambda path, error: self.logger.log_error(f"Error indexing {path}: {error}", action="index", path=path, error=error))
+        self.index_worker.start()
+        QCoreApplication.instance().aboutToQuit.connect(self.index_worker.stop)
+        tracer().gauge("index", lambda: len(self.index_worker.pending_paths))
+        QCoreApplication.instance().aboutToQuit.connect(self.search_index.close)
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search documents...")
+        self.search_input.setClearButtonEnabled(True)
+        self.search_input.textChanged.connect(lambda: self.search_timer.start())
+        self.search_input.returnPressed.connect(self.run_search)
+
+        # Wait for a pause in typing before querying the index
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.run_search)
+
+        self.search_results = QListWidget()
+        self.search_results.setMaximumHeight(180)
+        self.search_results.setWordWrap(True)
+        self.search_results.itemActivated.connect(self.open_search_result)
+        self.search_results.hide()
+
+        self.layout.addWidget(self.search_input)
+        self.layout.addWidget(self.search_results)
+
+    def run_search(self):
+        self.search_timer.stop()
+        text = self.search_input.text().strip()
+        self.search_results.clear()
+        if not text:
+            self.search_results.hide()
+            return
+        hits = self.search_index.search(text)
+        root = os.path.abspath('src/docs')
+        for item_path, snippet in hits:
+            item = QListWidgetItem(f"{os.path.relpath(item_path, root)}\n    {' '.join(snippet.split())}")
+            item.setData(Qt.ItemDataRole.UserRole, item_path)
+            self.search_results.addItem(item)
+        if not hits:
+            self.search_results.addItem("No matches.")
+        self.search_results.show()
+
+    def open_search_result(self, item):
+        item_path = item.data(Qt.ItemDataRole.UserRole)
+        if item_path:
+            self.reveal_path(item_path)
+            self.logger.log_interaction(f"Opened search result: {item_path}", action="open", path=item_path)
+
+    def view_index(self, item_path):
+        return self.proxy.mapFromSource(self.model.index(item_path))
+
+    def apply_changes(self, changes):
+        item_paths = []
+        for kind, item_path, new_path in changes:
+            item_paths.append(item_path)
+            if new_path:
+                item_paths.append(new_path)
+        self.model.apply_changes(changes)
+        self.model.apply_tag_changes(changes)
+        if self.name_index is not None and self.name_index.apply_changes(changes) and self.name_filter.text():
+            self.filter_names()
+        path_index().apply_changes(changes)
+        self.index_worker.reindex(item_paths)
+        self.size_worker.invalidate(item_paths)
+        self.logger.log_debug(f"Applied {len(changes)} file changes")
+
+    def show_folder_sizes(self, sizes):
+        self.proxy.update_sizes(sizes)
+        self.tree.viewport().update()
+
+    def reveal_path(self, item_path):
+        if not os.path.abspath(item_path).startswith(self.current_folder() + os.sep):
+            self.set_root_index(self.view_index('src/docs'))
+        self.name_filter.clear()
+        index = self.view_index(item_path)
+        if index.isValid():
+            self.tree.setCurrentIndex(index)
+            self.tree.scrollTo(index)
+
+    def show_index_progress(self, done, total):
+        self.search_input.setPlaceholderText(f"Search documents... (indexing {done}/{total})" if done < total else "Search documents...")
 
     def update_preview(self):
         index = self.tree.currentIndex()
         if index.isValid():
-            item_path = self.model.filePath(index)
-            if os.path.isdir(item_path):
-                self.preview.setText(f"Folder: {os.path.basename(item_path)}")
+            item_path = self.proxy.filePath(index)
+            self.preview.setTextFormat(Qt.TextFormat.PlainText)
+            self.preview.setText(f"Loading {os.path.basename(item_path)}...")
+            if not self.proxy.isDir(index) and is_image(item_path):
+                self.preview_image_key = (item_path, PREVIEW_IMAGE_SIZE, self.proxy.lastModified(index).toMSecsSinceEpoch())
+                self.thumbnail_loader.request(self.preview_image_key)
             else:
-                if os.path.exists(item_path):
-                    try:
-                        with open(item_path, 'r') as file:
-                            content = file.read()
-                        self.preview.setText(content)
-                    except Exception as e:
-                        self.preview.setText(f"Error reading file: {str(e)}")
-                        self.logger.log_error(f"Error reading file {item_path}: {str(e)}")
-                else:
-                    self.preview.setText("Error: File not found.")
-                    self.logger.log_error(f"File not found: {item_path}")
-            self.logger.log_interaction(f"Updated preview for item: {item_path}")
-
+                self.preview_image_key = None
+                self.preview_loader.request(item_path)
+            self.preview_loader.prefetch(self.neighbour_paths(index))
+            self.logger.log_debug(f"Updated preview for item: {item_path}")
+
+    def neighbour_paths(self, index, count=PREFETCH_NEIGHBOURS):
+        paths = []
+        above = below = index
+        for _ in range(count):
+            below = self.tree.indexBelow(below)
+            above = self.tree.indexAbove(above)
+            for neighbour in (below, above):
+                if neighbour.isValid() and not self.proxy.isDir(neighbour) and not is_image(self.proxy.filePath(neighbour)):
+                    paths.append(self.proxy.filePath(neighbour))
+        return paths
+
+    def show_image_preview(self, key, image):
+        if key == self.preview_image_key:
+            self.preview.setPixmap(QPixmap.fromImage(image))
+
+    def show_image_preview_error(self, key, error):
+        if key == self.preview_image_key:
+            self.preview.setTextFormat(Qt.TextFormat.PlainText)
+            self.preview.setText(f"Error reading image: {error}")
+            self.logger.log_error(f"Error reading image {key[0]}: {error}", action="preview", path=key[0], error=error)
+
+    def show_preview(self, request_id, item_path, text):
+        if self.preview_image_key is None and self.preview_loader.is_current(request_id):
+            self.preview.setTextFormat(Qt.TextFormat.RichText if is_markdown(item_path) else Qt.TextFormat.PlainText)
+            self.preview.setText(text)
+
+    def show_preview_error(self, request_id, item_path, error):
+        if self.preview_image_key is None and self.preview_loader.is_current(request_id):
+            self.preview.setTextFormat(Qt.TextFormat.PlainText)
+            self.preview.setText(f"Error reading file: {error}")
+        self.logger.log_error(f"Error reading file {item_path}: {error}", action="preview", path=item_path, error=error)
 
 
     def setup_actions(self):
         actions = [
             ("folder-new", "🖿", self.create_folder),
             ("go-up", "🢁", self.go_up),
+            ("view-grid", "Grid", self.toggle_grid),
             ("edit-rename", "Rename", self.rename_item),
             ("document-properties", "Properties", self.show_properties),
             ("edit-copy", "Copy", self.copy_item),
@@ -143,61 +369,142 @@ class DocumentsWindow(QWidget):
         menu.addAction("Paste Tagged", self.paste_tagged_items)
         menu.addAction("Delete Tagged", self.delete_tagged_items)
         menu.addAction("Untag All", self.model.untag_all)
+        menu.addSeparator()
+        menu.addAction("Add Tag to Selection...", self.add_tag_to_selection)
+        menu.addAction("Remove Tag from Selection...", self.remove_tag_from_selection)
+        menu.addAction(f"Active Tag: {self.model.active_tag}...", self.choose_active_tag)
+        menu.addAction("Find Files With Tags...", self.find_tagged_files)
+        menu.addSeparator()
+        menu.addAction("Update Hash Catalog", self.update_hash_catalog)
+        menu.addAction("Find Duplicates", self.find_duplicates)
+        menu.addAction("Verify Integrity", self.verify_integrity)
+        menu.addSeparator()
+        menu.addAction("Watch Folder...", self.choose_watch_folder)
+        if ingest_pipeline().is_running():
+            menu.addAction("Stop Watching Folder", self.stop_watch_folder)
+        menu.addSeparator()
+        compact_tree = menu.addAction("Compact Tree for Large Folders")
+        compact_tree.setCheckable(True)
+        compact_tree.setChecked(use_virtual_tree())
+        compact_tree.toggled.connect(self.toggle_virtual_tree)
 
         # Display the menu at the toolbar's position
         menu.exec(self.toolbar.mapToGlobal(self.toolbar.rect().bottomLeft()))
 
 
     def handle_double_click(self, index):
-        item_path = self.model.filePath(index)
-        self.tree.setRootIndex(index if os.path.isdir(item_path) else self.tree.rootIndex())
-        self.logger.log_interaction(f"Double clicked on item: {item_path}")
+        item_path = self.proxy.filePath(index)
+        self.set_root_index(index if os.path.isdir(item_path) else self.tree.rootIndex())
+        self.logger.log_interaction(f"Double clicked on item: {item_path}", action="open", path=item_path)
+
+    def set_root_index(self, index):
+        self.tree.setRootIndex(index)
+        self.grid.setRootIndex(index)
+        if isinstance(self.model, VirtualFileTreeModel):
+            self.model.set_view_root(self.proxy.mapToSource(index))
+        self.name_filter.clear()
+        self.request_name_index()
+
+    def current_folder(self):
+        return os.path.abspath(self.proxy.filePath(self.tree.rootIndex()) or 'src/docs')
+
+    def request_name_index(self):
+        self.name_index = None
+        self.name_index_builder.request(self.current_folder())
+
+    def set_name_index(self, index):
+        # A folder left before its index was ready is ignored
+        if index.directory == self.current_folder():
+            self.name_index = index
+            self.filter_names()
+
+    def filter_names(self):
+        text = self.name_filter.text()
+        if not text:
+            self.views.setCurrentWidget(self.browse_view)
+            return
+        # Until the index is ready the list stays empty; it is filled as soon as the index arrives
+        matches = []
+        if self.name_index is not None:
+            with tracer().span("name_filter", text):
+                matches = self.name_index.search(text)
+        self.name_matches.set_matches(self.current_folder(), matches)
+        self.views.setCurrentWidget(self.filter_view)
+
+    def select_filter_matches(self):
+        # The tree keeps the selection, so the preview and every action work on the matches chosen here
+        selection = self.tree.selectionModel()
+        current = self.filter_view.currentIndex()
+        if current.isValid():
+            selection.setCurrentIndex(self.view_index(self.name_matches.filePath(current)), QItemSelectionModel.SelectionFlag.NoUpdate)
+        selection.clearSelection()
+        for index in self.filter_view.selectedIndexes():
+            view_index = self.view_index(self.name_matches.filePath(index))
+            if view_index.isValid():
+                selection.select(view_index, QItemSelectionModel.SelectionFlag.Select | QItemSelectionModel.SelectionFlag.Rows)
+
+    def open_filter_match(self, index):
+        item_path = self.name_matches.filePath(index)
+        if os.path.isdir(item_path):
+            self.set_root_index(self.view_index(item_path))
+        else:
+            self.name_filter.clear()
+            self.reveal_path(item_path)
+        self.logger.log_interaction(f"Opened filter match: {item_path}", action="open", path=item_path)
+
+    def toggle_virtual_tree(self, enabled):
+        set_use_virtual_tree(enabled)
+        self.logger.log_interaction(f"{'Enabled' if enabled else 'Disabled'} compact tree model", action="settings")
+        QMessageBox.information(self, "Compact Tree", "The tree model will change the next time DocMan starts.")
+
+    def toggle_grid(self):
+        showing_grid = self.browse_view is self.grid
+        if not showing_grid:
+            self.grid.setRootIndex(self.tree.rootIndex())
+        self.browse_view = self.tree if showing_grid else self.grid
+        if not self.name_filter.text():
+            self.views.setCurrentWidget(self.browse_view)
+        self.logger.log_interaction(f"Switched to {'tree' if showing_grid else 'grid'} view", action="view")
 
 
     def create_folder(self):
         if self.tree.selectionModel().hasSelection():
             QMessageBox.warning(self, "Items Selected", "Please unselect all items before creating a new folder.")
             return
-        index = self.tree.currentIndex()
-        parent_path = self.model.rootPath()
+        parent_index = self.proxy.mapToSource(self.tree.rootIndex())
         folder_name, ok = QInputDialog.getText(self, "Create Folder", "Folder name:")
         if ok and folder_name:
-            new_folder_path = os.path.join(parent_path, folder_name)
-            try:
-                os.makedirs(new_folder_path, exist_ok=True)
-                QMessageBox.information(self, "Folder Created", f"Folder '{folder_name}' created successfully.")
-            except OSError as e:
-                QMessageBox.critical(self, "Error", f"Failed to create folder: {e.strerror}")
+            # Created through the model, which inserts the one new row instead of re-reading the folder
+            index = self.model.create_folder(parent_index, folder_name)
+            if not index.isValid():
+                QMessageBox.critical(self, "Error", f"Failed to create folder '{folder_name}'.")
+                return
+            new_folder_path = self.model.filePath(index)
+            self.changes.record(CREATED, new_folder_path)
+            self.logger.log_interaction(f"Created folder: {new_folder_path}", action="create", path=new_folder_path)
+            QMessageBox.information(self, "Folder Created", f"Folder '{folder_name}' created successfully.")
 
     def delete_item(self):
-        indexes = self.tree.selectedIndexes()
-        for index in indexes:
-            if index.column() == 0:
-                file_path = self.model.filePath(index)
-                try:
-                    shutil.rmtree(file_path) if os.path.isdir(file_path) else os.remove(file_path)
-                    self.model.remove(index)
-                    self.logger.log_interaction(f"Deleted item: {file_path}")
-                    QMessageBox.information(self, "Item Deleted", f"Deleted item: {file_path}")
-                except Exception as e:
-                    self.logger.log_error(f"Error deleting item: {str(e)}")
-                    QMessageBox.critical(self, "Error", f"Failed to delete item: {str(e)}")
+        item_paths = self.selected_paths()
+        if item_paths:
+            self.start_file_job("delete", item_paths)
 
     def rename_item(self):
         index = self.tree.currentIndex()
         if index.isValid():
-            item_path = self.model.filePath(index)
+            item_path = self.proxy.filePath(index)
             new_name, ok = QInputDialog.getText(self, "Rename", "New name:", text=os.path.basename(item_path))
             if ok and new_name:
                 new_path = os.path.join(os.path.dirname(item_path), new_name)
                 try:
-                    os.rename(item_path, new_path)
-                    # Refresh the model
-                    self.model.setRootPath(self.model.rootPath())
-                    self.logger.log_interaction(f"Renamed item: {item_path} to {new_path}")
+                    # Renamed through the model, which moves the row in place and keeps the selection
+                    if os.path.exists(new_path) or not self.model.setData(self.proxy.mapToSource(index.siblingAtColumn(0)), new_name):
+                        raise OSError(f"could not rename {item_path} to {new_path}")
+                    self.changes.record(RENAMED, item_path, new_path)
+                    self.logger.log_interaction(f"Renamed item: {item_path} to {new_path}", action="rename", path=item_path)
                     QMessageBox.information(self, "Item Renamed", f"Renamed item: {item_path} to {new_path}")
                 except OSError as e:
-                    self.logger.log_error(f"Error renaming item: {str(e)}")
+                    self.logger.log_error(f"Error renaming item: {str(e)}", action="rename", path=item_path, error=str(e))
                     QMessageBox.critical(self, "Error", f"Failed to rename item: {str(e)}")
 
 
@@ -206,97 +513,269 @@ class DocumentsWindow(QWidget):
     def show_properties(self):
         index = self.tree.currentIndex()
         if index.isValid():
-            item_path = self.model.filePath(index)
+            item_path = self.proxy.filePath(index)
+            if os.path.isdir(item_path):
+                # The inode size of a folder says nothing; its recursive total comes from the size worker
+                total = self.proxy.folder_size(item_path)
+                size = "calculating..." if total is None else f"{format_size(total[0])} ({total[0]} bytes) in {total[1]} files"
+            else:
+                size = f"{os.path.getsize(item_path)} bytes"
             properties = (
                 f"Path: {item_path}\n"
-                f"Size: {os.path.getsize(item_path)} bytes\n"
+                f"Size: {size}\n"
                 f"Modified: {os.path.getmtime(item_path)}"
             )
             QMessageBox.information(self, "Properties", properties)
 
     def go_up(self):
         current_index = self.tree.rootIndex()
-        current_path = self.model.filePath(current_index)
+        current_path = self.proxy.filePath(current_index)
         parent_path = os.path.dirname(current_path)
-        parent_index = self.model.index(parent_path)
+        parent_index = self.view_index(parent_path)
 
         # Set the new root index to the parent directory
-        self.tree.setRootIndex(parent_index)
+        self.set_root_index(parent_index)
         
-        # Untag all items when going up
-        self.model.untag_all()
-        
-        self.logger.log_interaction(f"Navigated up from {current_path} to {parent_path}")
+        self.logger.log_interaction(f"Navigated up from {current_path} to {parent_path}", action="navigate", path=parent_path)
+
+
+    def selected_paths(self):
+        return [self.proxy.filePath(index) for index in self.tree.selectedIndexes() if index.column() == 0]
 
+    def paste_destination(self):
+        dest_index = self.tree.currentIndex()
+        dest_path = self.proxy.filePath(dest_index if dest_index.isValid() else self.tree.rootIndex())
+        return dest_path if os.path.isdir(dest_path) else os.path.dirname(dest_path)
 
     def copy_item(self):
-        self.clipboard = self.tree.selectedIndexes()
+        self.clipboard = self.selected_paths()
+        self.clipboard_tagged = False
         self.logger.log_interaction("Copied items to clipboard")
 
     def paste_item(self):
         if not self.clipboard:
             QMessageBox.warning(self, "Clipboard Empty", "No items to paste.")
             return
-        dest_index = self.tree.currentIndex()
-        dest_path = self.model.filePath(dest_index)
-        for index in self.clipboard:
-            src_path = self.model.filePath(index)
-            try:
-                if os.path.isfile(src_path):
-                    shutil.copy2(src_path, dest_path)
-                else:
-                    shutil.copytree(src_path, os.path.join(dest_path, os.path.basename(src_path)))
-                self.logger.log_interaction(f"Pasted item: {src_path} to {dest_path}")
-                QMessageBox.information(self, "Item Pasted", f"Pasted item: {src_path} to {dest_path}")
-            except Exception as e:
-                self.logger.log_error(f"Error pasting item: {str(e)}")
-                QMessageBox.critical(self, "Error", f"Failed to paste item: {str(e)}")
+        self.start_file_job("copy", self.clipboard, self.paste_destination())
+
+    def start_file_job(self, operation, item_paths, dest_dir=None):
+        job = FileOperationJob(operation, item_paths, dest_dir, self)
+        job.completed.connect(self.finish_file_job)
+        if self.begin_job(job, ("Copying" if operation == "copy" else "Deleting") + " %v of %m"):
+            self.logger.log_interaction(f"Started {operation} of {len(item_paths)} items", action=operation)
+
+    def begin_job(self, job, progress_format):
+        if self.active_job is not None:
+            QMessageBox.warning(self, "Operation Running", "Wait for the current operation to finish or cancel it.")
+            job.deleteLater()
+            return False
+        self.active_job = job
+        job.progress.connect(self.show_job_progress)
+        self.job_progress.setFormat(progress_format)
+        self.job_progress.setRange(0, 0)
+        self.job_progress.show()
+        self.job_cancel_button.show()
+        job.start()
+        return True
+
+    def end_job(self):
+        self.active_job.wait()
+        self.active_job.deleteLater()
+        self.active_job = None
+        self.job_progress.hide()
+        self.job_cancel_button.hide()
+
+    def show_job_progress(self, done, total):
+        self.job_progress.setMaximum(total)
+        self.job_progress.setValue(done)
+
+    def cancel_job(self):
+        if self.active_job is not None:
+            self.active_job.cancel()
+            self.logger.log_interaction("Cancelling running operation")
+
+    def stop_job(self):
+        if self.active_job is not None:
+            self.active_job.cancel()
+            self.active_job.wait()
+
+    def finish_file_job(self, operation, succeeded, errors, cancelled):
+        self.end_job()
+
+        verb = "Pasted" if operation == "copy" else "Deleted"
+        for src_path, target_path in succeeded:
+            self.logger.log_interaction(f"{verb} item: {src_path}" + (f" to {target_path}" if operation == "copy" else ""), action=operation, path=src_path)
+        for item_path, error in errors:
+            self.logger.log_error(f"Error {'pasting' if operation == 'copy' else 'deleting'} item {item_path}: {error}", action=operation, path=item_path, error=error)
+        for _, target_path in succeeded:
+            self.changes.record(CREATED if operation == "copy" else DELETED, target_path)
+        if operation == "delete":
+            self.model.untag_paths([item_path for item_path, _ in succeeded])
+
+        self.show_job_summary(f"{verb} {len(succeeded)} items.", errors, cancelled)
+
+    def show_job_summary(self, summary, errors, cancelled):
+        if cancelled:
+            summary += " The operation was cancelled."
+        if errors:
+            details = "\n".join(f"{item_path}: {error}" for item_path, error in errors[:JOB_ERROR_LINES])
+            if len(errors) > JOB_ERROR_LINES:
+                details += f"\n... and {len(errors) - JOB_ERROR_LINES} more"
+            QMessageBox.warning(self, "Operation Finished With Errors", f"{summary}\n{len(errors)} items failed:\n\n{details}")
+        else:
+            QMessageBox.information(self, "Operation Finished", summary)
+
+    def start_hash_job(self, mode):
+        job = HashJob(mode, os.path.abspath('src/docs'), parent=self)
+        job.completed.connect(self.finish_hash_job)
+        progress_format = {"catalog": "Hashing %v of %m", "duplicates": "Hashing %v of %m candidates", "verify": "Verifying %v of %m"}[mode]
+        if self.begin_job(job, progress_format):
+            self.logger.log_interaction(f"Started hash job: {mode}", action="hash")
+
+    def update_hash_catalog(self):
+        self.start_hash_job("catalog")
+
+    def find_duplicates(self):
+        self.start_hash_job("duplicates")
+
+    def verify_integrity(self):
+        self.start_hash_job("verify")
+
+    def finish_hash_job(self, mode, result, errors, cancelled):
+        self.end_job()
+        for item_path, error in errors:
+            self.logger.log_error(f"Error hashing {item_path}: {error}", action="hash", path=item_path, error=error)
+        if result is None or cancelled:
+            self.show_job_summary("Hashing stopped before it finished.", errors, cancelled)
+            return
+
+        if mode == "catalog":
+            self.logger.log_interaction(f"Hash catalog updated: {result} files")
+            self.show_job_summary(f"Hash catalog holds {result} files.", errors, cancelled)
+            return
+        if mode == "duplicates":
+            copies = sum(len(item_paths) - 1 for item_paths in result.values())
+            summary = f"{len(result)} groups of identical files, {copies} redundant copies."
+            dialog = HashResultsDialog("Duplicates", summary, ["File", "Size", "SHA-256"], self)
+            dialog.show_duplicates(result)
+        else:
+            summary = f"{len(result)} files failed verification." if result else "All catalogued files match their recorded SHA-256."
+            dialog = HashResultsDialog("Integrity Verification", summary, ["File", "Problem", "Detail"], self)
+            dialog.show_mismatches(result)
+        self.logger.log_interaction(f"Hash job {mode} finished: {summary}")
+        dialog.open_path.connect(self.reveal_path)
+        dialog.show()
+
+    def choose_watch_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Watch Folder", watch_folder())
+        if not folder:
+            return
+        if os.path.abspath(folder).startswith(os.path.abspath('src/docs') + os.sep):
+            QMessageBox.warning(self, "Watch Folder", "The watch folder cannot be inside the case folder.")
+            return
+        try:
+            ingest_pipeline().start(folder)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Could not watch folder:\n{e}")
+            self.logger.log_error(f"Error watching folder {folder}: {e}", action="ingest", path=folder, error=str(e))
+            return
+        set_watch_folder(folder)
+        self.logger.log_interaction(f"Watching folder {folder}", action="ingest", path=folder)
+
+    def stop_watch_folder(self):
+        ingest_pipeline().stop()
+        set_watch_folder("")
+        self.logger.log_interaction("Stopped watching folder", action="ingest")
+
+    def show_ingest_status(self, status):
+        if not status["running"]:
+            self.ingest_status.hide()
+            return
+        in_flight = sum(status.get(stage, 0) for stage in ("waiting", "copy", "hash", "extract", "index"))
+        self.ingest_status.setText(f"Ingest: {status.get('done', 0)} done, {in_flight} in progress, {status.get('failed', 0)} failed")
+        self.ingest_status.show()
 
     def tag_item(self):
         index = self.tree.currentIndex()
         if index.isValid():
-            tagged = self.model.filePath(index) in self.model.tagged_items
-            self.model.set_tagged(index, not tagged)
+            item_paths = self.selected_paths() or [self.proxy.filePath(index)]
+            tagged = self.model.tag_store.has_tag(self.proxy.filePath(index), self.model.active_tag)
+            changed = self.model.set_tagged_paths(item_paths, not tagged)
             action = "Tagged" if not tagged else "Untagged"
-            self.logger.log_interaction(f"{action} item: {self.model.filePath(index)}")
+            self.logger.log_interaction(f"{action} {len(changed)} items with '{self.model.active_tag}'")
+
+    def ask_tag_name(self, title):
+        tags = self.model.tag_store.all_tags() or [self.model.active_tag]
+        tag, ok = QInputDialog.getItem(self, title, "Tag:", tags, 0, True)
+        tag = tag.strip()
+        return tag if ok and tag else None
+
+    def add_tag_to_selection(self):
+        item_paths = self.selected_paths()
+        tag = self.ask_tag_name("Add Tag") if item_paths else None
+        if tag:
+            changed = self.model.set_tagged_paths(item_paths, True, tag)
+            self.logger.log_interaction(f"Tagged {len(changed)} items with '{tag}'")
+
+    def remove_tag_from_selection(self):
+        item_paths = self.selected_paths()
+        tag = self.ask_tag_name("Remove Tag") if item_paths else None
+        if tag:
+            changed = self.model.set_tagged_paths(item_paths, False, tag)
+            self.logger.log_interaction(f"Removed tag '{tag}' from {len(changed)} items")
+
+    def choose_active_tag(self):
+        tag = self.ask_tag_name("Active Tag")
+        if tag:
+            self.model.set_active_tag(tag)
+            self.logger.log_interaction(f"Active tag set to '{tag}'")
+
+    def find_tagged_files(self):
+        text, ok = QInputDialog.getText(self, "Find Files With Tags", "Tags (all must match):", text=self.model.active_tag)
+        if not ok or not text.split():
+            return
+        item_paths = self.model.tag_store.paths_with_tags(text.split())
+        self.search_results.clear()
+        for item_path in item_paths:
+            item = QListWidgetItem(item_path)
+            item.setData(Qt.ItemDataRole.UserRole, item_path)
+            self.search_results.addItem(item)
+        if not item_paths:
+            self.search_results.addItem("No files carry all of these tags.")
+        self.search_results.show()
+        self.logger.log_interaction(f"Found {len(item_paths)} files tagged {', '.join(text.split())}")
 
     def copy_tagged_items(self):
-        if not self.model.tagged_items:
+        tagged_items = self.model.tagged_items
+        if not tagged_items:
             QMessageBox.warning(self, "No Tagged Items", "No tagged items to copy.")
             return
-        self.clipboard = list(self.model.tagged_items)
+        self.clipboard = tagged_items
+        self.clipboard_tagged = True
         self.logger.log_interaction("Copied tagged items to clipboard")
 
+    def verified_tagged_paths(self, item_paths):
+        # Files may have been swapped or moved since the list was made
+        verified = self.model.tag_store.verified_paths(item_paths)
+        if len(verified) < len(item_paths):
+            self.logger.log_interaction(f"Skipped {len(item_paths) - len(verified)} tagged items no longer at their recorded path")
+        return verified
+
     def paste_tagged_items(self):
-        if not self.clipboard:
+        item_paths = self.verified_tagged_paths(self.clipboard) if self.clipboard_tagged else self.clipboard
+        if not item_paths:
             QMessageBox.warning(self, "Clipboard Empty", "No items to paste.")
             return
-        dest_index = self.tree.currentIndex()
-        dest_path = self.model.filePath(dest_index)
-        for src_path in self.clipboard:
-            try:
-                if os.path.isfile(src_path):
-                    shutil.copy2(src_path, dest_path)
-                else:
-                    shutil.copytree(src_path, os.path.join(dest_path, os.path.basename(src_path)))
-                self.logger.log_interaction(f"Pasted tagged item: {src_path} to {dest_path}")
-                QMessageBox.information(self, "Item Pasted", f"Pasted tagged item: {src_path} to {dest_path}")
-            except Exception as e:
-                self.logger.log_error(f"Error pasting tagged item: {str(e)}")
-                QMessageBox.critical(self, "Error", f"Failed to paste tagged item: {str(e)}")
+        self.start_file_job("copy", item_paths, self.paste_destination())
 
     def delete_tagged_items(self):
-        if not self.model.tagged_items:
+        tagged_items = self.model.tagged_items
+        if not tagged_items:
             QMessageBox.warning(self, "No Tagged Items", "No tagged items to delete.")
             return
-        reply = QMessageBox.question(self, 'Confirm Delete', f"Are you sure you want to delete {len(self.model.tagged_items)} tagged items?",
+        reply = QMessageBox.question(self, 'Confirm Delete', f"Are you sure you want to delete {len(tagged_items)} tagged items?",
                                      QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if reply == QMessageBox.StandardButton.Yes:
-            for item_path in self.model.tagged_items:
-                try:
-                    shutil.rmtree(item_path) if os.path.isdir(item_path) else os.remove(item_path)
-                    self.logger.log_interaction(f"Deleted tagged item: {item_path}")
-                except Exception as e:
-                    self.logger.log_error(f"Error deleting tagged item: {str(e)}")
-            self.model.untag_all()
-            QMessageBox.information(self, "Items Deleted", "Tagged items deleted successfully.")
+            tagged_items = self.verified_tagged_paths(tagged_items)
+            if tagged_items:
+                self.start_file_job("delete", tagged_items)
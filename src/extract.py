@@ -0,0 +1,391 @@
+import os
+import re
+import zlib
+import time
+import hashlib
+import sqlite3
+import zipfile
+import itertools
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from xml.etree import ElementTree
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+EXTRACT_DB = os.path.join('src', 'data', 'extract.db')
+# Plain text is read directly and never cached; only the head is used, by search and the preview alike
+PLAIN_TEXT_BYTES = 2 * 1024 * 1024
+# Parsed formats are read whole, up to this size
+EXTRACT_MAX_BYTES = 64 * 1024 * 1024
+HASH_CHUNK_BYTES = 1024 * 1024
+EXTRACT_WORKERS = min(4, os.cpu_count() or 1)
+EXTRACT_CHUNK = 64
+CHUNKS_IN_FLIGHT = EXTRACT_WORKERS * 2
+# Least recently used texts are dropped once the cache holds more than this, compressed
+EXTRACT_CACHE_BYTES = 512 * 1024 * 1024
+
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+ODF_TEXT_NAMESPACE = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+
+
+class ExtractionError(Exception):
+    pass
+
+
+def read_plain_text(item_path):
+    with open(item_path, 'rb') as file:
+        data = file.read(PLAIN_TEXT_BYTES)
+    if b'\x00' in data[:8192]:
+        return ""
+    return data.decode('utf-8', errors='replace')
+
+
+def read_limited(item_path):
+    if os.path.getsize(item_path) > EXTRACT_MAX_BYTES:
+        raise ExtractionError(f"larger than {EXTRACT_MAX_BYTES // (1024 * 1024)} MB")
+    with open(item_path, 'rb') as file:
+        return file.read()
+
+
+class HtmlTextParser(HTMLParser):
+    SKIPPED = {"script", "style", "head", "noscript", "template"}
+    BREAKS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "pre", "blockquote"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED:
+            self.skipping += 1
+        elif tag in self.BREAKS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED and self.skipping:
+            self.skipping -= 1
+        elif tag in self.BREAKS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+    def text(self):
+        lines = (" ".join(line.split()) for line in "".join(self.parts).splitlines())
+        return "\n".join(line for line in lines if line)
+
+
+def extract_html(item_path):
+    parser = HtmlTextParser()
+    parser.feed(read_limited(item_path).decode('utf-8', errors='replace'))
+    parser.close()
+    return parser.text()
+
+
+def extract_pdf(item_path):
+    if PdfReader is None:
+        raise ExtractionError("PDF text needs pypdf (pip install pypdf)")
+    if os.path.getsize(item_path) > EXTRACT_MAX_BYTES:
+        raise ExtractionError(f"larger than {EXTRACT_MAX_BYTES // (1024 * 1024)} MB")
+    reader = PdfReader(item_path)
+    return "\n\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def xml_paragraphs(data, paragraph_tags, text_tag=None):
+    paragraphs = []
+    for _, element in ElementTree.iterparse(data, events=("end",)):
+        if element.tag in paragraph_tags:
+            if text_tag is None:
+                paragraphs.append("".join(element.itertext()))
+            else:
+                paragraphs.append("".join(node.text or "" for node in element.iter(text_tag)))
+            element.clear()
+    return "\n".join(paragraph for paragraph in paragraphs if paragraph)
+
+
+def extract_docx(item_path):
+    with zipfile.ZipFile(item_path) as archive, archive.open("word/document.xml") as data:
+        return xml_paragraphs(data, {f"{WORD_NAMESPACE}p"}, f"{WORD_NAMESPACE}t")
+
+
+def extract_odf(item_path):
+    with zipfile.ZipFile(item_path) as archive, archive.open("content.xml") as data:
+        return xml_paragraphs(data, {f"{ODF_TEXT_NAMESPACE}p", f"{ODF_TEXT_NAMESPACE}h"})
+
+
+def extract_legacy_doc(item_path):
+    # Old binary Word files have no stdlib parser; their text is stored as runs of UTF-16 or 8-bit characters
+    data = read_limited(item_path)
+    runs = re.findall(rb'(?:[\x20-\x7e\r\n\t]\x00){4,}', data)
+    text = [run.decode('utf-16-le', errors='ignore') for run in runs]
+    if not text:
+        text = [run.decode('latin-1') for run in re.findall(rb'[\x20-\x7e\r\n\t]{4,}', data)]
+    return "\n".join(text)
+
+
+# Extension -> (name, function). The name is stored with cached text, so changing an extractor's output means renaming it
+EXTRACTORS = {}
+
+
+def register_extractor(extensions, name, function):
+    for extension in extensions:
+        EXTRACTORS[extension.lower().lstrip('.')] = (name, function)
+
+
+register_extractor(("html", "htm", "xhtml"), "html-1", extract_html)
+register_extractor(("pdf",), "pdf-1", extract_pdf)
+register_extractor(("docx", "docm"), "docx-1", extract_docx)
+register_extractor(("odt", "ott"), "odf-1", extract_odf)
+register_extractor(("doc",), "doc-1", extract_legacy_doc)
+
+
+def extractor_for(item_path):
+    return EXTRACTORS.get(os.path.splitext(item_path)[1].lower().lstrip('.'))
+
+
+def needs_extraction(item_path):
+    return extractor_for(item_path) is not None
+
+
+def file_sha256(item_path):
+    digest = hashlib.sha256()
+    with open(item_path, 'rb') as file:
+        while chunk := file.read(HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    # Extracted text keyed by content hash, plus the last known hash of each path so unchanged files are not re-hashed
+    def __init__(self, db_path=EXTRACT_DB, read_only=False):
+        if read_only:
+            self.db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.executescript("""
+                CREATE TABLE IF NOT EXISTS texts (
+                    sha256 TEXT NOT NULL,
+                    extractor TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    used_at REAL NOT NULL,
+                    PRIMARY KEY (sha256, extractor)
+                );
+                CREATE TABLE IF NOT EXISTS paths (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    sha256 TEXT NOT NULL
+                );
+            """)
+        self.lock = threading.Lock()
+        # Cache hits only bump used_at; those writes wait for the next commit instead of holding a transaction open
+        self.touched = {}
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.db.close()
+
+    def flush(self):
+        with self.lock:
+            if self.touched:
+                self.write_touches()
+                self.db.commit()
+
+    def write_touches(self):
+        self.db.executemany("UPDATE texts SET used_at = ? WHERE sha256 = ? AND extractor = ?",
+                            ((used_at, sha256, extractor) for (sha256, extractor), used_at in self.touched.items()))
+        self.touched = {}
+
+    def text(self, sha256, extractor):
+        with self.lock:
+            row = self.db.execute("SELECT body FROM texts WHERE sha256 = ? AND extractor = ?", (sha256, extractor)).fetchone()
+        return None if row is None else zlib.decompress(row[0]).decode('utf-8')
+
+    def lookup(self, item_path, size, mtime_ns, extractor):
+        with self.lock:
+            row = self.db.execute("""
+                SELECT paths.sha256, texts.body FROM paths JOIN texts ON texts.sha256 = paths.sha256 AND texts.extractor = ?
+                WHERE paths.path = ? AND paths.size = ? AND paths.mtime_ns = ?
+            """, (extractor, item_path, size, mtime_ns)).fetchone()
+            if row is None:
+                return None
+            self.touched[row[0], extractor] = time.time()
+        return zlib.decompress(row[1]).decode('utf-8')
+
+    def store(self, item_path, size, mtime_ns, sha256, extractor, text):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO paths (path, size, mtime_ns, sha256) VALUES (?, ?, ?, ?)", (item_path, size, mtime_ns, sha256))
+            if text is not None:
+                self.db.execute("INSERT OR REPLACE INTO texts (sha256, extractor, body, used_at) VALUES (?, ?, ?, ?)",
+                                (sha256, extractor, zlib.compress(text.encode('utf-8')), time.time()))
+            self.write_touches()
+            self.db.commit()
+
+    def prune(self, max_bytes=EXTRACT_CACHE_BYTES):
+        self.flush()
+        with self.lock:
+            total = self.db.execute("SELECT coalesce(sum(length(body)), 0) FROM texts").fetchone()[0]
+            if total <= max_bytes:
+                return
+            for sha256, extractor, size in self.db.execute("SELECT sha256, extractor, length(body) FROM texts ORDER BY used_at").fetchall():
+                self.db.execute("DELETE FROM texts WHERE sha256 = ? AND extractor = ?", (sha256, extractor))
+                total -= size
+                if total <= max_bytes:
+                    break
+            self.db.execute("DELETE FROM paths WHERE sha256 NOT IN (SELECT sha256 FROM texts)")
+            self.db.commit()
+
+
+_worker_cache = None
+
+
+def cached_text(sha256, extractor):
+    # Each pool process opens its own read-only connection; only the parent writes
+    global _worker_cache
+    if _worker_cache is None:
+        try:
+            _worker_cache = ExtractionCache(EXTRACT_DB, read_only=True)
+        except sqlite3.Error:
+            return None
+    try:
+        return _worker_cache.text(sha256, extractor)
+    except sqlite3.Error:
+        return None
+
+
+def extract_file(item_path):
+    # Runs in a pool process. Returns (path, mtime_ns, size, sha256, extractor, text, error, parsed)
+    try:
+        stat = os.stat(item_path)
+        found = extractor_for(item_path)
+        if found is None:
+            return item_path, stat.st_mtime_ns, stat.st_size, None, None, read_plain_text(item_path), None, False
+        name, function = found
+        # A copy of an already parsed document has the same hash and is not parsed again
+        sha256 = file_sha256(item_path)
+        text = cached_text(sha256, name)
+        if text is not None:
+            return item_path, stat.st_mtime_ns, stat.st_size, sha256, name, text, None, False
+        return item_path, stat.st_mtime_ns, stat.st_size, sha256, name, function(item_path), None, True
+    except Exception as e:
+        return item_path, None, None, None, None, None, str(e) or type(e).__name__, False
+
+
+def extract_files(item_paths):
+    return [extract_file(item_path) for item_path in item_paths]
+
+
+class TextExtractor:
+    def __init__(self, db_path=EXTRACT_DB, workers=EXTRACT_WORKERS):
+        self.cache = ExtractionCache(db_path)
+        self.cache.prune()
+        self.workers = workers
+        self.pool = None
+        self.lock = threading.Lock()
+
+    def executor(self):
+        # Started on first use; spawned, so the workers never inherit the GUI's state
+        with self.lock:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+            return self.pool
+
+    def shutdown(self):
+        with self.lock:
+            if self.pool is not None:
+                self.pool.shutdown(wait=False, cancel_futures=True)
+                self.pool = None
+        self.cache.flush()
+
+    def cached(self, item_path):
+        found = extractor_for(item_path)
+        if found is None:
+            return None
+        try:
+            stat = os.stat(item_path)
+        except OSError:
+            return None
+        text = self.cache.lookup(item_path, stat.st_size, stat.st_mtime_ns, found[0])
+        if text is None:
+            return None
+        return item_path, stat.st_mtime_ns, stat.st_size, None, found[0], text, None, False
+
+    def collect(self, result):
+        item_path, mtime_ns, size, sha256, extractor, text, error, parsed = result
+        if sha256 is not None:
+            self.cache.store(item_path, size, mtime_ns, sha256, extractor, text if parsed else None)
+        return item_path, mtime_ns, size, text, error
+
+    def extract(self, item_path):
+        # (path, mtime_ns, size, text, error); text is None when the file could not be read
+        result = self.cached(item_path)
+        if result is None:
+            result = self.executor().submit(extract_file, item_path).result()
+        return self.collect(result)
+
+    def text(self, item_path):
+        _, _, _, text, error = self.extract(item_path)
+        if text is None:
+            raise ExtractionError(error)
+        return text
+
+    def extract_many(self, item_paths):
+        # Files go to the pool in chunks, to keep the per-task overhead off small files, and only a few chunks
+        # are in flight at once, so stopping early leaves little queued work behind
+        window = deque()
+        paths = iter(item_paths)
+        try:
+            while True:
+                chunk = list(itertools.islice(paths, EXTRACT_CHUNK))
+                if not chunk:
+                    break
+                ready = []
+                uncached = []
+                for item_path in chunk:
+                    result = self.cached(item_path)
+                    if result is None:
+                        uncached.append(item_path)
+                    else:
+                        ready.append(result)
+                window.append((ready, self.executor().submit(extract_files, uncached) if uncached else None))
+                if len(window) >= CHUNKS_IN_FLIGHT:
+                    yield from self.collect_chunk(*window.popleft())
+            while window:
+                yield from self.collect_chunk(*window.popleft())
+        finally:
+            for _, future in window:
+                if future is not None:
+                    future.cancel()
+
+    def collect_chunk(self, ready, future):
+        for result in ready + (future.result() if future is not None else []):
+            yield self.collect(result)
+
+
+_text_extractor = None
+_text_extractor_lock = threading.Lock()
+
+
+def text_extractor():
+    global _text_extractor
+    with _text_extractor_lock:
+        if _text_extractor is None:
+            _text_extractor = TextExtractor()
+            # Imported here so the spawned pool processes, which load this module, never load Qt
+            from PyQt6.QtCore import QCoreApplication
+            app = QCoreApplication.instance()
+            if app is not None:
+                app.aboutToQuit.connect(_text_extractor.shutdown)
+        return _text_extractor
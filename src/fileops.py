@@ -0,0 +1,79 @@
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PyQt6.QtCore import QThread, pyqtSignal
+from src.tracing import tracer
+
+FILE_OPERATION_WORKERS = 4
+
+
+class OperationCancelled(Exception):
+    pass
+
+
+def copy_destination(src_path, dest_dir):
+    return os.path.join(dest_dir, os.path.basename(src_path.rstrip(os.sep)))
+
+
+class FileOperationJob(QThread):
+    progress = pyqtSignal(int, int)
+    completed = pyqtSignal(str, list, list, bool)
+
+    def __init__(self, operation, item_paths, dest_dir=None, parent=None):
+        super().__init__(parent)
+        self.operation = operation
+        self.item_paths = list(item_paths)
+        self.dest_dir = dest_dir
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def checked_copy(self, src, dst, *, follow_symlinks=True):
+        # copytree calls this per file, which lets a cancel stop a large folder part way through
+        if self.cancel_event.is_set():
+            raise OperationCancelled()
+        return shutil.copy2(src, dst, follow_symlinks=follow_symlinks)
+
+    def copy_item(self, src_path):
+        target = copy_destination(src_path, self.dest_dir)
+        with tracer().span("file_copy", src_path):
+            if os.path.isdir(src_path):
+                shutil.copytree(src_path, target, copy_function=self.checked_copy)
+            else:
+                self.checked_copy(src_path, target)
+        return target
+
+    def delete_item(self, item_path):
+        if self.cancel_event.is_set():
+            raise OperationCancelled()
+        with tracer().span("file_delete", item_path):
+            if os.path.isdir(item_path) and not os.path.islink(item_path):
+                shutil.rmtree(item_path)
+            else:
+                os.remove(item_path)
+        return item_path
+
+    def run(self):
+        handler = self.copy_item if self.operation == "copy" else self.delete_item
+        total = len(self.item_paths)
+        done = 0
+        succeeded = []
+        errors = []
+        self.progress.emit(0, total)
+        with tracer().span("file_job", f"{self.operation} of {total} items"), ThreadPoolExecutor(max_workers=FILE_OPERATION_WORKERS) as pool:
+            futures = {pool.submit(handler, item_path): item_path for item_path in self.item_paths}
+            for future in as_completed(futures):
+                try:
+                    succeeded.append((futures[future], future.result()))
+                except OperationCancelled:
+                    pass
+                except Exception as e:
+                    errors.append((futures[future], str(e)))
+                done += 1
+                self.progress.emit(done, total)
+        self.completed.emit(self.operation, succeeded, errors, self.is_cancelled())
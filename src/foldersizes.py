@@ -0,0 +1,286 @@
+import os
+import time
+import sqlite3
+from PyQt6.QtGui import QFileSystemModel
+from PyQt6.QtCore import Qt, QThread, QMutex, QMutexLocker, QWaitCondition, QSortFilterProxyModel, pyqtSignal
+from src.tracing import tracer
+
+FOLDER_SIZE_DB = os.path.join('src', 'data', 'foldersizes.db')
+# Directory mtimes are re-checked this often even without a change reported by DocMan itself
+REFRESH_SECONDS = 60
+# Finished subtree totals are handed to the GUI at most this often while a scan runs
+EMIT_SECONDS = 0.25
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def scan_directory(item_path):
+    # Sizes and counts of the files directly in item_path, and its subdirectories
+    own_size = own_files = 0
+    subdirectories = []
+    try:
+        with os.scandir(item_path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        own_size += entry.stat(follow_symlinks=False).st_size
+                        own_files += 1
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return own_size, own_files, subdirectories
+
+
+class FolderSizeCache:
+    def __init__(self, db_path=FOLDER_SIZE_DB):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS directories (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                own_size INTEGER NOT NULL,
+                own_files INTEGER NOT NULL,
+                subdirectories TEXT NOT NULL
+            );
+        """)
+
+    def close(self):
+        self.db.close()
+
+    def entries(self):
+        # path -> [mtime_ns, own_size, own_files, subdirectory paths]; only names are stored
+        return {path: [mtime_ns, own_size, own_files, [os.path.join(path, name) for name in names.split('\n') if name]]
+                for path, mtime_ns, own_size, own_files, names in self.db.execute("SELECT * FROM directories")}
+
+    def update(self, entries, removed):
+        self.db.executemany("INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?, ?)",
+                            ((path, mtime_ns, own_size, own_files, '\n'.join(os.path.basename(sub) for sub in subdirectories))
+                             for path, (mtime_ns, own_size, own_files, subdirectories) in entries.items()))
+        self.db.executemany("DELETE FROM directories WHERE path = ?", ((path,) for path in removed))
+        self.db.commit()
+
+
+class FolderSizeWorker(QThread):
+    # path -> (total bytes, total files) for every directory whose total changed
+    sizes_ready = pyqtSignal(dict)
+    # Sent after each scan, once its last totals have gone out through sizes_ready
+    scan_finished = pyqtSignal()
+
+    def __init__(self, root, db_path=FOLDER_SIZE_DB, parent=None):
+        super().__init__(parent)
+        self.root = os.path.abspath(root)
+        self.db_path = db_path
+        self.mutex = QMutex()
+        self.condition = QWaitCondition()
+        self.dirty = set()
+        self.scan_requested = True
+        self.running = True
+        self.entries = {}
+        self.totals = {}
+
+    def invalidate(self, item_paths):
+        # Files changed in place leave their directory's mtime alone, so DocMan's own operations report them here
+        with QMutexLocker(self.mutex):
+            for item_path in item_paths:
+                item_path = os.path.abspath(item_path)
+                self.dirty.add(os.path.dirname(item_path))
+                self.dirty.add(item_path)
+            self.scan_requested = True
+            self.condition.wakeOne()
+
+    def refresh(self):
+        with QMutexLocker(self.mutex):
+            self.scan_requested = True
+            self.condition.wakeOne()
+
+    def stop(self):
+        with QMutexLocker(self.mutex):
+            self.running = False
+            self.condition.wakeOne()
+        self.wait()
+
+    def is_running(self):
+        with QMutexLocker(self.mutex):
+            return self.running
+
+    def run(self):
+        cache = FolderSizeCache(self.db_path)
+        try:
+            # Last session's results are shown straight away and then checked
+            self.entries = cache.entries()
+            self.emit_totals(self.compute_totals())
+            self.scan_finished.emit()
+            while True:
+                with QMutexLocker(self.mutex):
+                    if self.running and not self.scan_requested:
+                        self.condition.wait(self.mutex, REFRESH_SECONDS * 1000)
+                    if not self.running:
+                        return
+                    self.scan_requested = False
+                    dirty, self.dirty = self.dirty, set()
+                with tracer().span("folder_sizes", self.root):
+                    changed, removed = self.scan(dirty)
+                self.scan_finished.emit()
+                if changed or removed:
+                    cache.update(changed, removed)
+        finally:
+            cache.close()
+
+    def compute_totals(self):
+        totals = {}
+        stack = [(self.root, False)]
+        while stack:
+            item_path, expanded = stack.pop()
+            entry = self.entries.get(item_path)
+            if entry is None:
+                continue
+            if expanded:
+                totals[item_path] = self.subtree_total(entry, totals)
+            else:
+                stack.append((item_path, True))
+                stack.extend((sub, False) for sub in entry[3])
+        return totals
+
+    def subtree_total(self, entry, totals):
+        size, files = entry[1], entry[2]
+        for sub in entry[3]:
+            sub_size, sub_files = totals.get(sub, (0, 0))
+            size += sub_size
+            files += sub_files
+        return size, files
+
+    def scan(self, dirty):
+        # Post-order walk: a directory is re-listed only if its mtime moved or it was reported dirty,
+        # and its total is final, and sent, as soon as all of its subdirectories are done
+        changed = {}
+        visited = set()
+        totals = {}
+        ready = {}
+        last_emit = time.monotonic()
+        stack = [(self.root, False)]
+        while stack:
+            item_path, expanded = stack.pop()
+            if expanded:
+                totals[item_path] = self.subtree_total(self.entries[item_path], totals)
+                if totals[item_path] != self.totals.get(item_path):
+                    ready[item_path] = totals[item_path]
+                if ready and time.monotonic() - last_emit > EMIT_SECONDS:
+                    self.emit_totals(ready)
+                    ready = {}
+                    last_emit = time.monotonic()
+                continue
+            if not self.is_running():
+                return changed, []
+            try:
+                mtime_ns = os.stat(item_path).st_mtime_ns
+            except OSError:
+                continue
+            entry = self.entries.get(item_path)
+            if entry is None or entry[0] != mtime_ns or item_path in dirty:
+                own_size, own_files, subdirectories = scan_directory(item_path)
+                entry = self.entries[item_path] = [mtime_ns, own_size, own_files, subdirectories]
+                changed[item_path] = entry
+            visited.add(item_path)
+            stack.append((item_path, True))
+            stack.extend((sub, False) for sub in entry[3])
+        removed = [item_path for item_path in self.entries if item_path not in visited]
+        for item_path in removed:
+            del self.entries[item_path]
+            self.totals.pop(item_path, None)
+        self.emit_totals(ready)
+        return changed, removed
+
+    def emit_totals(self, totals):
+        if totals:
+            self.totals.update(totals)
+            self.sizes_ready.emit(dict(totals))
+
+
+class FolderSizeProxyModel(QSortFilterProxyModel):
+    # Shows recursive folder sizes in the Size column and sorts by them; other columns keep the source
+    # model's own sort where it has one, since a Python lessThan costs several model calls per comparison
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.folder_sizes = {}
+        self.sizes_pending = False
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        source = self.sourceModel()
+        if column != 1 and isinstance(source, QFileSystemModel):
+            source.sort(column, order)
+            # Column -1 keeps the source's order, which a descending order here would reverse
+            super().sort(-1, Qt.SortOrder.AscendingOrder)
+        else:
+            super().sort(column, order)
+
+    def update_sizes(self, sizes):
+        # Re-sorting waits for sizes_settled(), and only happens if a folder the views can show moved
+        source = self.sourceModel()
+        for item_path, total in sizes.items():
+            if self.sortColumn() == 1 and not self.sizes_pending and self.folder_sizes.get(item_path) != total:
+                self.sizes_pending = source is not None and source.contains_path(item_path)
+            self.folder_sizes[item_path] = total
+
+    def sizes_settled(self):
+        if self.sizes_pending:
+            self.sizes_pending = False
+            if self.sortColumn() == 1:
+                self.invalidate()
+
+    def folder_size(self, item_path):
+        return self.folder_sizes.get(os.path.abspath(item_path))
+
+    def source_path(self, index):
+        return self.sourceModel().filePath(self.mapToSource(index))
+
+    def filePath(self, index):
+        return self.source_path(index)
+
+    def isDir(self, index):
+        return self.sourceModel().isDir(self.mapToSource(index))
+
+    def lastModified(self, index):
+        return self.sourceModel().lastModified(self.mapToSource(index))
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if index.column() == 1 and role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole) and self.isDir(index):
+            total = self.folder_size(self.source_path(index))
+            if total is not None:
+                size, files = total
+                return format_size(size) if role == Qt.ItemDataRole.DisplayRole else f"{size:,} bytes in {files:,} files"
+        return super().data(index, role)
+
+    def folder_size_key(self, source, index):
+        total = self.folder_size(source.filePath(index))
+        return total[0] if total is not None else -1
+
+    def lessThan(self, left, right):
+        source = self.sourceModel()
+        left_dir, right_dir = source.isDir(left), source.isDir(right)
+        # Folders stay ahead of files whichever way the column is sorted, as in QFileSystemModel
+        if left_dir != right_dir:
+            return left_dir if self.sortOrder() == Qt.SortOrder.AscendingOrder else right_dir
+        column = left.column()
+        if column == 1:
+            left_key = self.folder_size_key(source, left) if left_dir else source.size(left)
+            right_key = self.folder_size_key(source, right) if right_dir else source.size(right)
+        elif column == 3:
+            left_key, right_key = source.lastModified(left), source.lastModified(right)
+        else:
+            left_key = str(source.data(left, Qt.ItemDataRole.DisplayRole)).casefold()
+            right_key = str(source.data(right, Qt.ItemDataRole.DisplayRole)).casefold()
+        if left_key == right_key:
+            return source.fileName(left).casefold() < source.fileName(right).casefold()
+        return left_key < right_key
@@ -0,0 +1,214 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from PyQt6.QtCore import QThread, pyqtSignal
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QTreeWidget, QTreeWidgetItem, QLabel, QPushButton
+from src.search import walk_files
+from src.tracing import tracer
+
+HASH_DB = os.path.join('src', 'data', 'hashes.db')
+HASH_CHUNK_BYTES = 1024 * 1024
+COMMIT_EVERY = 200
+
+
+def hash_file(item_path):
+    # Streams the file in fixed chunks so memory use does not depend on file size
+    try:
+        stat = os.stat(item_path)
+        digest = hashlib.sha256()
+        with open(item_path, 'rb') as file:
+            while chunk := file.read(HASH_CHUNK_BYTES):
+                digest.update(chunk)
+        return item_path, stat.st_size, stat.st_mtime_ns, digest.hexdigest(), None
+    except OSError as e:
+        return item_path, None, None, None, str(e)
+
+
+class HashCatalog:
+    def __init__(self, db_path=HASH_DB):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                hashed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS files_size ON files (size);
+            CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256);
+        """)
+
+    def close(self):
+        self.db.close()
+
+    def entries(self):
+        return {path: (size, mtime_ns) for path, size, mtime_ns in self.db.execute("SELECT path, size, mtime_ns FROM files")}
+
+    def store(self, item_path, size, mtime_ns, sha256):
+        self.db.execute("INSERT OR REPLACE INTO files (path, size, mtime_ns, sha256, hashed_at) VALUES (?, ?, ?, ?, ?)",
+                        (item_path, size, mtime_ns, sha256, time.time()))
+
+    def remove(self, item_paths):
+        self.db.executemany("DELETE FROM files WHERE path = ?", ((item_path,) for item_path in item_paths))
+
+    def stale_files(self, root, sizes=None):
+        # Returns the files on disk whose size or mtime no longer match the catalog, plus catalog rows for vanished files
+        known = self.entries()
+        stale = []
+        for item_path, mtime_ns, size in walk_files(root):
+            if sizes is not None and size not in sizes:
+                known.pop(item_path, None)
+                continue
+            if known.pop(item_path, None) != (size, mtime_ns):
+                stale.append(item_path)
+        return stale, list(known)
+
+    def duplicates(self):
+        groups = {}
+        for sha256, size, path in self.db.execute("""
+            SELECT sha256, size, path FROM files
+            WHERE size > 0 AND sha256 IN (
+                SELECT sha256 FROM files WHERE size > 0 GROUP BY sha256 HAVING COUNT(*) > 1
+            )
+            ORDER BY size DESC, sha256, path
+        """):
+            groups.setdefault((sha256, size), []).append(path)
+        return groups
+
+    def recorded(self):
+        return self.db.execute("SELECT path, size, mtime_ns, sha256 FROM files ORDER BY path").fetchall()
+
+
+def colliding_sizes(root):
+    # Only files that share their size with another file can be exact duplicates
+    seen = set()
+    colliding = set()
+    for _, _, size in walk_files(root):
+        if size in seen:
+            colliding.add(size)
+        seen.add(size)
+    colliding.discard(0)
+    return colliding
+
+
+class HashJob(QThread):
+    progress = pyqtSignal(int, int)
+    completed = pyqtSignal(str, object, list, bool)
+
+    def __init__(self, mode, root, db_path=HASH_DB, parent=None):
+        super().__init__(parent)
+        self.mode = mode
+        self.root = root
+        self.db_path = db_path
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        catalog = HashCatalog(self.db_path)
+        errors = []
+        try:
+            with tracer().span(f"hash_{self.mode}", self.root):
+                if self.mode == "verify":
+                    result = self.verify(catalog, errors)
+                else:
+                    sizes = colliding_sizes(self.root) if self.mode == "duplicates" else None
+                    self.update_catalog(catalog, sizes, errors)
+                    result = catalog.duplicates() if self.mode == "duplicates" else len(catalog.entries())
+        except Exception as e:
+            errors.append((self.root, str(e)))
+            result = None
+        finally:
+            catalog.close()
+        self.completed.emit(self.mode, result, errors, self.cancel_event.is_set())
+
+    def hash_in_pool(self, item_paths):
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(mp_context=context) as pool:
+            for result in pool.map(hash_file, item_paths, chunksize=16):
+                if self.cancel_event.is_set():
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    return
+                yield result
+
+    def update_catalog(self, catalog, sizes, errors):
+        stale, vanished = catalog.stale_files(self.root, sizes)
+        catalog.remove(vanished)
+        catalog.db.commit()
+        total = len(stale)
+        self.progress.emit(0, total)
+        for done, (item_path, size, mtime_ns, sha256, error) in enumerate(self.hash_in_pool(stale), 1):
+            if error:
+                errors.append((item_path, error))
+            else:
+                catalog.store(item_path, size, mtime_ns, sha256)
+            if done % COMMIT_EVERY == 0:
+                catalog.db.commit()
+                self.progress.emit(done, total)
+        catalog.db.commit()
+        self.progress.emit(total, total)
+
+    def verify(self, catalog, errors):
+        recorded = {path: (size, mtime_ns, sha256) for path, size, mtime_ns, sha256 in catalog.recorded()}
+        mismatches = []
+        total = len(recorded)
+        self.progress.emit(0, total)
+        for done, (item_path, size, mtime_ns, sha256, error) in enumerate(self.hash_in_pool(list(recorded)), 1):
+            expected_size, expected_mtime, expected_sha = recorded[item_path]
+            if error:
+                mismatches.append((item_path, "missing or unreadable", error))
+            elif sha256 != expected_sha:
+                if (size, mtime_ns) == (expected_size, expected_mtime):
+                    mismatches.append((item_path, "content changed without a new mtime", sha256))
+                else:
+                    mismatches.append((item_path, "modified since it was catalogued", sha256))
+            if done % COMMIT_EVERY == 0:
+                self.progress.emit(done, total)
+        self.progress.emit(total, total)
+        return mismatches
+
+
+class HashResultsDialog(QDialog):
+    open_path = pyqtSignal(str)
+
+    def __init__(self, title, summary, headers, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(800, 500)
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(summary))
+
+        self.results = QTreeWidget()
+        self.results.setHeaderLabels(headers)
+        self.results.itemActivated.connect(self.activate_item)
+        layout.addWidget(self.results)
+
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.accept)
+        layout.addWidget(close_button)
+
+    def activate_item(self, item):
+        if item.childCount() == 0:
+            self.open_path.emit(item.text(0))
+
+    def show_duplicates(self, groups):
+        for (sha256, size), item_paths in groups.items():
+            group = QTreeWidgetItem([f"{len(item_paths)} copies", f"{size} bytes", sha256])
+            for item_path in item_paths:
+                group.addChild(QTreeWidgetItem([item_path, "", ""]))
+            self.results.addTopLevelItem(group)
+        self.results.expandAll()
+        self.results.resizeColumnToContents(0)
+
+    def show_mismatches(self, mismatches):
+        for item_path, problem, detail in mismatches:
+            self.results.addTopLevelItem(QTreeWidgetItem([item_path, problem, detail]))
+        self.results.resizeColumnToContents(0)
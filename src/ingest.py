@@ -0,0 +1,402 @@
+import os
+import time
+import queue
+import shutil
+import sqlite3
+import threading
+from collections import deque
+from PyQt6.QtCore import QObject, QTimer, QSettings, QFileSystemWatcher, QCoreApplication, pyqtSignal
+from src.search import DATA_DIRECTORY, SearchIndex, walk_files
+from src.extract import text_extractor
+from src.hashes import HashCatalog, hash_file
+from src.tracing import tracer
+
+INGEST_DB = os.path.join(DATA_DIRECTORY, 'ingest.db')
+CASE_DIRECTORY = os.path.join('src', 'docs')
+WATCH_FOLDER_KEY = "ingest/watch_folder"
+# A file is ingested only once its size and mtime have held still this long, so collectors can finish writing it
+SETTLE_SECONDS = 2.0
+SCAN_DEBOUNCE_MS = 500
+# Watcher events only cover the top folder and can be dropped under load, so the inbox is also rescanned periodically
+RESCAN_SECONDS = 30
+STATUS_MS = 500
+# Bounded hand-off queues between stages; a slow stage makes the ones before it wait instead of buffering the whole dump
+QUEUE_SIZE = 256
+COPY_WORKERS = 4
+HASH_WORKERS = 2
+EXTRACT_WORKERS = 2
+COMMIT_EVERY = 200
+# The index stage commits this often even while busy, so the GUI's own connections get the write lock
+INDEX_COMMIT_EVERY = 100
+INDEX_COMMIT_SECONDS = 1.0
+FINISHED = ("done", "failed")
+
+
+class IngestState:
+    # Stage reached by every source file, so an interrupted ingest resumes where it stopped
+    def __init__(self, db_path=INGEST_DB):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS items (
+                source TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime_ns INTEGER,
+                stage TEXT NOT NULL,
+                target TEXT,
+                sha256 TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS items_stage ON items (stage);
+        """)
+        self.lock = threading.Lock()
+        self.uncommitted = 0
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+    def known(self, inbox):
+        prefix = inbox.rstrip(os.sep) + os.sep
+        with self.lock:
+            return {source: (size, mtime_ns) for source, size, mtime_ns in
+                    self.db.execute("SELECT source, size, mtime_ns FROM items WHERE substr(source, 1, ?) = ?", (len(prefix), prefix))}
+
+    def unfinished(self, inbox):
+        prefix = inbox.rstrip(os.sep) + os.sep
+        with self.lock:
+            return self.db.execute("SELECT source, size, mtime_ns, stage, target, sha256 FROM items WHERE stage NOT IN (?, ?) AND substr(source, 1, ?) = ?",
+                                   FINISHED + (len(prefix), prefix)).fetchall()
+
+    def set_stage(self, source, stage, size=None, mtime_ns=None, target=None, sha256=None, error=None):
+        with self.lock:
+            self.db.execute("""
+                INSERT INTO items (source, size, mtime_ns, stage, target, sha256, error, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (source) DO UPDATE SET
+                    stage = excluded.stage,
+                    size = coalesce(excluded.size, size),
+                    mtime_ns = coalesce(excluded.mtime_ns, mtime_ns),
+                    target = excluded.target,
+                    sha256 = coalesce(excluded.sha256, sha256),
+                    error = excluded.error,
+                    updated_at = excluded.updated_at
+            """, (source, size, mtime_ns, stage, target, sha256, error, time.time()))
+            self.uncommitted += 1
+            if self.uncommitted >= COMMIT_EVERY:
+                self.db.commit()
+                self.uncommitted = 0
+
+    def commit(self):
+        with self.lock:
+            if self.uncommitted:
+                self.db.commit()
+                self.uncommitted = 0
+
+    def counts(self):
+        with self.lock:
+            return dict(self.db.execute("SELECT stage, COUNT(*) FROM items GROUP BY stage"))
+
+
+def put_until_stopped(target_queue, item, stopping):
+    # Blocks while the next stage is full, but still notices a shutdown
+    while not stopping.is_set():
+        try:
+            target_queue.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class Stage:
+    def __init__(self, name, workers, handler, inbox, outbox, pipeline, idle=None, close=None):
+        self.name = name
+        self.handler = handler
+        self.inbox = inbox
+        self.outbox = outbox
+        self.pipeline = pipeline
+        self.idle = idle
+        self.close = close
+        self.active = 0
+        self.lock = threading.Lock()
+        self.threads = [threading.Thread(target=self.run, name=f"ingest-{name}-{number}", daemon=True) for number in range(workers)]
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def join(self):
+        for thread in self.threads:
+            thread.join()
+
+    def run(self):
+        stopping = self.pipeline.stopping
+        try:
+            while not stopping.is_set():
+                try:
+                    item = self.inbox.get(timeout=0.5)
+                except queue.Empty:
+                    if self.idle is not None:
+                        self.idle()
+                    continue
+                with self.lock:
+                    self.active += 1
+                try:
+                    with tracer().span(f"ingest_{self.name}", item["source"]):
+                        self.handler(item)
+                except Exception as e:
+                    self.pipeline.fail(item, self.name, e)
+                    continue
+                finally:
+                    with self.lock:
+                        self.active -= 1
+                if self.outbox is not None:
+                    put_until_stopped(self.outbox, item, stopping)
+        finally:
+            if self.close is not None:
+                self.close()
+
+
+class IngestPipeline(QObject):
+    status_changed = pyqtSignal(dict)
+
+    def __init__(self, case_directory=CASE_DIRECTORY, db_path=INGEST_DB, parent=None):
+        super().__init__(parent)
+        self.case_directory = os.path.abspath(case_directory)
+        self.db_path = db_path
+        self.inbox = None
+        self.state = None
+        self.stages = []
+        self.threads = []
+        self.stopping = threading.Event()
+        self.scan_requested = threading.Event()
+        self.failures = deque()
+        self.search_index = None
+        self.catalog = None
+        self.index_uncommitted = 0
+        self.index_committed_at = time.monotonic()
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(lambda: self.scan_timer.start())
+        self.scan_timer = QTimer(self)
+        self.scan_timer.setSingleShot(True)
+        self.scan_timer.setInterval(SCAN_DEBOUNCE_MS)
+        self.scan_timer.timeout.connect(self.scan_requested.set)
+        self.status_timer = QTimer(self)
+        self.status_timer.setInterval(STATUS_MS)
+        self.status_timer.timeout.connect(self.report_status)
+
+    def is_running(self):
+        return self.inbox is not None
+
+    def start(self, inbox):
+        self.stop()
+        self.inbox = os.path.abspath(inbox)
+        self.state = IngestState(self.db_path)
+        self.stopping.clear()
+        self.scan_requested.set()
+        self.discovered = queue.Queue()
+        self.copy_queue = queue.Queue(QUEUE_SIZE)
+        self.hash_queue = queue.Queue(QUEUE_SIZE)
+        self.extract_queue = queue.Queue(QUEUE_SIZE)
+        self.index_queue = queue.Queue(QUEUE_SIZE)
+        self.stages = [
+            Stage("copy", COPY_WORKERS, self.copy_item, self.copy_queue, self.hash_queue, self),
+            Stage("hash", HASH_WORKERS, self.hash_item, self.hash_queue, self.extract_queue, self),
+            Stage("extract", EXTRACT_WORKERS, self.extract_item, self.extract_queue, self.index_queue, self),
+            # One writer, so the search index and hash catalog each see a single connection
+            Stage("index", 1, self.index_item, self.index_queue, None, self, idle=self.commit_index, close=self.close_index),
+        ]
+        self.threads = [threading.Thread(target=self.scan_inbox, name="ingest-scan", daemon=True),
+                        threading.Thread(target=self.settle_files, name="ingest-debounce", daemon=True)]
+        for thread in self.threads:
+            thread.start()
+        for stage in self.stages:
+            stage.start()
+        self.watcher.addPath(self.inbox)
+        for queue_name in ("copy", "hash", "extract", "index"):
+            tracer().gauge(f"ingest_{queue_name}", getattr(self, f"{queue_name}_queue").qsize)
+        self.status_timer.start()
+
+    def stop(self):
+        if self.inbox is None:
+            return
+        self.stopping.set()
+        self.scan_requested.set()
+        for thread in self.threads:
+            thread.join()
+        for stage in self.stages:
+            stage.join()
+        self.status_timer.stop()
+        self.watcher.removePaths(self.watcher.directories())
+        self.state.close()
+        self.state = None
+        self.stages = []
+        self.threads = []
+        self.inbox = None
+        self.report_status()
+
+    def scan_inbox(self):
+        # Work left over from an interrupted run goes back to the stage it had reached
+        resume = {"queued": self.copy_queue, "copied": self.hash_queue, "hashed": self.extract_queue}
+        seen = self.state.known(self.inbox)
+        for source, size, mtime_ns, stage, target, sha256 in self.state.unfinished(self.inbox):
+            item = {"source": source, "size": size, "mtime_ns": mtime_ns, "target": target}
+            if stage == "hashed" and sha256:
+                item["sha256"] = sha256
+            if not put_until_stopped(resume.get(stage, self.copy_queue), item, self.stopping):
+                return
+        while not self.stopping.is_set():
+            self.scan_requested.wait(RESCAN_SECONDS)
+            self.scan_requested.clear()
+            if self.stopping.is_set():
+                return
+            for source, mtime_ns, size in walk_files(self.inbox):
+                if os.path.basename(source).startswith('.'):
+                    continue
+                if seen.get(source) != (size, mtime_ns):
+                    seen[source] = (size, mtime_ns)
+                    self.discovered.put((source, size, mtime_ns))
+
+    def settle_files(self):
+        # Debounce stage: a file moves on only when two looks SETTLE_SECONDS apart agree on its size and mtime
+        candidates = {}
+        while not self.stopping.is_set():
+            try:
+                while True:
+                    source, size, mtime_ns = self.discovered.get(timeout=0.25 if not candidates else 0)
+                    candidates[source] = (size, mtime_ns, time.monotonic())
+            except queue.Empty:
+                pass
+            now = time.monotonic()
+            for source, (size, mtime_ns, seen_at) in list(candidates.items()):
+                if now - seen_at < SETTLE_SECONDS:
+                    continue
+                try:
+                    stat = os.stat(source)
+                except OSError:
+                    del candidates[source]
+                    continue
+                if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                    candidates[source] = (stat.st_size, stat.st_mtime_ns, now)
+                    continue
+                del candidates[source]
+                self.state.set_stage(source, "queued", size, mtime_ns)
+                if not put_until_stopped(self.copy_queue, {"source": source, "size": size, "mtime_ns": mtime_ns, "target": None}, self.stopping):
+                    return
+            if candidates:
+                time.sleep(0.25)
+
+    def target_for(self, source):
+        relative = os.path.relpath(source, self.inbox)
+        target = os.path.join(self.case_directory, os.path.basename(self.inbox), relative)
+        # Evidence already in the case is never overwritten
+        stem, extension = os.path.splitext(target)
+        number = 1
+        while os.path.exists(target):
+            target = f"{stem} ({number}){extension}"
+            number += 1
+        return target
+
+    def copy_item(self, item):
+        target = item["target"]
+        if target is None:
+            # Recorded before copying, so a copy interrupted by a crash is redone onto the same target
+            target = self.target_for(item["source"])
+            self.state.set_stage(item["source"], "queued", target=target)
+            self.state.commit()
+        directory = os.path.dirname(target)
+        os.makedirs(directory, exist_ok=True)
+        # Copied under a hidden name and renamed, so nothing sees a half-written file in the case
+        temp_path = os.path.join(directory, f".{os.path.basename(target)}.ingest")
+        shutil.copy2(item["source"], temp_path)
+        os.replace(temp_path, target)
+        item["target"] = target
+        self.state.set_stage(item["source"], "copied", target=target)
+
+    def hash_item(self, item):
+        _, size, mtime_ns, sha256, error = hash_file(item["target"])
+        if error:
+            raise OSError(error)
+        item.update(target_size=size, target_mtime_ns=mtime_ns, sha256=sha256)
+        self.state.set_stage(item["source"], "hashed", target=item["target"], sha256=sha256)
+
+    def extract_item(self, item):
+        if "target_size" not in item:
+            # Resumed after hashing; the catalog row still needs the target's stat
+            stat = os.stat(item["target"])
+            item.update(target_size=stat.st_size, target_mtime_ns=stat.st_mtime_ns)
+        item["text"] = text_extractor().text(item["target"])
+
+    def index_item(self, item):
+        if self.search_index is None:
+            self.search_index = SearchIndex()
+            self.catalog = HashCatalog()
+        self.search_index.store(item["target"], item["target_mtime_ns"], item["target_size"], item["text"])
+        sha256 = item.get("sha256") or hash_file(item["target"])[3]
+        self.catalog.store(item["target"], item["target_size"], item["target_mtime_ns"], sha256)
+        self.state.set_stage(item["source"], "done", target=item["target"], sha256=sha256)
+        item.pop("text")
+        self.index_uncommitted += 1
+        if self.index_uncommitted >= INDEX_COMMIT_EVERY or time.monotonic() - self.index_committed_at >= INDEX_COMMIT_SECONDS:
+            self.commit_index()
+
+    def commit_index(self):
+        if self.search_index is not None:
+            self.search_index.db.commit()
+            self.catalog.db.commit()
+        self.state.commit()
+        self.index_uncommitted = 0
+        self.index_committed_at = time.monotonic()
+
+    def close_index(self):
+        self.commit_index()
+        if self.search_index is not None:
+            self.search_index.close()
+            self.catalog.close()
+            self.search_index = None
+            self.catalog = None
+
+    def fail(self, item, stage, error):
+        self.state.set_stage(item["source"], "failed", target=item.get("target"), error=f"{stage}: {error}")
+        self.failures.append((item["source"], stage, str(error)))
+
+    def status(self):
+        if self.inbox is None:
+            return {"running": False}
+        status = {"running": True, "inbox": self.inbox, "waiting": self.discovered.qsize()}
+        for stage in self.stages:
+            status[stage.name] = stage.inbox.qsize() + stage.active
+        status.update(self.state.counts())
+        return status
+
+    def report_status(self):
+        # Failures are logged from here, on the GUI thread, rather than from the stage threads
+        from src.logging import log_bus
+        while self.failures:
+            source, stage, error = self.failures.popleft()
+            log_bus().log_error(f"Ingest {stage} failed for {source}: {error}", action="ingest", path=source, error=error)
+        self.status_changed.emit(self.status())
+
+
+_ingest_pipeline = None
+
+
+def ingest_pipeline():
+    global _ingest_pipeline
+    if _ingest_pipeline is None:
+        _ingest_pipeline = IngestPipeline()
+        QCoreApplication.instance().aboutToQuit.connect(_ingest_pipeline.stop)
+    return _ingest_pipeline
+
+
+def watch_folder():
+    return QSettings("DocMan", "DocMan").value(WATCH_FOLDER_KEY, "") or ""
+
+
+def set_watch_folder(folder):
+    QSettings("DocMan", "DocMan").setValue(WATCH_FOLDER_KEY, folder or "")
@@ -0,0 +1,118 @@
+import os
+import json
+import time
+import queue
+from PyQt6.QtCore import QThread
+from src.versions import make_delta, apply_delta
+
+JOURNAL_PATH = os.path.join('src', 'data', 'journal.jsonl')
+# The journal is rewritten with one snapshot per unsaved document once it grows past this
+COMPACT_BYTES = 4 * 1024 * 1024
+
+
+def read_journal(journal_path=JOURNAL_PATH):
+    # Replays the journal and returns the documents whose last record is not a save or a close
+    documents = {}
+    try:
+        with open(journal_path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A crash can leave the last line half written
+                    continue
+                key = record["key"]
+                if record["op"] == "snapshot":
+                    documents[key] = dict(record, lines=record["content"].splitlines(keepends=True))
+                elif record["op"] == "delta" and key in documents:
+                    documents[key]["lines"] = apply_delta(documents[key]["lines"], record["ops"])
+                    documents[key].update(name=record["name"], type=record["type"], title=record["title"], ts=record["ts"])
+                elif record["op"] in ("clean", "close"):
+                    documents.pop(key, None)
+    except OSError:
+        return []
+    return [
+        {"name": document["name"], "type": document["type"], "title": document["title"], "ts": document["ts"], "content": "".join(document["lines"])}
+        for document in documents.values()
+    ]
+
+
+class JournalWriter(QThread):
+    def __init__(self, journal_path=JOURNAL_PATH, parent=None):
+        super().__init__(parent)
+        self.journal_path = journal_path
+        self.records = queue.Queue()
+        # Last journaled text and metadata of every unsaved document, used for deltas and compaction
+        self.documents = {}
+
+    def write_edits(self, edits):
+        # edits is a list of (key, name, type, title, content) snapshots taken on the GUI thread
+        self.records.put(("edit", edits))
+
+    def mark_clean(self, keys):
+        self.records.put(("clean", keys))
+
+    def mark_closed(self, keys):
+        self.records.put(("close", keys))
+
+    def discard(self):
+        self.records.put(("discard", None))
+
+    def stop(self):
+        self.records.put(None)
+        self.wait()
+
+    def run(self):
+        os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+        file = open(self.journal_path, "a", encoding="utf-8")
+        try:
+            while True:
+                item = self.records.get()
+                if item is None:
+                    return
+                # Everything queued since the last wakeup is written with one flush
+                items = [item]
+                while not self.records.empty():
+                    item = self.records.get()
+                    if item is None:
+                        break
+                    items.append(item)
+                for op, payload in items:
+                    if op == "discard":
+                        file.close()
+                        self.documents.clear()
+                        file = open(self.journal_path, "w", encoding="utf-8")
+                    elif op == "edit":
+                        for edit in payload:
+                            file.write(self.edit_record(*edit))
+                    else:
+                        for key in payload:
+                            if self.documents.pop(key, None) is not None:
+                                file.write(json.dumps({"op": op, "key": key, "ts": time.time()}) + "\n")
+                file.flush()
+                if file.tell() > COMPACT_BYTES:
+                    file.close()
+                    self.compact()
+                    file = open(self.journal_path, "a", encoding="utf-8")
+                if item is None:
+                    return
+        finally:
+            file.close()
+
+    def edit_record(self, key, name, file_type, title, content):
+        lines = content.splitlines(keepends=True)
+        meta = {"key": key, "name": name, "type": file_type, "title": title, "ts": time.time()}
+        previous = self.documents.get(key)
+        self.documents[key] = (lines, meta)
+        if previous is None:
+            return json.dumps(dict(meta, op="snapshot", content=content)) + "\n"
+        return json.dumps(dict(meta, op="delta", ops=make_delta(previous[0], lines))) + "\n"
+
+    def compact(self):
+        temp_path = self.journal_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            for lines, meta in self.documents.values():
+                file.write(json.dumps(dict(meta, op="snapshot", content="".join(lines))) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.journal_path)
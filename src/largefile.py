@@ -0,0 +1,224 @@
+import os
+import re
+import mmap
+import bisect
+import operator
+from array import array
+from itertools import accumulate, repeat
+from collections import OrderedDict
+from PyQt6.QtCore import Qt, QThread, QAbstractListModel, QModelIndex, QCoreApplication, pyqtSignal
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QListView, QLineEdit, QPushButton, QLabel, QSpinBox
+from src.tracing import tracer
+
+# Files above this size open in the read-only large-file view instead of a QTextEdit
+LARGE_FILE_BYTES = 16 * 1024 * 1024
+# Only every LINE_STRIDE-th line start is kept, so the index stays small even for hundreds of millions of lines
+LINE_STRIDE = 64
+INDEX_CHUNK_BYTES = 8 * 1024 * 1024
+LINE_CACHE_SIZE = 4096
+MAX_LINE_CHARS = 4000
+
+
+class LineIndexer(QThread):
+    progress = pyqtSignal(object, int, bool)
+
+    def __init__(self, mm, parent=None):
+        super().__init__(parent)
+        self.mm = mm
+        self.running = True
+
+    def stop(self):
+        self.running = False
+        self.wait()
+
+    def run(self):
+        with tracer().span("large_file_index", f"{len(self.mm)} bytes"):
+            self.index_lines()
+
+    def index_lines(self):
+        size = len(self.mm)
+        lines = 1 if size else 0
+        position = 0
+        while position < size and self.running:
+            chunk = self.mm[position:position + INDEX_CHUNK_BYTES]
+            parts = chunk.split(b'\n')
+            # Start offsets of the lines beginning inside this chunk, computed without a Python-level loop
+            starts = list(accumulate(map(operator.add, map(len, parts[:-1]), repeat(1)), initial=position))[1:]
+            if starts and starts[-1] == size:
+                starts.pop()
+            first = (-lines) % LINE_STRIDE
+            new_samples = array('Q', starts[first::LINE_STRIDE])
+            lines += len(starts)
+            position += len(chunk)
+            self.progress.emit(new_samples, lines, position >= size)
+        if not size:
+            self.progress.emit(array('Q'), 0, True)
+
+
+class LargeFileModel(QAbstractListModel):
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file = open(file_path, 'rb')
+        size = os.fstat(self.file.fileno()).st_size
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self.samples = array('Q', [0])
+        self.line_count = 0
+        self.indexed = False
+        self.cache = OrderedDict()
+
+    def close(self):
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self.file.close()
+
+    def add_index(self, new_samples, line_count, finished):
+        # Rows are exposed as the indexer reaches them so the view is usable right away
+        self.samples.extend(new_samples)
+        self.indexed = finished
+        if line_count > self.line_count:
+            self.beginInsertRows(QModelIndex(), self.line_count, line_count - 1)
+            self.line_count = line_count
+            self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.line_count
+
+    def line_offset(self, row):
+        offset = self.samples[row // LINE_STRIDE]
+        for _ in range(row % LINE_STRIDE):
+            offset = self.mm.find(b'\n', offset) + 1
+        return offset
+
+    def line_text(self, row):
+        text = self.cache.get(row)
+        if text is not None:
+            self.cache.move_to_end(row)
+            return text
+        start = self.line_offset(row)
+        end = self.mm.find(b'\n', start)
+        if end == -1:
+            end = len(self.mm)
+        raw = self.mm[start:min(end, start + MAX_LINE_CHARS)]
+        text = raw.decode('utf-8', errors='replace').rstrip('\r')
+        if end - start > MAX_LINE_CHARS:
+            text += f" … [{end - start - MAX_LINE_CHARS} more bytes]"
+        self.cache[row] = text
+        if len(self.cache) > LINE_CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return text
+
+    def line_at_offset(self, offset):
+        sample = bisect.bisect_right(self.samples, offset) - 1
+        return sample * LINE_STRIDE + self.mm[self.samples[sample]:offset].count(b'\n')
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+            return self.line_text(index.row())
+        return None
+
+
+class FindWorker(QThread):
+    found = pyqtSignal(int, int)
+
+    def __init__(self, mm, pattern, start, parent=None):
+        super().__init__(parent)
+        self.mm = mm
+        self.pattern = pattern
+        self.start_offset = start
+
+    def run(self):
+        # The regex scans the mapped file directly, so nothing is copied into Python memory
+        match = self.pattern.search(self.mm, self.start_offset) or self.pattern.search(self.mm, 0)
+        self.found.emit(match.start() if match else -1, match.end() if match else -1)
+
+
+class LargeFileView(QWidget):
+    status_changed = pyqtSignal(str)
+
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.title = os.path.splitext(os.path.basename(file_path))[0]
+        self.model = LargeFileModel(file_path, self)
+        self.find_worker = None
+        self.next_find_offset = 0
+
+        layout = QVBoxLayout(self)
+        controls = QHBoxLayout()
+        self.line_input = QSpinBox()
+        self.line_input.setRange(1, 1)
+        self.line_input.setPrefix("Line ")
+        go_button = QPushButton("Go")
+        go_button.clicked.connect(self.go_to_line)
+        self.find_input = QLineEdit()
+        self.find_input.setPlaceholderText("Find in file...")
+        self.find_input.returnPressed.connect(self.find_next)
+        find_button = QPushButton("Find Next")
+        find_button.clicked.connect(self.find_next)
+        self.status_label = QLabel("Indexing lines...")
+        controls.addWidget(self.line_input)
+        controls.addWidget(go_button)
+        controls.addWidget(self.find_input)
+        controls.addWidget(find_button)
+        controls.addWidget(self.status_label)
+        layout.addLayout(controls)
+
+        self.view = QListView()
+        self.view.setUniformItemSizes(True)
+        self.view.setFont(QFont("monospace"))
+        self.view.setModel(self.model)
+        layout.addWidget(self.view)
+
+        self.indexer = LineIndexer(self.model.mm, self)
+        self.indexer.progress.connect(self.update_index)
+        self.indexer.start()
+        QCoreApplication.instance().aboutToQuit.connect(self.close_file)
+
+    def update_index(self, new_samples, line_count, finished):
+        self.model.add_index(new_samples, line_count, finished)
+        self.line_input.setRange(1, max(1, line_count))
+        state = "" if finished else " (indexing...)"
+        self.status_label.setText(f"{line_count:,} lines{state}")
+
+    def go_to_line(self):
+        row = self.line_input.value() - 1
+        if row < self.model.line_count:
+            index = self.model.index(row)
+            self.view.setCurrentIndex(index)
+            self.view.scrollTo(index, QListView.ScrollHint.PositionAtCenter)
+
+    def find_next(self):
+        text = self.find_input.text()
+        if not text or self.find_worker is not None or not self.model.line_count:
+            return
+        pattern = re.compile(re.escape(text.encode('utf-8')), re.IGNORECASE)
+        self.find_worker = FindWorker(self.model.mm, pattern, self.next_find_offset, self)
+        self.find_worker.found.connect(self.show_match)
+        self.status_label.setText("Searching...")
+        self.find_worker.start()
+
+    def show_match(self, start, end):
+        self.find_worker.wait()
+        self.find_worker.deleteLater()
+        self.find_worker = None
+        if start == -1:
+            self.status_label.setText("No matches.")
+            return
+        self.next_find_offset = end
+        row = self.model.line_at_offset(start)
+        if row >= self.model.line_count:
+            self.status_label.setText("Match is past the indexed lines; try again when indexing finishes.")
+            return
+        self.line_input.setValue(row + 1)
+        self.go_to_line()
+        self.status_label.setText(f"Match on line {row + 1:,}")
+
+    def close_file(self):
+        if self.indexer is not None:
+            self.indexer.stop()
+            self.indexer = None
+        if self.find_worker is not None:
+            self.find_worker.wait()
+            self.find_worker = None
+        self.model.close()
@@ -1,36 +1,276 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTabWidget, QTextEdit, QPushButton, QHBoxLayout, QFileDialog, QMessageBox, QCheckBox
-from PyQt6.QtGui import QIcon, QTextCursor, QAction
-from PyQt6.QtCore import Qt, QDateTime, QFile, QTextStream
+import time
+import queue
+import logging
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QListView, QLineEdit, QLabel, QPushButton, QHBoxLayout, QFileDialog, QMessageBox, QCheckBox
+from PyQt6.QtGui import QIcon, QColor, QFont
+from PyQt6.QtCore import Qt, QDateTime, QFile, QObject, QTimer, QThread, QCoreApplication, QAbstractListModel, QModelIndex, QPoint, pyqtSignal
+from src.logstore import LOG_DIRECTORY, JsonFormatter, SegmentedLogHandler, read_records_before
+from src.tracing import tracer
+
+# Log records reach the viewer in batches at most this often
+LOG_FLUSH_MS = 200
+# Newest records kept in memory; anything older is paged back in from the log segments on demand
+LOG_CAPACITY = 100000
+LOG_PAGE_RECORDS = 2000
+
+DEBUG = "debug"
+INTERACTION = "interaction"
+WARNING = "warning"
+ERROR = "error"
+LEVEL_KINDS = {"DEBUG": DEBUG, "INFO": INTERACTION, "WARNING": WARNING, "ERROR": ERROR}
+KIND_COLORS = {WARNING: "#e0b050", ERROR: "#f07070"}
+
+
+def format_record(record):
+    created, kind, message = record[:3]
+    timestamp = QDateTime.fromMSecsSinceEpoch(int(created * 1000)).toString(Qt.DateFormat.ISODateWithMs)
+    if kind == INTERACTION:
+        return f"[{timestamp}] {message}"
+    return f"[{timestamp}] {kind.upper()}: {message}"
+
+
+def entry_record(entry):
+    return entry.get("ts", 0), LEVEL_KINDS.get(entry.get("level"), INTERACTION), entry.get("message", ""), entry.get("session", 0), entry.get("seq", 0)
+
+
+class LogBus(QObject):
+    records_ready = pyqtSignal(list)
+
+    def __init__(self, log_directory=LOG_DIRECTORY, parent=None):
+        super().__init__(parent)
+        # Callers only append to these; the file write and the viewer update happen elsewhere
+        self.pending = deque()
+        self.history = deque(maxlen=LOG_CAPACITY)
+        self.file_queue = queue.SimpleQueue()
+        self.log_directory = log_directory
+        # Every record carries (session, seq), which orders it against everything else in the log
+        self.session = round(time.time(), 6)
+        self.count = 0
+
+        self.logger = logging.getLogger("docman")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.logger.addHandler(QueueHandler(self.file_queue))
+        self.file_handler = SegmentedLogHandler(log_directory)
+        self.file_handler.setFormatter(JsonFormatter())
+        self.listener = QueueListener(self.file_queue, self.file_handler)
+        self.listener.start()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(LOG_FLUSH_MS)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start()
+        tracer().gauge("log_viewer", lambda: len(self.pending))
+        tracer().gauge("log_file", self.file_queue.qsize)
+
+    # Keyword fields (action, path, duration, error) are written as structured fields of the record
+    def log_debug(self, message, **fields):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.write(logging.DEBUG, DEBUG, message, fields)
+
+    def log_interaction(self, message, **fields):
+        self.write(logging.INFO, INTERACTION, message, fields)
+
+    def log_warning(self, message, **fields):
+        self.write(logging.WARNING, WARNING, message, fields)
+
+    def log_error(self, message, **fields):
+        self.write(logging.ERROR, ERROR, message, fields)
+
+    def write(self, level, kind, message, fields):
+        record = (time.time(), kind, message, self.session, self.count)
+        self.count += 1
+        self.logger.log(level, message, extra=dict(fields, session=self.session, seq=record[4]))
+        if kind != DEBUG:
+            self.pending.append(record)
+            self.history.append(record)
+
+    def flush(self):
+        if not self.pending:
+            return
+        records = []
+        while self.pending:
+            records.append(self.pending.popleft())
+        self.records_ready.emit(records)
+
+    def shutdown(self):
+        self.timer.stop()
+        self.flush()
+        self.listener.stop()
+        self.file_handler.close()
+
+
+_log_bus = None
+
+
+def log_bus():
+    # One bus per process, shared by every window that logs
+    global _log_bus
+    if _log_bus is None:
+        _log_bus = LogBus()
+        QCoreApplication.instance().aboutToQuit.connect(_log_bus.shutdown)
+    return _log_bus
+
+
+class LogModel(QAbstractListModel):
+    def __init__(self, capacity=LOG_CAPACITY, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        # records holds everything in memory, oldest first; rows is the filtered subsequence the view shows
+        self.records = []
+        self.rows = []
+        self.kinds = {INTERACTION, WARNING, ERROR}
+        self.needle = ""
+        self.cleared_position = (0, 0)
+
+    def matches(self, record):
+        return record[1] in self.kinds and (not self.needle or self.needle in record[2].lower())
+
+    def set_filter(self, kinds, needle):
+        self.beginResetModel()
+        self.kinds = set(kinds)
+        self.needle = needle.lower()
+        self.rows = [record for record in self.records if self.matches(record)]
+        self.endResetModel()
+
+    def append_records(self, records):
+        records = records[-self.capacity:]
+        overflow = len(self.records) + len(records) - self.capacity
+        if overflow > 0:
+            self.trim_oldest(overflow)
+        self.records.extend(records)
+        rows = [record for record in records if self.matches(record)]
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(rows) - 1)
+            self.rows.extend(rows)
+            self.endInsertRows()
+
+    def trim_oldest(self, count):
+        dropped = self.records[:count]
+        del self.records[:count]
+        # Filtered rows keep record order, so the dropped ones are a prefix of rows
+        hidden = sum(1 for record in dropped if self.matches(record))
+        if hidden:
+            self.beginRemoveRows(QModelIndex(), 0, hidden - 1)
+            del self.rows[:hidden]
+            self.endRemoveRows()
+
+    def prepend_records(self, records):
+        room = self.capacity - len(self.records)
+        if room <= 0:
+            return 0
+        records = records[-room:]
+        self.records[0:0] = records
+        rows = [record for record in records if self.matches(record)]
+        if rows:
+            self.beginInsertRows(QModelIndex(), 0, len(rows) - 1)
+            self.rows[0:0] = rows
+            self.endInsertRows()
+        return len(rows)
+
+    def is_full(self):
+        return len(self.records) >= self.capacity
+
+    def clear(self, position):
+        self.beginResetModel()
+        self.records = []
+        self.rows = []
+        self.cleared_position = position
+        self.endResetModel()
+
+    def oldest_position(self):
+        if self.records:
+            return self.records[0][3], self.records[0][4]
+        return self.cleared_position
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self.rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return format_record(record).replace("\n", " \u23ce ")
+        if role == Qt.ItemDataRole.ToolTipRole and "\n" in record[2]:
+            return record[2]
+        if role == Qt.ItemDataRole.ForegroundRole and record[1] in KIND_COLORS:
+            return QColor(KIND_COLORS[record[1]])
+        return None
+
+
+class LogPageLoader(QThread):
+    page_loaded = pyqtSignal(list, bool)
+    failed = pyqtSignal(str)
+
+    def __init__(self, log_directory, position, count, parent=None):
+        super().__init__(parent)
+        self.log_directory = log_directory
+        self.position = position
+        self.count = count
+
+    def run(self):
+        try:
+            entries, at_start = read_records_before(self.position, self.count, self.log_directory)
+            self.page_loaded.emit([entry_record(entry) for entry in entries], at_start)
+        except OSError as e:
+            self.failed.emit(str(e))
+
 
 class LoggingWindow(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.model = LogModel(parent=self)
+        self.page_loader = None
+        self.at_start = False
         self.init_ui()
 
+        bus = log_bus()
+        # Anything logged before this window existed comes from the bus history
+        bus.flush()
+        self.model.clear((bus.session, bus.count))
+        self.model.append_records(list(bus.history))
+        bus.records_ready.connect(self.show_records)
+        self.update_status()
+
     def init_ui(self):
         self.setWindowTitle("Log Viewer")
         self.setMinimumSize(600, 400)
 
         layout = QVBoxLayout()
 
-        self.tabs = QTabWidget()
+        filter_layout = QHBoxLayout()
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filter logs...")
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_input.textChanged.connect(lambda: self.filter_timer.start())
+        filter_layout.addWidget(self.filter_input)
 
-        self.interaction_logs = QTextEdit()
-        self.interaction_logs.setReadOnly(True)
-        self.interaction_logs.setStyleSheet("""
-            QTextEdit {
-                background-color: #2b2b2b;
-                border: 1px solid #555;
-                font-size: 12px;
-                color: #f0f0f0;
-                padding: 5px;
-            }
-        """)
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(150)
+        self.filter_timer.timeout.connect(self.apply_filter)
+
+        self.kind_checkboxes = {}
+        for kind, label in ((INTERACTION, "Interactions"), (WARNING, "Warnings"), (ERROR, "Errors")):
+            checkbox = QCheckBox(label)
+            checkbox.setChecked(True)
+            checkbox.stateChanged.connect(self.apply_filter)
+            self.kind_checkboxes[kind] = checkbox
+            filter_layout.addWidget(checkbox)
 
-        self.error_logs = QTextEdit()
-        self.error_logs.setReadOnly(True)
-        self.error_logs.setStyleSheet("""
-            QTextEdit {
+        self.older_button = QPushButton("Load Older")
+        self.older_button.clicked.connect(self.load_older)
+        filter_layout.addWidget(self.older_button)
+
+        self.view = QListView()
+        self.view.setUniformItemSizes(True)
+        self.view.setFont(QFont("monospace"))
+        self.view.setModel(self.model)
+        self.view.setStyleSheet("""
+            QListView {
                 background-color: #2b2b2b;
                 border: 1px solid #555;
                 font-size: 12px;
@@ -38,9 +278,7 @@ class LoggingWindow(QWidget):
                 padding: 5px;
             }
         """)
-
-        self.tabs.addTab(self.interaction_logs, "Interaction Logs")
-        self.tabs.addTab(self.error_logs, "ERROR Logs")
+        self.view.verticalScrollBar().valueChanged.connect(self.scrolled)
 
         clear_button = QPushButton("Clear Logs")
         clear_button.clicked.connect(self.clear_logs)
@@ -50,46 +288,95 @@ class LoggingWindow(QWidget):
         save_button.clicked.connect(self.save_logs)
         save_button.setIcon(QIcon.fromTheme("document-save"))
 
-        self.log_interaction_checkbox = QCheckBox("Log UI Interactions")
-        self.log_interaction_checkbox.setChecked(True)  # Default to logging interactions
-        self.log_interaction_checkbox.stateChanged.connect(self.toggle_interaction_logs)
+        self.status_label = QLabel()
 
         button_layout = QHBoxLayout()
         button_layout.addWidget(clear_button)
         button_layout.addWidget(save_button)
-        button_layout.addWidget(self.log_interaction_checkbox)
         button_layout.addStretch()
+        button_layout.addWidget(self.status_label)
 
-        layout.addWidget(self.tabs)
+        layout.addLayout(filter_layout)
+        layout.addWidget(self.view)
         layout.addLayout(button_layout)
 
         self.setLayout(layout)
 
-    def toggle_interaction_logs(self, state):
-        if state == Qt.CheckState.Checked:
-            self.log_interaction_checkbox.setChecked(True)
-        else:
-            self.log_interaction_checkbox.setChecked(False)
-
     def log_interaction(self, message):
-        if self.log_interaction_checkbox.isChecked():
-            self._log_to_tab(self.interaction_logs, message)
+        log_bus().log_interaction(message)
 
     def log_warning(self, message):
-        self._log_to_tab(self.error_logs, f"WARNING: {message}")
+        log_bus().log_warning(message)
 
     def log_error(self, message):
-        self._log_to_tab(self.error_logs, f"ERROR: {message}")
+        log_bus().log_error(message)
+
+    def show_records(self, records):
+        scroll_bar = self.view.verticalScrollBar()
+        following = scroll_bar.value() == scroll_bar.maximum()
+        self.model.append_records(records)
+        if following:
+            self.view.scrollToBottom()
+        self.update_status()
 
-    def _log_to_tab(self, tab, message):
-        timestamp = QDateTime.currentDateTime().toString(Qt.DateFormat.ISODateWithMs)
-        log_entry = f"[{timestamp}] {message}"
-        tab.append(log_entry)
-        tab.moveCursor(QTextCursor.MoveOperation.End)
+    def apply_filter(self):
+        kinds = [kind for kind, checkbox in self.kind_checkboxes.items() if checkbox.isChecked()]
+        self.model.set_filter(kinds, self.filter_input.text())
+        self.view.scrollToBottom()
+        self.update_status()
+
+    def update_status(self):
+        shown = self.model.rowCount()
+        held = len(self.model.records)
+        self.status_label.setText(f"{shown:,} of {held:,} entries" if shown != held else f"{held:,} entries")
+        self.older_button.setEnabled(not self.at_start and self.page_loader is None)
+
+    def scrolled(self, value):
+        scroll_bar = self.view.verticalScrollBar()
+        if value == scroll_bar.minimum() and scroll_bar.maximum() > 0:
+            self.load_older()
+
+    def load_older(self):
+        if self.page_loader is not None or self.at_start:
+            return
+        if self.model.is_full():
+            self.status_label.setText(f"Holding the newest {self.model.capacity:,} entries; clear the view to page further back.")
+            return
+        bus = log_bus()
+        bus.flush()
+        count = min(LOG_PAGE_RECORDS, self.model.capacity - len(self.model.records))
+        self.page_loader = LogPageLoader(bus.log_directory, self.model.oldest_position(), count, self)
+        self.page_loader.page_loaded.connect(self.show_older)
+        self.page_loader.failed.connect(self.show_page_error)
+        self.older_button.setEnabled(False)
+        self.page_loader.start()
+
+    def finish_page(self):
+        self.page_loader.wait()
+        self.page_loader.deleteLater()
+        self.page_loader = None
+
+    def show_older(self, records, at_start):
+        self.finish_page()
+        self.at_start = at_start
+        # Keep the rows that were on screen in place while older ones are inserted above them
+        first_visible = self.view.indexAt(QPoint(0, 0)).row()
+        inserted = self.model.prepend_records(records)
+        if inserted and first_visible >= 0:
+            self.view.scrollTo(self.model.index(first_visible + inserted), QListView.ScrollHint.PositionAtTop)
+        self.update_status()
+
+    def show_page_error(self, message):
+        self.finish_page()
+        self.update_status()
+        self.status_label.setText(f"Could not read older logs: {message}")
 
     def clear_logs(self):
-        self.interaction_logs.clear()
-        self.error_logs.clear()
+        # Older entries, including the cleared ones, can still be paged back in
+        bus = log_bus()
+        self.model.clear((bus.session, bus.count))
+        self.at_start = False
+        self.update_status()
 
     def save_logs(self):
         file_dialog = QFileDialog(self)
@@ -106,15 +393,12 @@ class LoggingWindow(QWidget):
             self._save_logs_to_file(file_path)
 
     def _save_logs_to_file(self, file_path):
-        with QFile(file_path) as file:
-            if not file.open(QFile.OpenMode.WriteOnly | QFile.OpenMode.Text):
-                QMessageBox.critical(self, "Error", f"Could not write to file:\n{file_path}")
-                return
-            text_stream = QTextStream(file)
-            text_stream.setCodec("UTF-8")
-            text_stream << "== Interaction Logs ==\n\n"
-            text_stream << self.interaction_logs.toPlainText() << "\n\n"
-            text_stream << "== ERROR Logs ==\n\n"
-            text_stream << self.error_logs.toPlainText() << "\n\n"
+        # Saves the entries that pass the current filter
+        try:
+            with open(file_path, "w", encoding="utf-8") as file:
+                for record in self.model.rows:
+                    file.write(format_record(record) + "\n")
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Could not write to file:\n{file_path}\n{e}")
+            return
         QMessageBox.information(self, "Logs Saved", f"Logs saved to:\n{file_path}")
-
@@ -0,0 +1,81 @@
+import sys
+import json
+import argparse
+from datetime import datetime
+from src.logstore import LOG_DIRECTORY, log_segments, segment_end_time, iter_records
+
+
+def parse_time(text):
+    # Accepts an ISO date or datetime, or a Unix timestamp
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a date, datetime or timestamp: {text}")
+
+
+def query(directory=LOG_DIRECTORY, since=None, until=None, actions=None, levels=None, path=None):
+    # Streams matching entries oldest first, one segment at a time
+    for segment in log_segments(directory):
+        end = segment_end_time(segment)
+        # A rotated segment ends at its rotation time, so segments before the range are never opened
+        if since is not None and end is not None and end < since:
+            continue
+        for entry in iter_records(segment):
+            created = entry.get("ts", 0)
+            if until is not None and created > until:
+                return
+            if since is not None and created < since:
+                continue
+            if actions and entry.get("action") not in actions:
+                continue
+            if levels and entry.get("level") not in levels:
+                continue
+            if path and path not in entry.get("path", ""):
+                continue
+            yield entry
+
+
+def format_text(entry):
+    timestamp = datetime.fromtimestamp(entry.get("ts", 0)).isoformat(sep=" ", timespec="milliseconds")
+    parts = [timestamp, entry.get("level", ""), entry.get("action", "-")]
+    if "path" in entry:
+        parts.append(entry["path"])
+    if "duration" in entry:
+        parts.append(f"{entry['duration']}s")
+    parts.append(entry.get("message", ""))
+    if "error" in entry:
+        parts.append(f"error: {entry['error']}")
+    return "  ".join(str(part) for part in parts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.logquery", description="Query DocMan's structured logs, including rotated and compressed segments.")
+    parser.add_argument("--since", type=parse_time, help="only entries at or after this time (ISO date/datetime or Unix timestamp)")
+    parser.add_argument("--until", type=parse_time, help="only entries at or before this time")
+    parser.add_argument("--action", action="append", help="only entries with this action; may be repeated")
+    parser.add_argument("--level", action="append", type=str.upper, help="only entries with this level (INFO, WARNING, ERROR); may be repeated")
+    parser.add_argument("--path", help="only entries whose path contains this text")
+    parser.add_argument("--format", choices=("json", "text"), default="json", help="output JSON lines (default) or readable text")
+    parser.add_argument("--count", action="store_true", help="print only the number of matching entries")
+    parser.add_argument("--directory", default=LOG_DIRECTORY, help=f"log directory (default: {LOG_DIRECTORY})")
+    args = parser.parse_args(argv)
+
+    entries = query(args.directory, args.since, args.until, args.action, args.level, args.path)
+    try:
+        if args.count:
+            print(sum(1 for _ in entries))
+            return 0
+        for entry in entries:
+            print(json.dumps(entry, ensure_ascii=False) if args.format == "json" else format_text(entry))
+    except BrokenPipeError:
+        # Output piped into head and the like
+        sys.stderr.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
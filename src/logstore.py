@@ -0,0 +1,180 @@
+import os
+import re
+import gzip
+import json
+import time
+import shutil
+import logging
+from datetime import datetime
+from collections import deque
+from logging.handlers import BaseRotatingHandler
+from concurrent.futures import ThreadPoolExecutor
+
+LOG_DIRECTORY = os.path.join('src', 'data', 'logs')
+LOG_NAME = 'docman'
+# The active segment is rotated once it reaches either limit
+LOG_ROTATE_BYTES = 8 * 1024 * 1024
+LOG_ROTATE_SECONDS = 24 * 60 * 60
+# Compressed segments beyond this many are deleted, oldest first
+LOG_KEEP_SEGMENTS = 60
+RECORD_FIELDS = ("session", "seq", "action", "path", "duration", "error")
+SEGMENT_NAME = re.compile(rf'^{LOG_NAME}-(\d{{8}}-\d{{6}}-\d{{6}})\.jsonl(\.gz)?$')
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {"ts": round(record.created, 3), "level": record.levelname, "message": record.getMessage()}
+        for field in RECORD_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info and "error" not in entry:
+            entry["error"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def active_path(directory=LOG_DIRECTORY):
+    return os.path.join(directory, LOG_NAME + '.jsonl')
+
+
+def segment_paths(directory=LOG_DIRECTORY):
+    # Rotated segments, oldest first; one whose compression was interrupted is listed by its plain file
+    stamps = {}
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    for name in names:
+        match = SEGMENT_NAME.match(name)
+        if match:
+            stamps.setdefault(match.group(1), set()).add(name)
+    paths = []
+    for stamp in sorted(stamps):
+        plain = f"{LOG_NAME}-{stamp}.jsonl"
+        paths.append(os.path.join(directory, plain if plain in stamps[stamp] else plain + '.gz'))
+    return paths
+
+
+def log_segments(directory=LOG_DIRECTORY):
+    paths = segment_paths(directory)
+    if os.path.exists(active_path(directory)):
+        paths.append(active_path(directory))
+    return paths
+
+
+def segment_end_time(path):
+    # Rotated segments are named after the moment they were closed; the active one has no end yet
+    match = SEGMENT_NAME.match(os.path.basename(path))
+    if match is None:
+        return None
+    return datetime.strptime(match.group(1), "%Y%m%d-%H%M%S-%f").timestamp()
+
+
+def open_segment(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, encoding='utf-8', errors='replace')
+
+
+def iter_records(path):
+    # Streams one segment; compressed segments are decompressed as they are read
+    with open_segment(path) as file:
+        for line in file:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A crash can leave the last line half written
+                continue
+
+
+def first_record(path):
+    for entry in iter_records(path):
+        return entry
+    return None
+
+
+def record_key(entry):
+    # Records are written in (session, seq) order, across segments as well as within them
+    return entry.get("session", 0), entry.get("seq", 0)
+
+
+def read_records_before(position, count, directory=LOG_DIRECTORY):
+    # Returns up to count entries written before position, a (session, seq) pair, oldest first
+    paths = log_segments(directory)
+    collected = []
+    while paths and len(collected) < count:
+        path = paths.pop()
+        first = first_record(path)
+        if first is None or record_key(first) >= position:
+            continue
+        window = deque(maxlen=count - len(collected))
+        for entry in iter_records(path):
+            if record_key(entry) >= position:
+                break
+            window.append(entry)
+        collected[0:0] = window
+    return collected, not paths and len(collected) < count
+
+
+def compress_segment(path):
+    # The plain segment is removed only once its archive is complete
+    temp_path = path + '.gz.tmp'
+    with open(path, 'rb') as source, gzip.open(temp_path, 'wb') as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+    os.replace(temp_path, path + '.gz')
+    os.remove(path)
+
+
+def prune_segments(directory, keep):
+    paths = segment_paths(directory)
+    for path in paths[:max(0, len(paths) - keep)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class SegmentedLogHandler(BaseRotatingHandler):
+    def __init__(self, directory=LOG_DIRECTORY, max_bytes=LOG_ROTATE_BYTES, max_seconds=LOG_ROTATE_SECONDS, keep=LOG_KEEP_SEGMENTS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.keep = keep
+        super().__init__(active_path(directory), 'a', encoding='utf-8')
+        first = first_record(self.baseFilename)
+        self.opened_at = first["ts"] if first and "ts" in first else time.time()
+        # Rotated segments are compressed off the logging thread, one at a time
+        self.compressor = ThreadPoolExecutor(max_workers=1)
+        for path in segment_paths(directory):
+            if not path.endswith('.gz'):
+                self.compressor.submit(self.archive, path)
+
+    def shouldRollover(self, record):
+        if self.stream is None:
+            self.stream = self._open()
+        size = self.stream.tell()
+        if not size:
+            self.opened_at = record.created
+            return False
+        return size >= self.max_bytes or record.created - self.opened_at >= self.max_seconds
+
+    def doRollover(self):
+        self.stream.close()
+        self.stream = None
+        target = os.path.join(self.directory, f"{LOG_NAME}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.jsonl")
+        os.replace(self.baseFilename, target)
+        self.stream = self._open()
+        self.compressor.submit(self.archive, target)
+
+    def archive(self, path):
+        try:
+            compress_segment(path)
+        except OSError:
+            # Left as a plain segment; the next start tries again
+            return
+        prune_segments(self.directory, self.keep)
+
+    def close(self):
+        super().close()
+        self.compressor.shutdown(wait=True)
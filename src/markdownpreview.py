@@ -0,0 +1,138 @@
+import re
+from collections import OrderedDict
+import markdown
+from PyQt6.QtGui import QTextDocument
+from PyQt6.QtCore import QThread, QMutex, QMutexLocker, QWaitCondition, QCoreApplication, pyqtSignal
+from src.tracing import tracer
+
+MARKDOWN_TYPES = {"md", "markdown"}
+MARKDOWN_EXTENSIONS = ["fenced_code", "tables", "sane_lists"]
+# Rendered blocks kept for reuse; a block is re-rendered only when its own text changes
+BLOCK_CACHE_ITEMS = 20000
+FENCE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+LIST_ITEM = re.compile(r'^ {0,3}([*+-]|\d+[.)])(\s|$)')
+QUOTE = re.compile(r'^ {0,3}>')
+# Link reference definitions apply to the whole document, so every block that could use one is rendered with them
+REFERENCE = re.compile(r'^ {0,3}\[[^\]^]+\]:\s*\S')
+
+
+def is_markdown(item_path):
+    return item_path.rsplit('.', 1)[-1].lower() in MARKDOWN_TYPES
+
+
+def split_blocks(text):
+    # Top-level blocks are separated by blank lines, except inside fenced code, before an indented
+    # continuation line, and after list items or quote lines when more follow, which Markdown renders as one list or quote
+    blocks = []
+    current = []
+    blank = 0
+    fence = None
+    run = False
+    for line in text.split('\n'):
+        match = FENCE.match(line)
+        if fence is None:
+            if not line.strip():
+                if current:
+                    blank += 1
+                continue
+            if blank:
+                item = LIST_ITEM.match(line) or QUOTE.match(line)
+                if line[0] in ' \t' or (run and item):
+                    current.extend([''] * blank)
+                else:
+                    blocks.append('\n'.join(current))
+                    current = []
+                    run = False
+                blank = 0
+            if not run:
+                run = bool(LIST_ITEM.match(line) or QUOTE.match(line))
+            if match:
+                fence = match.group(1)
+        elif match and match.group(1)[0] == fence[0] and len(match.group(1)) >= len(fence) and not line[match.end():].strip():
+            fence = None
+        current.append(line)
+    if current:
+        blocks.append('\n'.join(current))
+    return blocks
+
+
+class BlockRenderer:
+    # Not thread-safe; each thread rendering Markdown owns one
+    def __init__(self, max_items=BLOCK_CACHE_ITEMS):
+        self.markdown = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+        self.max_items = max_items
+        self.cache = OrderedDict()
+
+    def render_block(self, block, definitions):
+        # Definitions are part of the key, so editing one re-renders the blocks that may refer to it
+        key = (block, definitions) if definitions and '[' in block else (block, '')
+        html = self.cache.get(key)
+        if html is not None:
+            self.cache.move_to_end(key)
+            return html
+        html = self.markdown.reset().convert(block + '\n\n' + key[1] if key[1] else block)
+        self.cache[key] = html
+        if len(self.cache) > self.max_items:
+            self.cache.popitem(last=False)
+        return html
+
+    def render(self, text):
+        blocks = split_blocks(text)
+        definitions = []
+        for block in blocks:
+            lines = block.split('\n') if ']:' in block else ()
+            references = sum(1 for line in lines if REFERENCE.match(line))
+            if references == len(lines) and lines:
+                definitions.append(block)
+            elif references:
+                # Whether a definition mixed into another block is one depends on that block, so the document is rendered whole
+                return self.markdown.reset().convert(text)
+        if definitions:
+            # Markdown takes definitions out before finding blocks, so a list may continue on the far side of one
+            blocks = split_blocks('\n\n'.join(block for block in blocks if block not in definitions))
+        definitions = '\n'.join(definitions)
+        return '\n'.join(self.render_block(block, definitions) for block in blocks)
+
+
+class MarkdownRenderer(QThread):
+    rendered = pyqtSignal(int, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.mutex = QMutex()
+        self.condition = QWaitCondition()
+        # Only the newest text of each document is kept; an older one still waiting is replaced
+        self.pending = {}
+        self.running = True
+
+    def request(self, document_id, text):
+        with QMutexLocker(self.mutex):
+            self.pending[document_id] = text
+            self.condition.wakeOne()
+
+    def pending_count(self):
+        with QMutexLocker(self.mutex):
+            return len(self.pending)
+
+    def stop(self):
+        with QMutexLocker(self.mutex):
+            self.running = False
+            self.condition.wakeOne()
+        self.wait()
+
+    def run(self):
+        renderer = BlockRenderer()
+        while True:
+            with QMutexLocker(self.mutex):
+                while self.running and not self.pending:
+                    self.condition.wait(self.mutex)
+                if not self.running:
+                    return
+                document_id = next(iter(self.pending))
+                text = self.pending.pop(document_id)
+            with tracer().span("markdown_render", document_id):
+                # The document is laid out from HTML here too, leaving the GUI thread only to swap it in
+                document = QTextDocument()
+                document.setHtml(renderer.render(text))
+                document.moveToThread(QCoreApplication.instance().thread())
+            self.rendered.emit(document_id, document)
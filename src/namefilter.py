@@ -0,0 +1,224 @@
+import os
+from array import array
+from bisect import bisect_left, insort
+from PyQt6.QtWidgets import QFileIconProvider
+from PyQt6.QtCore import Qt, QThread, QMutex, QMutexLocker, QWaitCondition, QAbstractListModel, QModelIndex, QFileInfo, pyqtSignal
+from src.changes import CREATED, DELETED, RENAMED
+from src.tracing import tracer
+
+# Longest substring indexed; longer queries are checked against the candidates of their rarest trigram
+GRAM_LENGTH = 3
+# Matches added to the list per fetch, so a one-letter filter over a huge folder shows at once
+MATCH_CHUNK = 500
+# Removed names are dropped from the posting lists once they are this share of all ids
+COMPACT_RATIO = 0.5
+
+
+def name_grams(folded):
+    # Single characters and trigrams; two-character queries use the rarer of their characters
+    grams = set(folded)
+    grams.update(folded[start:start + GRAM_LENGTH] for start in range(len(folded) - GRAM_LENGTH + 1))
+    return grams
+
+
+class NameIndex:
+    # File names of one folder, for prefix matches by bisecting a sorted list and substring matches
+    # through posting lists of characters and trigrams; not thread-safe
+    def __init__(self, directory, names=()):
+        self.directory = directory
+        self.names = []
+        self.ids = {}
+        self.postings = {}
+        self.sorted_names = []
+        self.removed = 0
+        self.last_query = None
+        self.last_matches = None
+        self.add_all(names)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, name):
+        if name in self.ids:
+            return
+        folded = name.casefold()
+        name_id = len(self.names)
+        self.names.append(name)
+        self.ids[name] = name_id
+        for gram in name_grams(folded):
+            self.postings.setdefault(gram, array('i')).append(name_id)
+        insort(self.sorted_names, (folded, name))
+        self.last_query = None
+
+    def add_all(self, names):
+        # Bulk version of add(): one sort instead of an insertion per name
+        postings = self.postings
+        added = []
+        for name in names:
+            if name in self.ids:
+                continue
+            folded = name.casefold()
+            name_id = len(self.names)
+            self.names.append(name)
+            self.ids[name] = name_id
+            for gram in name_grams(folded):
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array('i')
+                posting.append(name_id)
+            added.append((folded, name))
+        self.sorted_names = sorted(self.sorted_names + added)
+        self.last_query = None
+
+    def remove(self, name):
+        name_id = self.ids.pop(name, None)
+        if name_id is None:
+            return
+        self.names[name_id] = None
+        position = bisect_left(self.sorted_names, (name.casefold(), name))
+        del self.sorted_names[position]
+        self.removed += 1
+        self.last_query = None
+        if self.removed > len(self.names) * COMPACT_RATIO:
+            self.compact()
+
+    def compact(self):
+        names = [name for name in self.names if name is not None]
+        self.names, self.ids, self.postings, self.removed = [], {}, {}, 0
+        self.sorted_names = []
+        self.add_all(names)
+
+    def apply_changes(self, changes):
+        # Returns whether any change was in this folder
+        changed = False
+        for kind, item_path, new_path in changes:
+            if os.path.dirname(item_path) == self.directory:
+                if kind in (DELETED, RENAMED):
+                    self.remove(os.path.basename(item_path))
+                elif kind == CREATED:
+                    self.add(os.path.basename(item_path))
+                changed = True
+            if kind == RENAMED and os.path.dirname(new_path) == self.directory:
+                self.add(os.path.basename(new_path))
+                changed = True
+        return changed
+
+    def prefix_matches(self, folded):
+        start = bisect_left(self.sorted_names, (folded,))
+        matches = []
+        for position in range(start, len(self.sorted_names)):
+            name_folded, name = self.sorted_names[position]
+            if not name_folded.startswith(folded):
+                break
+            matches.append(name)
+        return matches
+
+    def candidates(self, folded):
+        # The shortest posting list among the query's grams, or the previous matches when the query only grew
+        if self.last_query is not None and self.last_query in folded:
+            return self.last_matches
+        grams = name_grams(folded) if len(folded) >= GRAM_LENGTH else set(folded)
+        shortest = None
+        for gram in grams:
+            posting = self.postings.get(gram)
+            if posting is None:
+                return []
+            if shortest is None or len(posting) < len(shortest):
+                shortest = posting
+        return [self.names[name_id] for name_id in shortest if self.names[name_id] is not None]
+
+    def search(self, query):
+        # Names starting with the query first, then those containing it, each in name order
+        folded = query.casefold()
+        if not folded:
+            return [name for _, name in self.sorted_names]
+        matches = [name for name in self.candidates(folded) if folded in name.casefold()]
+        self.last_query, self.last_matches = folded, matches
+        prefixed = self.prefix_matches(folded)
+        starting = set(prefixed)
+        return prefixed + sorted((name for name in matches if name not in starting), key=str.casefold)
+
+
+class NameIndexBuilder(QThread):
+    index_ready = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.mutex = QMutex()
+        self.condition = QWaitCondition()
+        self.pending = None
+        self.running = True
+
+    def request(self, directory):
+        with QMutexLocker(self.mutex):
+            self.pending = directory
+            self.condition.wakeOne()
+
+    def stop(self):
+        with QMutexLocker(self.mutex):
+            self.running = False
+            self.condition.wakeOne()
+        self.wait()
+
+    def run(self):
+        while True:
+            with QMutexLocker(self.mutex):
+                while self.running and self.pending is None:
+                    self.condition.wait(self.mutex)
+                if not self.running:
+                    return
+                directory, self.pending = self.pending, None
+            with tracer().span("name_index", directory):
+                try:
+                    with os.scandir(directory) as entries:
+                        index = NameIndex(directory, [entry.name for entry in entries])
+                except OSError:
+                    index = NameIndex(directory)
+            self.index_ready.emit(index)
+
+
+class NameMatchModel(QAbstractListModel):
+    # Matches of the filter in the current folder; rows are added in chunks as the view scrolls to them
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.directory = ""
+        self.matches = []
+        self.shown = 0
+        self.icons = QFileIconProvider()
+
+    def set_matches(self, directory, matches):
+        self.beginResetModel()
+        self.directory = directory
+        self.matches = matches
+        self.shown = min(len(matches), MATCH_CHUNK)
+        self.endResetModel()
+
+    def match_count(self):
+        return len(self.matches)
+
+    def filePath(self, index):
+        return os.path.join(self.directory, self.matches[index.row()])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.shown
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.shown < len(self.matches)
+
+    def fetchMore(self, parent):
+        count = min(len(self.matches) - self.shown, MATCH_CHUNK)
+        if count > 0:
+            self.beginInsertRows(QModelIndex(), self.shown, self.shown + count - 1)
+            self.shown += count
+            self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.matches[index.row()]
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self.icons.icon(QFileInfo(self.filePath(index)))
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return self.filePath(index)
+        return None
@@ -0,0 +1,103 @@
+import time
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTreeWidget, QTreeWidgetItem, QSplitter, QFileDialog, QMessageBox
+from PyQt6.QtCore import Qt, QTimer
+from src.tracing import tracer, prometheus_text, resident_memory_bytes, peak_memory_bytes
+
+# The panel only refreshes while it is on screen
+REFRESH_MS = 1000
+SLOWEST_SHOWN = 20
+
+
+def milliseconds(seconds):
+    return f"{seconds * 1000:.1f}"
+
+
+def megabytes(size):
+    return "n/a" if size is None else f"{size / (1024 * 1024):.0f} MB"
+
+
+class PerformanceWindow(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+
+        self.memory_label = QLabel()
+        layout.addWidget(self.memory_label)
+
+        self.operations = QTreeWidget()
+        self.operations.setHeaderLabels(["Operation", "Count", "p50 ms", "p95 ms", "Max ms", "Total s"])
+        self.operations.setSortingEnabled(True)
+        self.operations.sortByColumn(5, Qt.SortOrder.DescendingOrder)
+
+        self.slowest = QTreeWidget()
+        self.slowest.setHeaderLabels(["Slowest", "ms", "When", "Detail"])
+
+        self.queues = QTreeWidget()
+        self.queues.setHeaderLabels(["Queue", "Waiting"])
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        splitter.addWidget(self.operations)
+        splitter.addWidget(self.slowest)
+        splitter.addWidget(self.queues)
+        layout.addWidget(splitter)
+
+        buttons_layout = QHBoxLayout()
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        export_button = QPushButton("Export Metrics...")
+        export_button.clicked.connect(self.export_metrics)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(reset_button)
+        buttons_layout.addWidget(export_button)
+        layout.addLayout(buttons_layout)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
+
+    def refresh(self):
+        histograms, slowest, gauges = tracer().snapshot()
+        self.memory_label.setText(f"Memory: {megabytes(resident_memory_bytes())} resident, {megabytes(peak_memory_bytes())} peak")
+
+        self.operations.setSortingEnabled(False)
+        self.operations.clear()
+        for name, histogram in histograms.items():
+            item = QTreeWidgetItem([name])
+            # Numbers rather than text, so the columns sort numerically
+            values = (histogram.count, round(histogram.quantile(0.5) * 1000, 1), round(histogram.quantile(0.95) * 1000, 1),
+                      round(histogram.max * 1000, 1), round(histogram.total, 2))
+            for column, value in enumerate(values, 1):
+                item.setData(column, Qt.ItemDataRole.DisplayRole, value)
+            self.operations.addTopLevelItem(item)
+        self.operations.setSortingEnabled(True)
+
+        self.slowest.clear()
+        for seconds, _, name, detail, finished_at in slowest[:SLOWEST_SHOWN]:
+            self.slowest.addTopLevelItem(QTreeWidgetItem([name, milliseconds(seconds), time.strftime("%H:%M:%S", time.localtime(finished_at)), str(detail or "")]))
+
+        self.queues.clear()
+        for name, value in sorted(gauges.items()):
+            self.queues.addTopLevelItem(QTreeWidgetItem([name, str(value)]))
+
+    def reset(self):
+        tracer().reset()
+        self.refresh()
+
+    def export_metrics(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export Metrics", "docman.prom", "Prometheus text (*.prom);;All files (*)")
+        if not file_path:
+            return
+        try:
+            with open(file_path, "w", encoding="utf-8") as file:
+                file.write(prometheus_text())
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Could not write metrics:\n{e}")
@@ -0,0 +1,158 @@
+import os
+import threading
+from collections import OrderedDict
+from PyQt6.QtCore import QThread, QMutex, QMutexLocker, QWaitCondition, pyqtSignal
+from src.tracing import tracer
+from src.extract import text_extractor, needs_extraction
+from src.markdownpreview import BlockRenderer, is_markdown
+
+# Only the head of a file is shown in the preview pane, so never read more than this
+PREVIEW_BYTES = 16 * 1024
+PREVIEW_CACHE_BYTES = 8 * 1024 * 1024
+
+
+def read_preview(item_path, limit=PREVIEW_BYTES):
+    if os.path.isdir(item_path):
+        return f"Folder: {os.path.basename(item_path)}"
+    with open(item_path, 'rb') as file:
+        head = file.read(limit + 1)
+    text = head[:limit].decode('utf-8', errors='replace')
+    if len(head) > limit:
+        text += f"\n\n[Preview truncated at {limit // 1024} KB]"
+    return text
+
+
+def extracted_preview(item_path, limit=PREVIEW_BYTES):
+    # PDFs, office files and HTML are shown as their extracted text, which the extractor caches on disk
+    text = text_extractor().text(item_path)
+    if len(text) > limit:
+        text = text[:limit] + f"\n\n[Preview truncated at {limit // 1024} KB]"
+    return text
+
+
+def preview_key(item_path):
+    stat = os.stat(item_path)
+    return (item_path, stat.st_mtime_ns, stat.st_size)
+
+
+class PreviewCache:
+    def __init__(self, max_bytes=PREVIEW_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            text = self.entries.get(key)
+            if text is not None:
+                self.entries.move_to_end(key)
+            return text
+
+    def put(self, key, text):
+        # Text is stored as str, so count two bytes per character as a rough footprint
+        size = len(text) * 2
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= len(old) * 2
+            self.entries[key] = text
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted) * 2
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+
+class PreviewLoader(QThread):
+    preview_loaded = pyqtSignal(int, str, str)
+    preview_failed = pyqtSignal(int, str, str)
+
+    def __init__(self, parent=None, cache=None):
+        super().__init__(parent)
+        self.cache = cache if cache is not None else PreviewCache()
+        self.mutex = QMutex()
+        self.condition = QWaitCondition()
+        self.pending = None
+        self.prefetch_paths = []
+        self.request_id = 0
+        self.running = True
+        self.markdown = None
+
+    def request(self, item_path):
+        # Only the newest request is kept; older ones still waiting are dropped
+        with QMutexLocker(self.mutex):
+            self.request_id += 1
+            self.pending = (self.request_id, item_path)
+            self.condition.wakeOne()
+            return self.request_id
+
+    def prefetch(self, item_paths):
+        # Prefetches run only while no real request is waiting and are replaced wholesale
+        with QMutexLocker(self.mutex):
+            self.prefetch_paths = list(item_paths)
+            self.condition.wakeOne()
+
+    def is_current(self, request_id):
+        with QMutexLocker(self.mutex):
+            return request_id == self.request_id
+
+    def stop(self):
+        with QMutexLocker(self.mutex):
+            self.running = False
+            self.condition.wakeOne()
+        self.wait()
+
+    def load(self, item_path):
+        if os.path.isdir(item_path):
+            return read_preview(item_path)
+        key = preview_key(item_path)
+        text = self.cache.get(key)
+        if text is None:
+            with tracer().span("preview_read", item_path):
+                text = extracted_preview(item_path) if needs_extraction(item_path) else read_preview(item_path)
+                if is_markdown(item_path):
+                    # Markdown files are previewed rendered, as HTML
+                    if self.markdown is None:
+                        self.markdown = BlockRenderer()
+                    text = self.markdown.render(text)
+            self.cache.put(key, text)
+        return text
+
+    def run(self):
+        while True:
+            with QMutexLocker(self.mutex):
+                while self.running and self.pending is None and not self.prefetch_paths:
+                    self.condition.wait(self.mutex)
+                if not self.running:
+                    return
+                if self.pending is None:
+                    request_id, item_path = None, self.prefetch_paths.pop(0)
+                else:
+                    request_id, item_path = self.pending
+                    self.pending = None
+
+            if request_id is None:
+                try:
+                    self.load(item_path)
+                except Exception:
+                    pass
+                continue
+
+            if not os.path.exists(item_path):
+                self.preview_failed.emit(request_id, item_path, "File not found.")
+                continue
+            try:
+                with tracer().span("preview", item_path):
+                    text = self.load(item_path)
+            except Exception as e:
+                self.preview_failed.emit(request_id, item_path, str(e))
+                continue
+            if self.is_current(request_id):
+                self.preview_loaded.emit(request_id, item_path, text)
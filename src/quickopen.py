@@ -0,0 +1,428 @@
+import os
+import re
+import time
+import heapq
+import sqlite3
+from array import array
+from bisect import bisect_right
+from operator import add, itemgetter
+from itertools import accumulate
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem, QLabel
+from PyQt6.QtCore import Qt, QEvent, QObject, QThread, QTimer, QMutex, QMutexLocker, QWaitCondition, QCoreApplication, pyqtSignal
+from src.search import DATA_DIRECTORY
+from src.changes import CREATED, DELETED, RENAMED
+from src.tracing import tracer
+
+PATH_INDEX_DB = os.path.join(DATA_DIRECTORY, 'paths.db')
+DOCS_ROOT = os.path.join('src', 'docs')
+# Paths matched per batch; one batch takes a few ms
+CHUNK_PATHS = 2500
+# Added to minus the path's length when the whole query is found in the file name, at its start, or anywhere
+NAME_PREFIX_BONUS = 3000
+NAME_BONUS = 2000
+PATH_BONUS = 1000
+# Batches are run for this long before the results shown are updated and the event loop gets a turn
+BATCH_MS = 12
+RESULT_COUNT = 50
+# Time per batch spent checking whether the chunks still to search can beat the results shown
+BOUND_CHECK_SECONDS = 0.003
+# The tree is walked again when the finder opens if the last walk is older than this
+RESCAN_SECONDS = 60
+
+
+def walk_paths(root):
+    # Every file under root, relative to it
+    paths = []
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        paths.append(os.path.relpath(entry.path, root))
+        except OSError:
+            continue
+    return paths
+
+
+def fuzzy_pattern(query):
+    # Matches a whole line containing the query's characters in order. Each step skips only characters other
+    # than the next one wanted, so the leftmost match is found without backtracking.
+    parts = [f"[^{re.escape(char)}\n]*{re.escape(char)}" for char in query]
+    return re.compile('^' + ''.join(parts) + '[^\n]*', re.MULTILINE)
+
+
+def score_path(query, folded):
+    # Whole-query hits in the file name beat hits in folders, which beat scattered characters; shorter paths first
+    name = folded[folded.rfind(os.sep) + 1:]
+    score = -len(folded)
+    if name.startswith(query):
+        score += NAME_PREFIX_BONUS
+    elif query in name:
+        score += NAME_BONUS
+    elif query in folded:
+        score += PATH_BONUS
+    return score
+
+
+class PathChunk:
+    def __init__(self, paths):
+        self.paths = paths
+        self.folded = '\n'.join(paths).casefold()
+        lines = self.folded.split('\n')
+        if len(lines) != len(paths):
+            # A path holding a newline; lines no longer line up with paths, so fall back to one per line
+            self.paths = lines
+        self.min_length = min(map(len, lines))
+        # First characters of every file and folder name, a superset of those that can start a file name
+        self.name_starts = set(map(itemgetter(slice(0, 1)), self.folded.replace('\n', os.sep).split(os.sep)))
+        # Line start offsets, from the folded text since casefold() can change a line's length
+        self.offsets = array('i', map(add, accumulate(map(len, lines), initial=0), range(len(lines))))
+
+    def best_score(self, query):
+        # No path in this chunk can score higher for query; a substring test over the chunk is cheap next to matching it
+        if query[0] in self.name_starts and (self.folded.startswith(query) or f"\n{query}" in self.folded
+                                             or f"{os.sep}{query}" in self.folded):
+            return NAME_PREFIX_BONUS - self.min_length
+        return (NAME_BONUS if query in self.folded else 0) - self.min_length
+
+    def matches(self, pattern):
+        for match in pattern.finditer(self.folded):
+            yield self.paths[bisect_right(self.offsets, match.start()) - 1], match.group()
+
+
+def make_chunks(paths):
+    # Shortest paths first, so the best matches come early and a search can stop once the rest cannot beat them
+    paths = sorted(sorted(paths), key=len)
+    return [PathChunk(paths[start:start + CHUNK_PATHS]) for start in range(0, len(paths), CHUNK_PATHS)]
+
+
+class PathStore:
+    def __init__(self, db_path=PATH_INDEX_DB):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS paths (root TEXT NOT NULL, path TEXT NOT NULL, PRIMARY KEY (root, path)) WITHOUT ROWID")
+
+    def close(self):
+        self.db.close()
+
+    def load(self, root):
+        return [path for (path,) in self.db.execute("SELECT path FROM paths WHERE root = ?", (root,))]
+
+    def update(self, root, added, removed):
+        self.db.executemany("INSERT OR IGNORE INTO paths VALUES (?, ?)", ((root, path) for path in added))
+        self.db.executemany("DELETE FROM paths WHERE root = ? AND path = ?", ((root, path) for path in removed))
+        self.db.commit()
+
+
+class PathIndexLoader(QThread):
+    # Hands over last session's paths straight away, then those of a fresh walk whenever they differ,
+    # as (chunks, set of paths, change sequence number when the walk started)
+    paths_loaded = pyqtSignal(list, object, int)
+
+    def __init__(self, root, db_path=PATH_INDEX_DB, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.db_path = db_path
+        self.mutex = QMutex()
+        self.condition = QWaitCondition()
+        self.scan_requested = True
+        self.sequence = 0
+        self.running = True
+
+    def rescan(self, sequence):
+        with QMutexLocker(self.mutex):
+            self.scan_requested = True
+            self.sequence = sequence
+            self.condition.wakeOne()
+
+    def stop(self):
+        with QMutexLocker(self.mutex):
+            self.running = False
+            self.condition.wakeOne()
+        self.wait()
+
+    def run(self):
+        store = PathStore(self.db_path)
+        try:
+            known = set(store.load(self.root))
+            if known:
+                self.paths_loaded.emit(make_chunks(known), known, 0)
+            while True:
+                with QMutexLocker(self.mutex):
+                    while self.running and not self.scan_requested:
+                        self.condition.wait(self.mutex)
+                    if not self.running:
+                        return
+                    self.scan_requested = False
+                    sequence = self.sequence
+                with tracer().span("path_index", self.root):
+                    paths = set(walk_paths(self.root))
+                if paths != known:
+                    store.update(self.root, paths - known, known - paths)
+                    known = paths
+                    self.paths_loaded.emit(make_chunks(paths), paths, sequence)
+        finally:
+            store.close()
+
+
+class PathIndex(QObject):
+    # Every file under the documents root, relative to it, in chunks for batched fuzzy matching
+    updated = pyqtSignal()
+
+    def __init__(self, root=DOCS_ROOT, parent=None):
+        super().__init__(parent)
+        self.root = os.path.abspath(root)
+        self.chunks = []
+        self.known = set()
+        # Changes since the last walk, each with the sequence number it was recorded under; a walk keeps those
+        # recorded after it started, which it may have missed
+        self.sequence = 0
+        self.added = {}
+        self.removed = {}
+        self.counted = None
+        self.scanned_at = 0
+        self.loader = PathIndexLoader(self.root, parent=self)
+        self.loader.paths_loaded.connect(self.set_paths)
+
+    def start(self):
+        if not self.loader.isRunning():
+            self.scanned_at = time.monotonic()
+            self.loader.rescan(self.sequence)
+            self.loader.start()
+
+    def stop(self):
+        self.loader.stop()
+
+    def rescan_if_stale(self):
+        self.start()
+        if time.monotonic() - self.scanned_at > RESCAN_SECONDS:
+            self.scanned_at = time.monotonic()
+            self.loader.rescan(self.sequence)
+
+    def set_paths(self, chunks, known, sequence):
+        self.chunks = chunks
+        self.known = known
+        self.added = {relative: number for relative, number in self.added.items() if number > sequence and relative not in known}
+        self.removed = {relative: number for relative, number in self.removed.items() if number > sequence}
+        self.counted = None
+        self.updated.emit()
+
+    @property
+    def count(self):
+        # Worked out when asked, since a removed folder's files can only be counted by looking through them all
+        if self.counted is None:
+            if self.removed:
+                self.counted = sum(1 for relative in self.known if not self.is_removed(relative))
+            else:
+                self.counted = len(self.known)
+            self.counted += len(self.added)
+        return self.counted
+
+    def relative_path(self, item_path):
+        item_path = os.path.abspath(item_path)
+        if item_path.startswith(self.root + os.sep):
+            return item_path[len(self.root) + 1:]
+        return None
+
+    def apply_changes(self, changes):
+        for kind, item_path, new_path in changes:
+            if kind in (DELETED, RENAMED):
+                relative = self.relative_path(item_path)
+                if relative is not None:
+                    self.sequence += 1
+                    self.removed[relative] = self.sequence
+                    prefix = relative + os.sep
+                    for path in [path for path in self.added if path == relative or path.startswith(prefix)]:
+                        del self.added[path]
+                    self.counted = None
+            created = new_path if kind == RENAMED else item_path if kind == CREATED else None
+            if created and os.path.isfile(created):
+                relative = self.relative_path(created)
+                if relative is not None:
+                    self.sequence += 1
+                    self.removed.pop(relative, None)
+                    if relative not in self.known:
+                        self.added[relative] = self.sequence
+                    self.counted = None
+            elif created:
+                # A new or renamed folder's files are only picked up by walking it
+                self.scanned_at = 0
+
+    def is_removed(self, relative):
+        # A path is gone if it, or any folder above it, was deleted or renamed since the last walk
+        while relative:
+            if relative in self.removed:
+                return True
+            relative = os.path.dirname(relative)
+        return False
+
+    def search(self, query, within=None, floor=None):
+        # Yields (paths searched so far, [(score, relative path)]) once per chunk; within narrows the search to an
+        # earlier result list, for a query that only grew. floor() gives the score a match must beat to be shown;
+        # once no remaining chunk can, (paths searched, None) is yielded and the search ends.
+        folded_query = ''.join(query.casefold().split())
+        pattern = fuzzy_pattern(folded_query)
+        if within is not None:
+            chunks = [within[start:start + CHUNK_PATHS] for start in range(0, len(within), CHUNK_PATHS)]
+        else:
+            chunks = self.chunks + ([PathChunk(list(self.added))] if self.added else [])
+
+        def bound(chunk):
+            if isinstance(chunk, PathChunk):
+                return chunk.best_score(folded_query)
+            return NAME_PREFIX_BONUS - min(map(len, chunk))
+
+        # Chunks before this one are searched or known unable to beat the lowest score shown; that score only rises
+        beaten = 0
+        searched = 0
+        for position, chunk in enumerate(chunks):
+            threshold = floor() if floor is not None else None
+            if threshold is not None:
+                beaten = max(beaten, position)
+                deadline = time.perf_counter() + BOUND_CHECK_SECONDS
+                while beaten < len(chunks) and time.perf_counter() < deadline:
+                    if bound(chunks[beaten]) > threshold:
+                        break
+                    beaten += 1
+                if beaten == len(chunks):
+                    yield searched, None
+                    return
+            if not isinstance(chunk, PathChunk):
+                chunk = PathChunk(chunk)
+            batch = [(score_path(folded_query, folded), relative) for relative, folded in chunk.matches(pattern)
+                     if not self.removed or not self.is_removed(relative)]
+            searched += len(chunk.paths)
+            yield searched, batch
+
+
+_path_index = None
+
+
+def path_index():
+    global _path_index
+    if _path_index is None:
+        _path_index = PathIndex()
+        QCoreApplication.instance().aboutToQuit.connect(_path_index.stop)
+    return _path_index
+
+
+class QuickOpenDialog(QDialog):
+    # Enter opens the file in the Documenter; Ctrl+Enter shows it in Documents instead
+    path_chosen = pyqtSignal(str, bool)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Quick Open")
+        self.resize(700, 420)
+        self.index = path_index()
+        self.index.updated.connect(self.restart_search)
+        self.index.rescan_if_stale()
+
+        layout = QVBoxLayout(self)
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Type part of a file name or path...")
+        self.query_input.textChanged.connect(self.start_search)
+        self.query_input.returnPressed.connect(lambda: self.choose(self.results.currentItem()))
+        self.query_input.installEventFilter(self)
+        layout.addWidget(self.query_input)
+        self.results = QListWidget()
+        self.results.itemActivated.connect(self.choose)
+        layout.addWidget(self.results)
+        self.status = QLabel()
+        layout.addWidget(self.status)
+
+        self.search = None
+        self.query = ""
+        self.best = []
+        self.matches = []
+        # The last finished search, reused when the query only grows
+        self.finished_query = None
+        self.finished_matches = None
+        self.batch_timer = QTimer(self)
+        self.batch_timer.setSingleShot(True)
+        self.batch_timer.setInterval(0)
+        self.batch_timer.timeout.connect(self.run_batches)
+        self.status.setText(f"{self.index.count:,} files")
+
+    def eventFilter(self, watched, event):
+        # Up and Down move through the results while typing
+        if watched is self.query_input and event.type() == QEvent.Type.KeyPress and event.key() in (Qt.Key.Key_Up, Qt.Key.Key_Down):
+            step = -1 if event.key() == Qt.Key.Key_Up else 1
+            row = max(0, min(self.results.count() - 1, self.results.currentRow() + step))
+            self.results.setCurrentRow(row)
+            return True
+        return super().eventFilter(watched, event)
+
+    def restart_search(self):
+        self.finished_query = None
+        self.start_search()
+
+    def start_search(self):
+        query = ''.join(self.query_input.text().casefold().split())
+        within = None
+        if self.finished_query and query.startswith(self.finished_query):
+            within = self.finished_matches
+        self.query = query
+        self.best = []
+        self.matches = []
+        if not query:
+            self.search = None
+            self.results.clear()
+            self.status.setText(f"{self.index.count:,} files")
+            return
+        self.search = self.index.search(query, within, self.lowest_shown)
+        self.first_batch = True
+        self.run_batches()
+
+    def run_batches(self):
+        if self.search is None:
+            return
+        started = time.perf_counter()
+        with tracer().span("quick_open", self.query):
+            for searched, batch in self.search:
+                if batch is None:
+                    # Paths are searched shortest first, and none of the rest can make the list any more
+                    self.search = None
+                    self.show_results(f"Best {RESULT_COUNT} matches")
+                    return
+                self.matches.extend(relative for _, relative in batch)
+                self.best = heapq.nlargest(RESULT_COUNT, self.best + batch)
+                # The first matches are shown after one chunk, the rest as each time slice ends
+                if self.first_batch or (time.perf_counter() - started) * 1000 >= BATCH_MS:
+                    self.first_batch = False
+                    self.show_results(f"Searching... {searched:,} files")
+                    self.batch_timer.start()
+                    return
+        self.search = None
+        self.finished_query, self.finished_matches = self.query, self.matches
+        self.show_results(f"{len(self.matches):,} of {self.index.count:,} files match")
+
+    def lowest_shown(self):
+        return self.best[-1][0] if len(self.best) == RESULT_COUNT else None
+
+    def show_results(self, status):
+        current = self.results.currentItem()
+        current_path = current.data(Qt.ItemDataRole.UserRole) if current else None
+        self.results.clear()
+        for _, relative in self.best:
+            item = QListWidgetItem(relative)
+            item.setData(Qt.ItemDataRole.UserRole, os.path.join(self.index.root, relative))
+            self.results.addItem(item)
+            if item.data(Qt.ItemDataRole.UserRole) == current_path:
+                self.results.setCurrentItem(item)
+        if self.results.currentRow() < 0 and self.results.count():
+            self.results.setCurrentRow(0)
+        self.status.setText(status)
+
+    def choose(self, item):
+        if item is None:
+            return
+        reveal = bool(QCoreApplication.instance().keyboardModifiers() & Qt.KeyboardModifier.ControlModifier)
+        self.path_chosen.emit(item.data(Qt.ItemDataRole.UserRole), reveal)
+        self.accept()
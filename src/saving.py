@@ -0,0 +1,77 @@
+import os
+import queue
+import tempfile
+from PyQt6.QtCore import QThread, pyqtSignal
+from src.versions import VersionStore, VERSIONS_DB
+from src.tracing import tracer
+
+
+def atomic_write(file_path, content):
+    # Write to a temp file in the same directory and rename it over the target, so a crash never leaves a truncated file
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    try:
+        mode = os.stat(file_path).st_mode & 0o777
+    except OSError:
+        mode = 0o644
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class SaveWorker(QThread):
+    batch_saved = pyqtSignal(str, list, list)
+
+    def __init__(self, versions_db=VERSIONS_DB, parent=None):
+        super().__init__(parent)
+        self.versions_db = versions_db
+        self.batches = queue.Queue()
+
+    def save(self, label, documents):
+        # documents is a list of (document_id, file_path, content) snapshots taken on the GUI thread
+        self.batches.put((label, documents))
+
+    def pending(self):
+        return self.batches.qsize()
+
+    def stop(self):
+        self.batches.put(None)
+        self.wait()
+
+    def run(self):
+        versions = VersionStore(self.versions_db)
+        try:
+            while True:
+                batch = self.batches.get()
+                if batch is None:
+                    return
+                label, documents = batch
+                saved = []
+                failed = []
+                for document_id, file_path, content in documents:
+                    try:
+                        with tracer().span("save_write", file_path):
+                            atomic_write(file_path, content)
+                    except Exception as e:
+                        failed.append((document_id, file_path, str(e)))
+                        continue
+                    try:
+                        with tracer().span("save_version", file_path):
+                            revision = versions.record(file_path, content)
+                    except Exception:
+                        revision = None
+                    saved.append((document_id, file_path, revision))
+                self.batch_saved.emit(label, saved, failed)
+        finally:
+            versions.close()
@@ -0,0 +1,215 @@
+import os
+import sqlite3
+from PyQt6.QtCore import QThread, QMutex, QMutexLocker, QWaitCondition, pyqtSignal
+from src.tracing import tracer
+from src.extract import text_extractor
+
+DATA_DIRECTORY = os.path.join('src', 'data')
+SEARCH_DB = os.path.join(DATA_DIRECTORY, 'search.db')
+
+COMMIT_EVERY = 500
+
+
+def walk_files(root):
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        yield entry.path, stat.st_mtime_ns, stat.st_size
+        except OSError:
+            continue
+
+
+def fts_query(text):
+    # Quote every term so selectors, e-mail addresses and handles are not parsed as FTS syntax
+    terms = [term.replace('"', '""') for term in text.split()]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+class SearchIndex:
+    def __init__(self, db_path=SEARCH_DB):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5(
+                body, tokenize = "unicode61 tokenchars '_'"
+            );
+        """)
+
+    def close(self):
+        self.db.close()
+
+    def indexed_files(self):
+        return {path: (mtime_ns, size) for path, mtime_ns, size in self.db.execute("SELECT path, mtime_ns, size FROM files")}
+
+    def store(self, item_path, mtime_ns, size, text):
+        row = self.db.execute("SELECT id FROM files WHERE path = ?", (item_path,)).fetchone()
+        if row:
+            self.db.execute("UPDATE files SET mtime_ns = ?, size = ? WHERE id = ?", (mtime_ns, size, row[0]))
+            self.db.execute("DELETE FROM documents WHERE rowid = ?", (row[0],))
+            file_id = row[0]
+        else:
+            file_id = self.db.execute("INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)", (item_path, mtime_ns, size)).lastrowid
+        self.db.execute("INSERT INTO documents (rowid, body) VALUES (?, ?)", (file_id, text))
+
+    def remove(self, item_path):
+        row = self.db.execute("SELECT id FROM files WHERE path = ?", (item_path,)).fetchone()
+        if row:
+            self.db.execute("DELETE FROM documents WHERE rowid = ?", (row[0],))
+            self.db.execute("DELETE FROM files WHERE id = ?", (row[0],))
+
+    def reindex_file(self, item_path):
+        if os.path.isfile(item_path):
+            # Change notifications may repeat what is already indexed, e.g. files the ingest pipeline stored itself
+            stat = os.stat(item_path)
+            if self.db.execute("SELECT 1 FROM files WHERE path = ? AND mtime_ns = ? AND size = ?", (item_path, stat.st_mtime_ns, stat.st_size)).fetchone():
+                return
+            _, mtime_ns, size, text, error = text_extractor().extract(item_path)
+            if text is None:
+                raise OSError(error)
+            self.store(item_path, mtime_ns, size, text)
+        elif os.path.isdir(item_path):
+            for path, mtime_ns, size, text, _ in text_extractor().extract_many(path for path, _, _ in walk_files(item_path)):
+                if text is not None:
+                    self.store(path, mtime_ns, size, text)
+        else:
+            # A removed directory takes everything indexed below it along
+            self.remove(item_path)
+            prefix = item_path.rstrip(os.sep) + os.sep
+            for (path,) in self.db.execute("SELECT path FROM files WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)).fetchall():
+                if not os.path.exists(path):
+                    self.remove(path)
+        self.db.commit()
+
+    def changed_files(self, root):
+        indexed = self.indexed_files()
+        changed = []
+        for item_path, mtime_ns, size in walk_files(root):
+            if indexed.pop(item_path, None) != (mtime_ns, size):
+                changed.append(item_path)
+        return changed, list(indexed)
+
+    def search(self, text, limit=50):
+        query = fts_query(text)
+        if query is None:
+            return []
+        try:
+            return self.db.execute("""
+                SELECT files.path, snippet(documents, 0, '[', ']', '…', 12)
+                FROM documents JOIN files ON files.id = documents.rowid
+                WHERE documents MATCH ?
+                ORDER BY rank
+                LIMIT ?
+            """, (query, limit)).fetchall()
+        except sqlite3.OperationalError:
+            return []
+
+
+class IndexWorker(QThread):
+    progress = pyqtSignal(int, int)
+    indexed = pyqtSignal(int)
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, root, db_path=SEARCH_DB, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.db_path = db_path
+        self.mutex = QMutex()
+        self.condition = QWaitCondition()
+        self.pending_paths = []
+        self.rescan_requested = True
+        self.running = True
+
+    def reindex(self, item_paths):
+        with QMutexLocker(self.mutex):
+            self.pending_paths.extend(item_paths)
+            self.condition.wakeOne()
+
+    def rescan(self):
+        with QMutexLocker(self.mutex):
+            self.rescan_requested = True
+            self.condition.wakeOne()
+
+    def stop(self):
+        with QMutexLocker(self.mutex):
+            self.running = False
+            self.condition.wakeOne()
+        self.wait()
+
+    def is_running(self):
+        with QMutexLocker(self.mutex):
+            return self.running
+
+    def run(self):
+        index = SearchIndex(self.db_path)
+        try:
+            while True:
+                with QMutexLocker(self.mutex):
+                    while self.running and not self.rescan_requested and not self.pending_paths:
+                        self.condition.wait(self.mutex)
+                    if not self.running:
+                        return
+                    rescan, self.rescan_requested = self.rescan_requested, False
+                    item_paths, self.pending_paths = self.pending_paths, []
+
+                if rescan:
+                    try:
+                        with tracer().span("index_tree", self.root):
+                            self.index_tree(index)
+                    except Exception as e:
+                        self.failed.emit(self.root, str(e))
+                for item_path in dict.fromkeys(item_paths):
+                    try:
+                        with tracer().span("index_file", item_path):
+                            index.reindex_file(item_path)
+                    except Exception as e:
+                        self.failed.emit(item_path, str(e))
+                if item_paths:
+                    self.indexed.emit(len(item_paths))
+        finally:
+            index.close()
+
+    def index_tree(self, index):
+        changed, removed = index.changed_files(self.root)
+        for item_path in removed:
+            index.remove(item_path)
+        index.db.commit()
+        total = len(changed)
+        if not total:
+            self.indexed.emit(0)
+            return
+
+        # Reading and parsing happen in the extractor's worker processes; only this thread writes to the database
+        done = 0
+        for item_path, mtime_ns, size, text, _ in text_extractor().extract_many(changed):
+            if not self.is_running():
+                break
+            if text is None:
+                index.remove(item_path)
+            else:
+                index.store(item_path, mtime_ns, size, text)
+            done += 1
+            if done % COMMIT_EVERY == 0:
+                index.db.commit()
+                self.progress.emit(done, total)
+        index.db.commit()
+        self.progress.emit(done, total)
+        self.indexed.emit(done)
@@ -0,0 +1,50 @@
+import time
+from PyQt6.QtCore import QObject, QEvent, QTimer, pyqtSignal
+from src.logging import log_bus
+
+# Time from process start to the main window's first paint that is still considered fast
+STARTUP_BUDGET_SECONDS = 1.0
+
+
+class StartupTimer(QObject):
+    first_paint = pyqtSignal(float)
+
+    def __init__(self, started_at, parent=None):
+        super().__init__(parent)
+        self.started_at = started_at
+        self.marks = []
+        self.window = None
+
+    def mark(self, name, at=None):
+        self.marks.append((name, time.perf_counter() if at is None else at))
+
+    def watch(self, window):
+        self.window = window
+        window.installEventFilter(self)
+
+    def eventFilter(self, watched, event):
+        if watched is self.window and event.type() == QEvent.Type.Paint:
+            self.window.removeEventFilter(self)
+            self.mark("first paint")
+            # Reported after the paint has finished rather than from inside it
+            QTimer.singleShot(0, self.report)
+        return False
+
+    def timings(self):
+        # Each phase is measured from the end of the one before it
+        phases = []
+        previous = self.started_at
+        for name, at in self.marks:
+            phases.append((name, at - previous))
+            previous = at
+        return phases, previous - self.started_at
+
+    def report(self):
+        phases, total = self.timings()
+        summary = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in phases)
+        message = f"Startup: first paint after {total * 1000:.0f} ms ({summary})"
+        if total > STARTUP_BUDGET_SECONDS:
+            log_bus().log_warning(f"{message}; over the {STARTUP_BUDGET_SECONDS * 1000:.0f} ms budget", action="startup", duration=round(total, 3))
+        else:
+            log_bus().log_interaction(message, action="startup", duration=round(total, 3))
+        self.first_paint.emit(total)
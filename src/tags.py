@@ -0,0 +1,285 @@
+import os
+import sqlite3
+from PyQt6.QtCore import Qt
+from src.changes import CREATED, RENAMED
+
+TAGS_DB = os.path.join('src', 'data', 'tags.db')
+DEFAULT_TAG = "tagged"
+
+
+def file_identity(item_path):
+    # Device and inode survive renames and moves within a volume, unlike the path
+    stat = os.stat(item_path)
+    return stat.st_dev, stat.st_ino
+
+
+class TagStore:
+    def __init__(self, db_path=TAGS_DB):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY,
+                dev INTEGER NOT NULL,
+                ino INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                UNIQUE (dev, ino)
+            );
+            CREATE INDEX IF NOT EXISTS files_path ON files (path);
+            CREATE TABLE IF NOT EXISTS tags (
+                tag TEXT NOT NULL,
+                file_id INTEGER NOT NULL REFERENCES files (id) ON DELETE CASCADE,
+                PRIMARY KEY (tag, file_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS tags_file ON tags (file_id);
+        """)
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.load_identities()
+
+    def load_identities(self):
+        # Tagged files are few next to the tree, so keep their identities, and where they were last seen, in memory;
+        # painting looks paths up here and never stats or writes
+        self.tagged = {}
+        self.paths = {}
+        for dev, ino, path, tag in self.db.execute("SELECT dev, ino, path, tag FROM files JOIN tags ON tags.file_id = files.id"):
+            self.tagged.setdefault((dev, ino), [path, set()])[1].add(tag)
+            self.paths[path] = (dev, ino)
+
+    def close(self):
+        self.db.close()
+
+    def tags_for(self, item_path):
+        identity = self.paths.get(item_path)
+        if identity is None:
+            return set()
+        return self.tagged[identity][1]
+
+    def place_identity(self, identity, item_path):
+        entry = self.tagged[identity]
+        if self.paths.get(entry[0]) == identity:
+            del self.paths[entry[0]]
+        entry[0] = item_path
+        self.paths[item_path] = identity
+        return entry
+
+    def move_identity(self, identity, item_path):
+        # The file was moved or renamed; remember where it is now
+        self.place_identity(identity, item_path)
+        self.db.execute("UPDATE files SET path = ? WHERE dev = ? AND ino = ?", (item_path, *identity))
+
+    def apply_changes(self, changes):
+        # Follows tagged files through renames and moves reported by the change tracker; returns the paths
+        # whose tags changed, old and new
+        moved = []
+        with self.db:
+            for kind, item_path, new_path in changes:
+                if kind == RENAMED:
+                    prefix = item_path.rstrip(os.sep) + os.sep
+                    for path, identity in list(self.paths.items()):
+                        if path == item_path or path.startswith(prefix):
+                            self.move_identity(identity, new_path + path[len(item_path):])
+                            moved.extend((path, new_path + path[len(item_path):]))
+                elif kind == CREATED and self.tagged:
+                    moved.extend(self.find_moved(item_path))
+        return moved
+
+    def find_moved(self, item_path):
+        # A move from outside DocMan shows up as a file or folder created somewhere else
+        try:
+            identity = file_identity(item_path)
+        except OSError:
+            return []
+        moved = []
+        entry = self.tagged.get(identity)
+        if entry is not None and entry[0] != item_path:
+            moved.extend((entry[0], item_path))
+            self.move_identity(identity, item_path)
+        if os.path.isdir(item_path) and not os.path.islink(item_path):
+            missing = {identity for identity, entry in self.tagged.items() if not os.path.lexists(entry[0])}
+            for directory, dirnames, filenames in os.walk(item_path):
+                if not missing:
+                    break
+                for name in dirnames + filenames:
+                    path = os.path.join(directory, name)
+                    try:
+                        identity = file_identity(path)
+                    except OSError:
+                        continue
+                    if identity in missing:
+                        missing.discard(identity)
+                        moved.extend((self.tagged[identity][0], path))
+                        self.move_identity(identity, path)
+        return moved
+
+    def has_tag(self, item_path, tag):
+        return tag in self.tags_for(item_path)
+
+    def file_id(self, identity, item_path):
+        self.db.execute("INSERT INTO files (dev, ino, path) VALUES (?, ?, ?) ON CONFLICT (dev, ino) DO UPDATE SET path = excluded.path", (*identity, item_path))
+        return self.db.execute("SELECT id FROM files WHERE dev = ? AND ino = ?", identity).fetchone()[0]
+
+    def tag(self, item_paths, tag):
+        changed = []
+        with self.db:
+            for item_path in item_paths:
+                try:
+                    identity = file_identity(item_path)
+                except OSError:
+                    continue
+                self.tagged.setdefault(identity, [item_path, set()])
+                entry = self.place_identity(identity, item_path)
+                if tag in entry[1]:
+                    continue
+                self.db.execute("INSERT OR IGNORE INTO tags (tag, file_id) VALUES (?, ?)", (tag, self.file_id(identity, item_path)))
+                entry[1].add(tag)
+                changed.append(item_path)
+        return changed
+
+    def untag(self, item_paths, tag):
+        changed = []
+        with self.db:
+            for item_path in item_paths:
+                try:
+                    identity = file_identity(item_path)
+                except OSError:
+                    continue
+                entry = self.tagged.get(identity)
+                if entry is None or tag not in entry[1]:
+                    continue
+                self.db.execute("DELETE FROM tags WHERE tag = ? AND file_id = (SELECT id FROM files WHERE dev = ? AND ino = ?)", (tag, *identity))
+                self.forget_identity_if_untagged(identity)
+                changed.append(item_path)
+        return changed
+
+    def forget_identity_if_untagged(self, identity):
+        entry = self.tagged[identity]
+        if not self.db.execute("SELECT 1 FROM tags JOIN files ON files.id = tags.file_id WHERE dev = ? AND ino = ? LIMIT 1", identity).fetchone():
+            self.db.execute("DELETE FROM files WHERE dev = ? AND ino = ?", identity)
+            self.forget_identity(identity)
+        else:
+            entry[1] = {tag for (tag,) in self.db.execute("SELECT tag FROM tags JOIN files ON files.id = tags.file_id WHERE dev = ? AND ino = ?", identity)}
+
+    def forget_identity(self, identity):
+        entry = self.tagged.pop(identity)
+        if self.paths.get(entry[0]) == identity:
+            del self.paths[entry[0]]
+
+    def untag_all(self, tag):
+        changed = []
+        with self.db:
+            for identity, entry in list(self.tagged.items()):
+                if tag in entry[1]:
+                    changed.append(entry[0])
+                    entry[1].discard(tag)
+                    if not entry[1]:
+                        self.forget_identity(identity)
+            self.db.execute("DELETE FROM tags WHERE tag = ?", (tag,))
+            self.db.execute("DELETE FROM files WHERE id NOT IN (SELECT file_id FROM tags)")
+        return changed
+
+    def forget_paths(self, item_paths):
+        # Used after deletes, when the files can no longer be stat'ed to find their identity
+        with self.db:
+            for item_path in item_paths:
+                prefix = item_path.rstrip(os.sep) + os.sep
+                self.db.execute("DELETE FROM files WHERE path = ? OR substr(path, 1, ?) = ?", (item_path, len(prefix), prefix))
+        self.load_identities()
+
+    def paths_tagged(self, tag):
+        # Where tagged files were last seen, without stat'ing them; enough to know which rows to repaint
+        return [entry[0] for entry in self.tagged.values() if tag in entry[1]]
+
+    def paths_with_tags(self, tags):
+        tags = list(dict.fromkeys(tags))
+        if not tags:
+            return []
+        placeholders = ", ".join("?" for _ in tags)
+        rows = self.db.execute(f"""
+            SELECT files.path FROM tags JOIN files ON files.id = tags.file_id
+            WHERE tags.tag IN ({placeholders})
+            GROUP BY tags.file_id
+            HAVING COUNT(*) = ?
+            ORDER BY files.path
+        """, (*tags, len(tags)))
+        return self.verified_paths([path for (path,) in rows])
+
+    def verified_paths(self, item_paths):
+        # Only paths still holding the tagged file; another file now in its place, or none, is left out, so
+        # copying or deleting tagged items never touches something that was not tagged
+        verified = []
+        for item_path in item_paths:
+            identity = self.paths.get(item_path)
+            try:
+                current = file_identity(item_path)
+            except OSError:
+                current = None
+            if identity is not None and current == identity:
+                verified.append(item_path)
+            elif identity is not None and current is not None:
+                # Until the tagged file turns up again, this path shows unchecked
+                del self.paths[item_path]
+        return verified
+
+    def all_tags(self):
+        return [tag for (tag,) in self.db.execute("SELECT DISTINCT tag FROM tags ORDER BY tag")]
+
+
+class TaggedModelMixin:
+    # Tag check boxes for a file model; the model provides filePath() and index(path)
+    def setup_tags(self, tag_store=None):
+        self.tag_store = tag_store if tag_store is not None else TagStore()
+        self.active_tag = DEFAULT_TAG
+
+    @property
+    def tagged_items(self):
+        return self.tag_store.paths_with_tags([self.active_tag])
+
+    def flags(self, index):
+        return super().flags(index) | Qt.ItemFlag.ItemIsUserCheckable
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.CheckStateRole and index.column() == 0:
+            if self.tag_store.has_tag(self.filePath(index), self.active_tag):
+                return Qt.CheckState.Checked
+        return super().data(index, role)
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role == Qt.ItemDataRole.CheckStateRole:
+            self.set_tagged(index, Qt.CheckState(value) == Qt.CheckState.Checked)
+            return True
+        return super().setData(index, value, role)
+
+    def set_tagged(self, index, tagged):
+        self.set_tagged_paths([self.filePath(index)], tagged)
+
+    def set_tagged_paths(self, item_paths, tagged, tag=None):
+        tag = tag or self.active_tag
+        if tagged:
+            changed = self.tag_store.tag(item_paths, tag)
+        else:
+            changed = self.tag_store.untag(item_paths, tag)
+        if tag == self.active_tag:
+            self.emit_tag_changes(changed)
+        return changed
+
+    def set_active_tag(self, tag):
+        # Only check states change; rows stay where they are
+        changed = self.tag_store.paths_tagged(self.active_tag) + self.tag_store.paths_tagged(tag)
+        self.active_tag = tag
+        self.emit_tag_changes(list(dict.fromkeys(changed)))
+
+    def emit_tag_changes(self, item_paths):
+        for item_path in item_paths:
+            index = self.index(item_path)
+            if index.isValid():
+                self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+
+    def apply_tag_changes(self, changes):
+        self.emit_tag_changes(self.tag_store.apply_changes(changes))
+
+    def untag_paths(self, item_paths):
+        self.tag_store.forget_paths(item_paths)
+
+    def untag_all(self):
+        self.emit_tag_changes(self.tag_store.untag_all(self.active_tag))
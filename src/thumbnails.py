@@ -0,0 +1,168 @@
+import os
+import hashlib
+from collections import OrderedDict, deque
+from PyQt6.QtWidgets import QStyledItemDelegate
+from PyQt6.QtGui import QImage, QImageReader, QPixmap, QIcon
+from PyQt6.QtCore import Qt, QSize, QThread, QMutex, QMutexLocker, QWaitCondition, pyqtSignal
+from src.tracing import tracer
+
+THUMBNAIL_DIRECTORY = os.path.join('src', 'data', 'thumbnails')
+# Oldest thumbnails are removed once the disk cache grows past this
+THUMBNAIL_CACHE_BYTES = 256 * 1024 * 1024
+GRID_THUMBNAIL_SIZE = 128
+# Requests beyond this many are dropped, oldest first; when scrolling fast only what is on screen now matters
+MAX_PENDING = 256
+# Decoded pixmaps kept in memory for the grid
+PIXMAP_CACHE_ITEMS = 1000
+
+_image_extensions = None
+
+
+def is_image(item_path):
+    global _image_extensions
+    if _image_extensions is None:
+        _image_extensions = {bytes(name).decode().lower() for name in QImageReader.supportedImageFormats()}
+    return os.path.splitext(item_path)[1].lower().lstrip('.') in _image_extensions
+
+
+def thumbnail_path(item_path, stat, size):
+    key = f"{os.path.abspath(item_path)}\0{stat.st_mtime_ns}\0{stat.st_size}\0{size}"
+    return os.path.join(THUMBNAIL_DIRECTORY, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.png')
+
+
+def load_thumbnail(item_path, size):
+    # Fits the image in a size x size box; the scaled copy is kept on disk keyed by path and mtime
+    stat = os.stat(item_path)
+    cached_path = thumbnail_path(item_path, stat, size)
+    image = QImage()
+    if image.load(cached_path):
+        try:
+            os.utime(cached_path)
+        except OSError:
+            pass
+        return image
+    reader = QImageReader(item_path)
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid() and (original.width() > size or original.height() > size):
+        # Lets JPEG and similar formats decode straight to the smaller size
+        reader.setScaledSize(original.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        raise OSError(reader.errorString())
+    if image.width() > size or image.height() > size:
+        image = image.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+    os.makedirs(THUMBNAIL_DIRECTORY, exist_ok=True)
+    temp_path = cached_path + '.tmp'
+    if image.save(temp_path, 'PNG'):
+        os.replace(temp_path, cached_path)
+    return image
+
+
+def prune_thumbnails(max_bytes=THUMBNAIL_CACHE_BYTES):
+    try:
+        with os.scandir(THUMBNAIL_DIRECTORY) as entries:
+            files = [(entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in entries if entry.is_file()]
+    except OSError:
+        return
+    total = sum(size for _, size, _ in files)
+    for _, size, item_path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(item_path)
+        except OSError:
+            continue
+        total -= size
+
+
+class ThumbnailLoader(QThread):
+    thumbnail_loaded = pyqtSignal(object, QImage)
+    thumbnail_failed = pyqtSignal(object, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.mutex = QMutex()
+        self.condition = QWaitCondition()
+        # Newest first; key is (path, size, modified) as given by the caller and handed back with the image
+        self.pending = deque()
+        self.queued = set()
+        self.running = True
+
+    def request(self, key):
+        with QMutexLocker(self.mutex):
+            if key in self.queued:
+                self.pending.remove(key)
+            self.pending.appendleft(key)
+            self.queued.add(key)
+            while len(self.pending) > MAX_PENDING:
+                self.queued.discard(self.pending.pop())
+            self.condition.wakeOne()
+
+    def queue_length(self):
+        with QMutexLocker(self.mutex):
+            return len(self.pending)
+
+    def stop(self):
+        with QMutexLocker(self.mutex):
+            self.running = False
+            self.condition.wakeOne()
+        self.wait()
+
+    def run(self):
+        prune_thumbnails()
+        while True:
+            with QMutexLocker(self.mutex):
+                while self.running and not self.pending:
+                    self.condition.wait(self.mutex)
+                if not self.running:
+                    return
+                key = self.pending.popleft()
+                self.queued.discard(key)
+            item_path, size = key[0], key[1]
+            try:
+                with tracer().span("thumbnail", item_path):
+                    image = load_thumbnail(item_path, size)
+            except Exception as e:
+                self.thumbnail_failed.emit(key, str(e))
+                continue
+            self.thumbnail_loaded.emit(key, image)
+
+
+class ThumbnailDelegate(QStyledItemDelegate):
+    # Paints images in a file-model view with their thumbnails; only items actually painted are requested
+    def __init__(self, view, loader, size=GRID_THUMBNAIL_SIZE):
+        super().__init__(view)
+        self.view = view
+        self.loader = loader
+        self.size = size
+        self.pixmaps = OrderedDict()
+        self.failed = set()
+        loader.thumbnail_loaded.connect(self.store_thumbnail)
+        loader.thumbnail_failed.connect(lambda key, error: self.failed.add(key))
+
+    def key(self, index):
+        model = index.model()
+        return (model.filePath(index), self.size, model.lastModified(index).toMSecsSinceEpoch())
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        option.decorationSize = QSize(self.size, self.size)
+        model = index.model()
+        if model.isDir(index) or not is_image(model.filePath(index)):
+            return
+        key = self.key(index)
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(key)
+            option.icon = QIcon(pixmap)
+        elif key not in self.failed:
+            self.loader.request(key)
+
+    def store_thumbnail(self, key, image):
+        if key[1] != self.size:
+            return
+        self.pixmaps[key] = QPixmap.fromImage(image)
+        while len(self.pixmaps) > PIXMAP_CACHE_ITEMS:
+            self.pixmaps.popitem(last=False)
+        self.view.viewport().update()
@@ -0,0 +1,176 @@
+import os
+import sys
+import time
+import heapq
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Upper bounds in seconds of the span histogram buckets; the last bucket is +Inf
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SLOWEST_SPANS = 50
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        bucket = 0
+        while bucket < len(BUCKETS) and seconds > BUCKETS[bucket]:
+            bucket += 1
+        self.counts[bucket] += 1
+        self.total += seconds
+        self.count += 1
+        self.max = max(self.max, seconds)
+
+    def copy(self):
+        histogram = Histogram()
+        histogram.counts = list(self.counts)
+        histogram.total, histogram.count, histogram.max = self.total, self.count, self.max
+        return histogram
+
+    def quantile(self, fraction):
+        # Upper bound of the bucket holding the quantile, capped by the slowest span actually seen
+        target = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return min(BUCKETS[bucket], self.max) if bucket < len(BUCKETS) else self.max
+        return self.max
+
+
+class Tracer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        # Min-heap of (seconds, sequence, name, detail, finished_at) holding the slowest spans seen
+        self.slowest = []
+        self.sequence = 0
+        self.gauges = {}
+
+    @contextmanager
+    def span(self, name, detail=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started, detail)
+
+    def record(self, name, seconds, detail=None):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+            self.sequence += 1
+            entry = (seconds, self.sequence, name, detail, time.time())
+            if len(self.slowest) < SLOWEST_SPANS:
+                heapq.heappush(self.slowest, entry)
+            elif seconds > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, entry)
+
+    def gauge(self, name, callback):
+        # callback is read only when a snapshot is taken, so registering costs nothing on the hot path
+        self.gauges[name] = callback
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.slowest = []
+
+    def snapshot(self):
+        with self.lock:
+            histograms = {name: histogram.copy() for name, histogram in self.histograms.items()}
+            slowest = sorted(self.slowest, reverse=True)
+        gauges = {}
+        for name, callback in list(self.gauges.items()):
+            try:
+                gauges[name] = callback()
+            except Exception:
+                # The object behind the gauge is gone
+                continue
+        return histograms, slowest, gauges
+
+
+_tracer = Tracer()
+
+
+def tracer():
+    return _tracer
+
+
+def resident_memory_bytes():
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_memory_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(snapshot=None):
+    histograms, _, gauges = snapshot or _tracer.snapshot()
+    lines = [
+        "# HELP docman_span_seconds Duration of instrumented DocMan operations.",
+        "# TYPE docman_span_seconds histogram",
+    ]
+    for name, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bucket, count in enumerate(histogram.counts):
+            cumulative += count
+            bound = repr(BUCKETS[bucket]) if bucket < len(BUCKETS) else "+Inf"
+            lines.append(f'docman_span_seconds_bucket{{span="{label(name)}",le="{bound}"}} {cumulative}')
+        lines.append(f'docman_span_seconds_sum{{span="{label(name)}"}} {histogram.total!r}')
+        lines.append(f'docman_span_seconds_count{{span="{label(name)}"}} {histogram.count}')
+    lines += ["# HELP docman_queue_depth Items waiting in a DocMan work queue.", "# TYPE docman_queue_depth gauge"]
+    for name, value in sorted(gauges.items()):
+        lines.append(f'docman_queue_depth{{queue="{label(name)}"}} {value}')
+    for metric, value, description in (("docman_resident_memory_bytes", resident_memory_bytes(), "Current resident set size."),
+                                       ("docman_peak_resident_memory_bytes", peak_memory_bytes(), "Peak resident set size.")):
+        if value is not None:
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} gauge", f"{metric} {value}"]
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port, host='127.0.0.1'):
+    # Serves /metrics for a local Prometheus scraper on a daemon thread
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import zlib
+import difflib
+import hashlib
+import sqlite3
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem, QTextEdit, QPushButton, QSplitter, QLabel
+
+VERSIONS_DB = os.path.join('src', 'data', 'versions.db')
+# A full copy is stored every this many revisions so no read replays more deltas than that
+KEYFRAME_INTERVAL = 32
+
+
+def make_delta(old_lines, new_lines):
+    # Common leading and trailing lines are trimmed first, so a local edit only diffs the changed region
+    prefix = 0
+    limit = min(len(old_lines), len(new_lines))
+    while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+        suffix += 1
+
+    ops = []
+    if prefix:
+        ops.append([0, prefix])
+    old_middle = old_lines[prefix:len(old_lines) - suffix]
+    new_middle = new_lines[prefix:len(new_lines) - suffix]
+    matcher = difflib.SequenceMatcher(None, old_middle, new_middle, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([prefix + i1, prefix + i2])
+        elif j2 > j1:
+            ops.append(new_middle[j1:j2])
+    if suffix:
+        ops.append([len(old_lines) - suffix, len(old_lines)])
+    return ops
+
+
+def apply_delta(old_lines, ops):
+    new_lines = []
+    for op in ops:
+        if len(op) == 2 and isinstance(op[0], int):
+            new_lines.extend(old_lines[op[0]:op[1]])
+        else:
+            new_lines.extend(op)
+    return new_lines
+
+
+class VersionStore:
+    def __init__(self, db_path=VERSIONS_DB):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS revisions (
+                document TEXT NOT NULL,
+                revision INTEGER NOT NULL,
+                is_full INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                saved_at REAL NOT NULL,
+                PRIMARY KEY (document, revision)
+            ) WITHOUT ROWID;
+        """)
+        # Text of the newest revision per document, so recording a save never replays history
+        self.latest = {}
+
+    def close(self):
+        self.db.close()
+
+    def document_key(self, file_path):
+        return os.path.abspath(file_path)
+
+    def head(self, document):
+        row = self.db.execute("SELECT MAX(revision), sha256 FROM revisions WHERE document = ?", (document,)).fetchone()
+        return row if row[0] is not None else (0, None)
+
+    def record(self, file_path, content):
+        document = self.document_key(file_path)
+        head, head_sha = self.head(document)
+        sha256 = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        if sha256 == head_sha:
+            return head
+
+        revision = head + 1
+        new_lines = content.splitlines(keepends=True)
+        if revision % KEYFRAME_INTERVAL == 1:
+            is_full, payload = 1, content
+        else:
+            old_lines = self.latest.get(document)
+            if old_lines is None:
+                old_lines = self.read(file_path, head).splitlines(keepends=True)
+            is_full, payload = 0, json.dumps(make_delta(old_lines, new_lines))
+        with self.db:
+            self.db.execute("INSERT INTO revisions (document, revision, is_full, data, size, sha256, saved_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (document, revision, is_full, zlib.compress(payload.encode('utf-8')), len(content), sha256, time.time()))
+        self.latest[document] = new_lines
+        return revision
+
+    def read(self, file_path, revision):
+        document = self.document_key(file_path)
+        keyframe = revision - (revision - 1) % KEYFRAME_INTERVAL
+        rows = self.db.execute("SELECT is_full, data FROM revisions WHERE document = ? AND revision BETWEEN ? AND ? ORDER BY revision",
+                               (document, keyframe, revision)).fetchall()
+        lines = []
+        for is_full, data in rows:
+            payload = zlib.decompress(data).decode('utf-8')
+            lines = payload.splitlines(keepends=True) if is_full else apply_delta(lines, json.loads(payload))
+        return "".join(lines)
+
+    def history(self, file_path):
+        document = self.document_key(file_path)
+        return self.db.execute("SELECT revision, saved_at, size, length(data) FROM revisions WHERE document = ? ORDER BY revision DESC",
+                               (document,)).fetchall()
+
+
+class HistoryDialog(QDialog):
+    restore_revision = pyqtSignal(str)
+
+    def __init__(self, store, file_path, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.file_path = file_path
+        self.setWindowTitle(f"History: {os.path.basename(file_path)}")
+        self.resize(900, 550)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Select a revision to compare it with the one before it. Select two to compare them with each other."))
+
+        self.revisions = QListWidget()
+        self.revisions.setSelectionMode(QListWidget.SelectionMode.ExtendedSelection)
+        self.revisions.itemSelectionChanged.connect(self.show_diff)
+        for revision, saved_at, size, stored in store.history(file_path):
+            timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(saved_at))
+            item = QListWidgetItem(f"r{revision}  {timestamp}  {size} chars  ({stored} bytes stored)")
+            item.setData(Qt.ItemDataRole.UserRole, revision)
+            self.revisions.addItem(item)
+
+        self.diff_view = QTextEdit()
+        self.diff_view.setReadOnly(True)
+        self.diff_view.setFont(QFont("monospace"))
+
+        splitter = QSplitter()
+        splitter.addWidget(self.revisions)
+        splitter.addWidget(self.diff_view)
+        splitter.setStretchFactor(1, 3)
+        layout.addWidget(splitter)
+
+        buttons_layout = QHBoxLayout()
+        restore_button = QPushButton("Restore Into Editor")
+        restore_button.clicked.connect(self.restore_selected)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.accept)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(restore_button)
+        buttons_layout.addWidget(close_button)
+        layout.addLayout(buttons_layout)
+
+    def selected_revisions(self):
+        return sorted(item.data(Qt.ItemDataRole.UserRole) for item in self.revisions.selectedItems())
+
+    def show_diff(self):
+        selected = self.selected_revisions()
+        if not selected:
+            self.diff_view.clear()
+            return
+        new_revision = selected[-1]
+        old_revision = selected[0] if len(selected) > 1 else new_revision - 1
+        old_text = self.store.read(self.file_path, old_revision) if old_revision > 0 else ""
+        new_text = self.store.read(self.file_path, new_revision)
+        diff = difflib.unified_diff(old_text.splitlines(), new_text.splitlines(), f"r{old_revision}", f"r{new_revision}", lineterm="")
+        self.diff_view.setPlainText("\n".join(diff) or "No differences.")
+
+    def restore_selected(self):
+        selected = self.selected_revisions()
+        if selected:
+            self.restore_revision.emit(self.store.read(self.file_path, selected[-1]))
+            self.accept()
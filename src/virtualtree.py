@@ -0,0 +1,503 @@
+import os
+import shutil
+from array import array
+from collections import OrderedDict
+from PyQt6.QtWidgets import QFileIconProvider
+from PyQt6.QtCore import Qt, QAbstractItemModel, QModelIndex, QDateTime, QMimeData, QUrl, QTimer, QSettings, pyqtSignal
+from src.tags import TaggedModelMixin
+from src.changes import CREATED, DELETED, RENAMED
+from src.foldersizes import format_size
+from src.tracing import tracer
+
+VIRTUAL_TREE_KEY = "tree/virtual_model"
+MAX_NODES_KEY = "tree/max_nodes"
+# Entries held before the least recently used folders that are not on screen are unloaded again
+DEFAULT_MAX_NODES = 500000
+# Folders are listed this many entries at a time, one chunk per event-loop pass
+FETCH_CHUNK = 2000
+COLUMNS = ("Name", "Size", "Type", "Date Modified")
+
+IS_DIR = 1
+LOADED = 2
+COMPLETE = 4
+
+
+def use_virtual_tree():
+    return QSettings("DocMan", "DocMan").value(VIRTUAL_TREE_KEY, False, type=bool)
+
+
+def set_use_virtual_tree(enabled):
+    QSettings("DocMan", "DocMan").setValue(VIRTUAL_TREE_KEY, bool(enabled))
+
+
+class VirtualFileTree(QAbstractItemModel):
+    # A file tree kept in flat arrays indexed by node id, about 30 bytes plus the name per entry, where
+    # QFileSystemModel keeps a QFileInfo-backed node object. Node 0 is the root folder, the single top-level row.
+    directoryLoaded = pyqtSignal(str)
+
+    def __init__(self, parent=None, max_nodes=None):
+        super().__init__(parent)
+        self.max_nodes = max_nodes or int(QSettings("DocMan", "DocMan").value(MAX_NODES_KEY, DEFAULT_MAX_NODES))
+        self.read_only = True
+        self.icons = QFileIconProvider()
+        self.folder_icon = self.icons.icon(QFileIconProvider.IconType.Folder)
+        self.file_icon = self.icons.icon(QFileIconProvider.IconType.File)
+        self.clear_nodes()
+
+    def clear_nodes(self):
+        for listing in getattr(self, 'listings', {}).values():
+            listing.close()
+        self.parents = array('i')
+        self.rows = array('i')
+        self.flags_ = array('b')
+        self.sizes = array('q')
+        self.mtimes = array('q')
+        self.names = []
+        self.children = {}
+        # name -> child node of folders looked up by path; built on the first lookup, then kept up to date
+        self.child_names = {}
+        self.free = []
+        # Open os.scandir iterators of folders still being listed
+        self.listings = {}
+        # Loaded folders, least recently used first; candidates for unloading
+        self.recent = OrderedDict()
+        self.expanded = set()
+        self.view_root = 0
+        self.eviction_scheduled = False
+
+    def live_nodes(self):
+        return len(self.names) - len(self.free)
+
+    def new_node(self, parent, row, name, is_dir, size, mtime_ns):
+        values = (parent, row, IS_DIR if is_dir else 0, size, mtime_ns)
+        if self.free:
+            node = self.free.pop()
+            self.parents[node], self.rows[node], self.flags_[node], self.sizes[node], self.mtimes[node] = values
+            self.names[node] = name
+        else:
+            node = len(self.names)
+            for column, value in zip((self.parents, self.rows, self.flags_, self.sizes, self.mtimes), values):
+                column.append(value)
+            self.names.append(name)
+        return node
+
+    def free_subtree(self, node):
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            stack.extend(self.children.pop(current, ()))
+            self.child_names.pop(current, None)
+            listing = self.listings.pop(current, None)
+            if listing is not None:
+                listing.close()
+            self.recent.pop(current, None)
+            self.expanded.discard(current)
+            self.names[current] = None
+            self.free.append(current)
+
+    # Path and node lookups
+
+    def setRootPath(self, root_path):
+        self.beginResetModel()
+        self.clear_nodes()
+        root_path = os.path.abspath(root_path)
+        stat = os.stat(root_path)
+        self.new_node(-1, 0, root_path, True, 0, stat.st_mtime_ns)
+        self.endResetModel()
+        # The root folder starts loading straight away, as in QFileSystemModel
+        self.fetch_chunk(0)
+        return self.node_index(0)
+
+    def rootPath(self):
+        return self.names[0] if self.names else ""
+
+    def setReadOnly(self, read_only):
+        self.read_only = read_only
+
+    def node_path(self, node):
+        parts = []
+        while node > 0:
+            parts.append(self.names[node])
+            node = self.parents[node]
+        return os.path.join(self.names[0], *reversed(parts))
+
+    def node_index(self, node, column=0):
+        return self.createIndex(self.rows[node], column, node)
+
+    def find_child(self, node, name):
+        names = self.child_names.get(node)
+        if names is None:
+            children = self.children.get(node)
+            if not children:
+                return None
+            names = self.child_names[node] = {self.names[child]: child for child in children}
+        return names.get(name)
+
+    def add_child(self, node, name, is_dir, size, mtime_ns):
+        children = self.children[node]
+        child = self.new_node(node, len(children), name, is_dir, size, mtime_ns)
+        children.append(child)
+        names = self.child_names.get(node)
+        if names is not None:
+            names[name] = child
+
+    def rename_node(self, node, name):
+        names = self.child_names.get(self.parents[node])
+        if names is not None:
+            del names[self.names[node]]
+            names[name] = node
+        self.names[node] = name
+
+    def path_node(self, item_path, load=True):
+        item_path = os.path.abspath(item_path)
+        root = self.rootPath()
+        if item_path == root:
+            return 0
+        if not item_path.startswith(root.rstrip(os.sep) + os.sep):
+            return None
+        node = 0
+        for part in os.path.relpath(item_path, root).split(os.sep):
+            if load and not self.flags_[node] & COMPLETE:
+                self.load_all(node)
+            node = self.find_child(node, part)
+            if node is None:
+                return None
+        return node
+
+    def contains_path(self, item_path):
+        return self.path_node(item_path, load=False) is not None
+
+    def index(self, *args):
+        # index(row, column, parent) as any model, or index(path[, column]) as QFileSystemModel offers
+        if args and isinstance(args[0], str):
+            node = self.path_node(args[0])
+            return QModelIndex() if node is None else self.node_index(node, args[1] if len(args) > 1 else 0)
+        row, column = args[0], args[1]
+        parent = args[2] if len(args) > 2 else QModelIndex()
+        if not 0 <= column < len(COLUMNS):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, 0) if row == 0 and self.names else QModelIndex()
+        children = self.children.get(parent.internalId())
+        if children is None or not 0 <= row < len(children):
+            return QModelIndex()
+        return self.createIndex(row, column, children[row])
+
+    def parent(self, index):
+        if not index.isValid() or index.internalId() == 0:
+            return QModelIndex()
+        return self.node_index(self.parents[index.internalId()])
+
+    def filePath(self, index):
+        return self.node_path(index.internalId()) if index.isValid() else ""
+
+    def fileName(self, index):
+        node = index.internalId()
+        return os.path.basename(self.names[0]) if node == 0 else self.names[node]
+
+    def isDir(self, index):
+        return bool(self.flags_[index.internalId()] & IS_DIR) if index.isValid() else True
+
+    def size(self, index):
+        return self.sizes[index.internalId()]
+
+    def lastModified(self, index):
+        return QDateTime.fromMSecsSinceEpoch(self.mtimes[index.internalId()] // 1000000)
+
+    # Lazy, chunked listing
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return 1 if self.names else 0
+        if parent.column() > 0:
+            return 0
+        return len(self.children.get(parent.internalId(), ()))
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return bool(self.names)
+        node = parent.internalId()
+        if not self.flags_[node] & IS_DIR:
+            return False
+        return not self.flags_[node] & COMPLETE or bool(self.children.get(node))
+
+    def canFetchMore(self, parent):
+        if not parent.isValid():
+            return False
+        flags = self.flags_[parent.internalId()]
+        return bool(flags & IS_DIR) and not flags & COMPLETE
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            self.fetch_chunk(parent.internalId())
+
+    def load_all(self, node):
+        while not self.flags_[node] & COMPLETE:
+            self.fetch_chunk(node, schedule=False)
+
+    def continue_fetch(self, node, name):
+        # The node may have been unloaded, or its slot reused, since this was scheduled
+        if node < len(self.names) and self.names[node] == name and node in self.listings:
+            self.fetch_chunk(node)
+
+    def fetch_chunk(self, node, schedule=True):
+        if self.flags_[node] & COMPLETE:
+            return
+        item_path = self.node_path(node)
+        listing = self.listings.get(node)
+        if listing is None:
+            try:
+                listing = self.listings[node] = os.scandir(item_path)
+            except OSError:
+                self.flags_[node] |= LOADED | COMPLETE
+                self.directoryLoaded.emit(item_path)
+                return
+            self.flags_[node] |= LOADED
+            self.children[node] = array('i')
+        entries = []
+        finished = True
+        with tracer().span("tree_fetch", item_path):
+            for entry in listing:
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                    entries.append((entry.name, entry.is_dir(follow_symlinks=False), stat.st_size, stat.st_mtime_ns))
+                except OSError:
+                    continue
+                if len(entries) >= FETCH_CHUNK:
+                    finished = False
+                    break
+        children = self.children[node]
+        if entries:
+            first = len(children)
+            self.beginInsertRows(self.node_index(node), first, first + len(entries) - 1)
+            for name, is_dir, size, mtime_ns in entries:
+                self.add_child(node, name, is_dir, size, mtime_ns)
+            self.endInsertRows()
+        self.recent[node] = True
+        self.recent.move_to_end(node)
+        if finished:
+            self.listings.pop(node).close()
+            self.flags_[node] |= COMPLETE
+            self.directoryLoaded.emit(item_path)
+        elif schedule:
+            name = self.names[node]
+            QTimer.singleShot(0, lambda: self.continue_fetch(node, name))
+        if self.live_nodes() > self.max_nodes and not self.eviction_scheduled:
+            self.eviction_scheduled = True
+            QTimer.singleShot(0, self.evict)
+
+    # Memory cap
+
+    def set_expanded(self, index, expanded):
+        if index.isValid():
+            (self.expanded.add if expanded else self.expanded.discard)(index.internalId())
+
+    def set_view_root(self, index):
+        self.view_root = index.internalId() if index.isValid() else 0
+
+    def is_ancestor(self, node, descendant):
+        while descendant > 0:
+            if descendant == node:
+                return True
+            descendant = self.parents[descendant]
+        return descendant == node
+
+    def evict(self):
+        # Unloads whole subtrees of folders that are neither expanded nor the folder on screen
+        self.eviction_scheduled = False
+        kept = self.expanded | {self.view_root}
+        for node in list(self.recent):
+            if self.live_nodes() <= self.max_nodes:
+                break
+            if node not in self.recent or any(self.is_ancestor(node, other) for other in kept):
+                continue
+            self.unload(node)
+
+    def unload(self, node):
+        children = self.children.get(node)
+        if children:
+            self.beginRemoveRows(self.node_index(node), 0, len(children) - 1)
+            for child in children:
+                self.free_subtree(child)
+            self.endRemoveRows()
+        self.children.pop(node, None)
+        self.child_names.pop(node, None)
+        listing = self.listings.pop(node, None)
+        if listing is not None:
+            listing.close()
+        self.recent.pop(node, None)
+        self.flags_[node] &= ~(LOADED | COMPLETE)
+
+    # Display
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalId()
+        column = index.column()
+        is_dir = self.flags_[node] & IS_DIR
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            if column == 0:
+                return self.fileName(index)
+            if column == 1:
+                return "" if is_dir else format_size(self.sizes[node])
+            if column == 2:
+                if is_dir:
+                    return "Folder"
+                extension = os.path.splitext(self.names[node])[1].lstrip('.')
+                return f"{extension} File" if extension else "File"
+            if column == 3:
+                return self.lastModified(index).toString("yyyy-MM-dd hh:mm")
+        elif role == Qt.ItemDataRole.DecorationRole and column == 0:
+            return self.folder_icon if is_dir else self.file_icon
+        elif role == Qt.ItemDataRole.TextAlignmentRole and column == 1:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.ItemIsDropEnabled
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsDragEnabled
+        if not self.read_only and index.column() == 0 and index.internalId() != 0:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        if self.flags_[index.internalId()] & IS_DIR:
+            flags |= Qt.ItemFlag.ItemIsDropEnabled
+        else:
+            flags |= Qt.ItemFlag.ItemNeverHasChildren
+        return flags
+
+    # Changes
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.EditRole or self.read_only or not index.isValid() or index.internalId() == 0:
+            return False
+        node = index.internalId()
+        old_path = self.node_path(node)
+        new_path = os.path.join(os.path.dirname(old_path), value)
+        if not value or os.sep in value or os.path.exists(new_path):
+            return False
+        try:
+            os.rename(old_path, new_path)
+        except OSError:
+            return False
+        self.rename_node(node, value)
+        self.dataChanged.emit(self.node_index(node), self.node_index(node, len(COLUMNS) - 1))
+        return True
+
+    def mkdir(self, parent, name):
+        item_path = os.path.join(self.filePath(parent), name)
+        try:
+            os.mkdir(item_path)
+        except OSError:
+            return QModelIndex()
+        self.apply_changes([(CREATED, item_path, None)])
+        node = self.path_node(item_path, load=False)
+        return QModelIndex() if node is None else self.node_index(node)
+
+    def create_folder(self, parent, name):
+        return self.mkdir(parent, name)
+
+    def apply_changes(self, changes):
+        # Targeted row inserts, updates and removals; only folders already listed are touched
+        for kind, item_path, new_path in changes:
+            if kind == RENAMED:
+                node = self.path_node(item_path, load=False)
+                if node is not None and os.path.dirname(item_path) == os.path.dirname(new_path) and os.path.exists(new_path):
+                    self.rename_node(node, os.path.basename(new_path))
+                    self.dataChanged.emit(self.node_index(node), self.node_index(node, len(COLUMNS) - 1))
+                else:
+                    self.apply_changes([(DELETED, item_path, None), (CREATED, new_path, None)])
+                continue
+            parent = self.path_node(os.path.dirname(item_path), load=False)
+            if parent is None or not self.flags_[parent] & COMPLETE:
+                continue
+            node = self.find_child(parent, os.path.basename(item_path))
+            try:
+                stat = os.stat(item_path)
+            except OSError:
+                stat = None
+            if stat is None:
+                if node is not None:
+                    self.remove_child(parent, self.rows[node])
+            elif node is None:
+                children = self.children.setdefault(parent, array('i'))
+                self.beginInsertRows(self.node_index(parent), len(children), len(children))
+                self.add_child(parent, os.path.basename(item_path), os.path.isdir(item_path), stat.st_size, stat.st_mtime_ns)
+                self.endInsertRows()
+            else:
+                self.sizes[node], self.mtimes[node] = stat.st_size, stat.st_mtime_ns
+                self.dataChanged.emit(self.node_index(node, 1), self.node_index(node, len(COLUMNS) - 1))
+
+    def remove_child(self, parent, row):
+        children = self.children[parent]
+        self.beginRemoveRows(self.node_index(parent), row, row)
+        names = self.child_names.get(parent)
+        if names is not None:
+            del names[self.names[children[row]]]
+        self.free_subtree(children[row])
+        del children[row]
+        for later_row in range(row, len(children)):
+            self.rows[children[later_row]] = later_row
+        self.endRemoveRows()
+
+    # Drag and drop, as file URLs like QFileSystemModel
+
+    def supportedDropActions(self):
+        return Qt.DropAction.CopyAction | Qt.DropAction.MoveAction
+
+    def mimeTypes(self):
+        return ["text/uri-list"]
+
+    def mimeData(self, indexes):
+        data = QMimeData()
+        paths = dict.fromkeys(self.filePath(index) for index in indexes if index.column() == 0)
+        data.setUrls([QUrl.fromLocalFile(item_path) for item_path in paths])
+        return data
+
+    def dropMimeData(self, data, action, row, column, parent):
+        if self.read_only or not data.hasUrls():
+            return False
+        target = self.filePath(parent) or self.rootPath()
+        if not os.path.isdir(target):
+            target = os.path.dirname(target)
+        changes = []
+        for url in data.urls():
+            source = url.toLocalFile()
+            destination = os.path.join(target, os.path.basename(source.rstrip(os.sep)))
+            if not source or os.path.exists(destination):
+                continue
+            try:
+                if action == Qt.DropAction.MoveAction:
+                    shutil.move(source, destination)
+                    changes.append((DELETED, source, None))
+                elif os.path.isdir(source):
+                    shutil.copytree(source, destination)
+                else:
+                    shutil.copy2(source, destination)
+            except OSError:
+                continue
+            changes.append((CREATED, destination, None))
+        self.apply_changes(changes)
+        return bool(changes)
+
+
+class VirtualFileTreeModel(TaggedModelMixin, VirtualFileTree):
+    def __init__(self, parent=None, tag_store=None, max_nodes=None):
+        super().__init__(parent, max_nodes)
+        self.setup_tags(tag_store)
+
+    def emit_tag_changes(self, item_paths):
+        # Only rows already listed need repainting; nothing is loaded for them
+        for item_path in item_paths:
+            node = self.path_node(item_path, load=False)
+            if node is not None:
+                index = self.node_index(node)
+                self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
@@ -0,0 +1,50 @@
+from src.journal import JournalWriter, read_journal
+
+
+def write_records(journal_path, edits):
+    # The writer's record format, without running its thread
+    writer = JournalWriter(str(journal_path))
+    with open(journal_path, "w", encoding="utf-8") as file:
+        for edit in edits:
+            file.write(writer.edit_record(*edit))
+    return writer
+
+
+def test_recovers_last_complete_record(tmp_path):
+    journal_path = tmp_path / "journal.jsonl"
+    write_records(journal_path, [
+        ("a", "notes", "txt", "Notes", "one\ntwo\n"),
+        ("a", "notes", "txt", "Notes", "one\ntwo\nthree\n"),
+        ("b", "todo", "md", "Todo", "- item\n"),
+    ])
+    recovered = {document["name"]: document["content"] for document in read_journal(str(journal_path))}
+    assert recovered == {"notes": "one\ntwo\nthree\n", "todo": "- item\n"}
+
+
+def test_truncated_tail_record_is_skipped(tmp_path):
+    journal_path = tmp_path / "journal.jsonl"
+    writer = write_records(journal_path, [
+        ("a", "notes", "txt", "Notes", "one\ntwo\n"),
+        ("a", "notes", "txt", "Notes", "one\ntwo\nthree\n"),
+    ])
+    tail = writer.edit_record("a", "notes", "txt", "Notes", "one\ntwo\nthree\nfour\n")
+    with open(journal_path, "a", encoding="utf-8") as file:
+        file.write(tail[:len(tail) // 2])
+    documents = read_journal(str(journal_path))
+    assert [document["content"] for document in documents] == ["one\ntwo\nthree\n"]
+
+
+def test_clean_and_closed_documents_are_not_recovered(tmp_path):
+    journal_path = tmp_path / "journal.jsonl"
+    write_records(journal_path, [
+        ("a", "notes", "txt", "Notes", "one\n"),
+        ("b", "todo", "md", "Todo", "- item\n"),
+    ])
+    with open(journal_path, "a", encoding="utf-8") as file:
+        file.write('{"op": "clean", "key": "a", "ts": 0}\n')
+        file.write('{"op": "close", "key": "b", "ts": 0}\n')
+    assert read_journal(str(journal_path)) == []
+
+
+def test_missing_journal(tmp_path):
+    assert read_journal(str(tmp_path / "journal.jsonl")) == []
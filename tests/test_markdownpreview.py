@@ -0,0 +1,29 @@
+import re
+import markdown
+from src.markdownpreview import BlockRenderer, MARKDOWN_EXTENSIONS
+
+
+def full_render(text):
+    return markdown.Markdown(extensions=MARKDOWN_EXTENSIONS).convert(text)
+
+
+def normalized(html):
+    return re.sub(r'>\s+<', '><', re.sub(r'\s+', ' ', html)).strip()
+
+
+def test_blocks_match_full_render():
+    documents = [
+        "See [docs][1].\n\n[1]: http://example.com\n\n- a\n\n- b\n\n    continued",
+        "- a\n\n[x]: http://x.org\n\n- b\n\nSee [x].",
+        "> one\n\n> two\n\npara\n\n    code\n\n```\nfenced\n\nstill fenced\n```",
+        "| a | b |\n|---|---|\n| 1 | 2 |\n[x]: http://x.org\n\nSee [x].",
+    ]
+    renderer = BlockRenderer()
+    for text in documents:
+        assert normalized(renderer.render(text)) == normalized(full_render(text))
+
+
+def test_edited_definition_rerenders_references():
+    renderer = BlockRenderer()
+    renderer.render("See [docs][1].\n\n[1]: http://old.example")
+    assert "http://new.example" in renderer.render("See [docs][1].\n\n[1]: http://new.example")
@@ -0,0 +1,77 @@
+import random
+from src.namefilter import NameIndex
+from src.changes import CREATED, DELETED, RENAMED
+
+ALPHABET = "abcsß.-_ 0İﬁK"
+
+
+def brute_force(names, query):
+    folded = query.casefold()
+    if not folded:
+        return sorted(names, key=lambda name: (name.casefold(), name))
+    prefixed = sorted((name for name in names if name.casefold().startswith(folded)), key=lambda name: (name.casefold(), name))
+    contained = sorted((name for name in names if folded in name.casefold() and not name.casefold().startswith(folded)),
+                       key=str.casefold)
+    return prefixed + contained
+
+
+def random_names(rng, count):
+    return list(dict.fromkeys("".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 8))) for _ in range(count)))
+
+
+def test_search_matches_brute_force():
+    rng = random.Random(3)
+    names = random_names(rng, 400)
+    index = NameIndex("/folder", names)
+    for _ in range(300):
+        query = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 4)))
+        assert index.search(query) == brute_force(names, query), query
+
+
+def test_growing_query_matches_brute_force():
+    # Each longer query is answered from the previous one's matches
+    rng = random.Random(5)
+    names = random_names(rng, 400)
+    index = NameIndex("/folder", names)
+    for _ in range(50):
+        query = ""
+        for _ in range(5):
+            query += rng.choice(ALPHABET)
+            assert index.search(query) == brute_force(names, query), query
+
+
+def test_casefold_length_changes():
+    names = ["Straße.txt", "STRASSE.md", "strasse", "ﬁle", "FILE", "İstanbul"]
+    index = NameIndex("/folder", names)
+    for query in ("ss", "ß", "strass", "straße", "fi", "ﬁ", "İ", "i̇st"):
+        assert index.search(query) == brute_force(names, query), query
+
+
+def test_changes_keep_index_consistent():
+    rng = random.Random(9)
+    names = set(random_names(rng, 200))
+    index = NameIndex("/folder", names)
+    for _ in range(300):
+        name = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 6)))
+        kind = rng.choice((CREATED, DELETED, RENAMED))
+        if kind == CREATED:
+            index.apply_changes([(CREATED, f"/folder/{name}", None)])
+            names.add(name)
+        elif names:
+            old = rng.choice(sorted(names))
+            if kind == DELETED:
+                index.apply_changes([(DELETED, f"/folder/{old}", None)])
+                names.discard(old)
+            elif name not in names:
+                index.apply_changes([(RENAMED, f"/folder/{old}", f"/folder/{name}")])
+                names.discard(old)
+                names.add(name)
+        query = rng.choice(ALPHABET)
+        assert index.search(query) == brute_force(names, query)
+    assert len(index) == len(names)
+
+
+def test_changes_elsewhere_are_ignored():
+    index = NameIndex("/folder", ["a"])
+    assert not index.apply_changes([(CREATED, "/other/b", None), (DELETED, "/folder/sub/a", None)])
+    assert index.search("") == ["a"]
@@ -0,0 +1,74 @@
+import os
+import random
+from src.quickopen import PathChunk, fuzzy_pattern, make_chunks
+
+ALPHABET = "abcsß" + os.sep + ".Aﬁİ"
+
+
+def is_subsequence(query, text):
+    characters = iter(text)
+    return all(char in characters for char in query)
+
+
+def fuzzy_matches(chunks, query):
+    pattern = fuzzy_pattern(query)
+    return sorted(path for chunk in chunks for path, _ in chunk.matches(pattern))
+
+
+def random_paths(rng, count):
+    return list(dict.fromkeys("".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 12))).strip(os.sep) or "x"
+                              for _ in range(count)))
+
+
+def test_fuzzy_matches_equal_brute_force():
+    rng = random.Random(13)
+    paths = random_paths(rng, 600)
+    chunks = [PathChunk(paths[start:start + 97]) for start in range(0, len(paths), 97)]
+    for _ in range(300):
+        query = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 4))).casefold()
+        expected = sorted(path for path in paths if is_subsequence(query, path.casefold()))
+        assert fuzzy_matches(chunks, query) == expected, query
+
+
+def test_casefold_length_changes_keep_paths_aligned():
+    # Folding "ß" to "ss" and "İ" to two characters shifts every later line of the chunk
+    paths = ["Straße/a.txt", "İ/b.txt", "ﬁle/c.txt", "plain/d.txt"]
+    chunks = [PathChunk(paths)]
+    assert fuzzy_matches(chunks, "ssa") == ["Straße/a.txt"]
+    assert fuzzy_matches(chunks, "b.txt") == ["İ/b.txt"]
+    assert fuzzy_matches(chunks, "fic") == ["ﬁle/c.txt"]
+    assert fuzzy_matches(chunks, "pd") == ["plain/d.txt"]
+
+
+def test_make_chunks_orders_shortest_first():
+    rng = random.Random(17)
+    paths = random_paths(rng, 6000)
+    ordered = [path for chunk in make_chunks(paths) for path in chunk.paths]
+    assert sorted(ordered) == sorted(paths)
+    assert [len(path) for path in ordered] == sorted(map(len, paths))
+
+
+def test_walk_keeps_changes_recorded_after_it_started(tmp_path):
+    from src.quickopen import PathIndex
+    from src.changes import CREATED, DELETED
+    for name in ("a", "b"):
+        (tmp_path / name).write_text(name)
+    index = PathIndex(str(tmp_path))
+    known = {"a", "b"}
+    index.set_paths(make_chunks(known), known, 0)
+    assert index.count == 2
+
+    walk_started = index.sequence
+    (tmp_path / "c").write_text("c")
+    index.apply_changes([(CREATED, str(tmp_path / "c"), None), (DELETED, str(tmp_path / "a"), None)])
+    assert index.count == 2
+    # A walk that started before those changes cannot have seen them
+    index.set_paths(make_chunks(known), known, walk_started)
+    assert index.count == 2
+    found = [relative for _, batch in index.search("c") if batch for _, relative in batch]
+    assert found == ["c"]
+    assert not [relative for _, batch in index.search("a") if batch for _, relative in batch]
+
+    walked = {"b", "c"}
+    index.set_paths(make_chunks(walked), walked, index.sequence)
+    assert (index.added, index.removed, index.count) == ({}, {}, 2)
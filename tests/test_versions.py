@@ -0,0 +1,54 @@
+import random
+from src.versions import VersionStore, make_delta, apply_delta, KEYFRAME_INTERVAL
+
+
+def edited(lines, rng):
+    lines = list(lines)
+    for _ in range(rng.randint(0, 4)):
+        position = rng.randint(0, len(lines))
+        action = rng.choice(("insert", "delete", "replace"))
+        if action == "insert" or not lines:
+            lines[position:position] = [f"line {rng.randint(0, 50)}\n" for _ in range(rng.randint(1, 3))]
+        elif action == "delete":
+            del lines[min(position, len(lines) - 1)]
+        else:
+            lines[min(position, len(lines) - 1)] = f"changed {rng.randint(0, 50)}\n"
+    return lines
+
+
+def test_delta_round_trip():
+    rng = random.Random(7)
+    old = [f"line {number}\n" for number in range(20)]
+    for _ in range(500):
+        new = edited(old, rng)
+        assert apply_delta(old, make_delta(old, new)) == new
+        old = new
+
+
+def test_delta_round_trip_without_common_lines():
+    assert apply_delta(["a\n", "b\n"], make_delta(["a\n", "b\n"], [])) == []
+    assert apply_delta([], make_delta([], ["a\n", "b"])) == ["a\n", "b"]
+    assert apply_delta(["a\n"], make_delta(["a\n"], ["1\n", "2\n"])) == ["1\n", "2\n"]
+
+
+def test_revisions_read_back_across_keyframes(tmp_path):
+    store = VersionStore(str(tmp_path / "versions.db"))
+    rng = random.Random(11)
+    file_path = str(tmp_path / "document.txt")
+    lines = [f"line {number}\n" for number in range(10)]
+    contents = {}
+    try:
+        while len(contents) < KEYFRAME_INTERVAL * 2 + 5:
+            lines = edited(lines, rng)
+            content = "".join(lines)
+            revision = store.record(file_path, content)
+            contents[revision] = content
+        for revision, content in contents.items():
+            assert store.read(file_path, revision) == content
+        # A fresh store has no cached head text and must replay from the last keyframe
+        store.close()
+        store = VersionStore(str(tmp_path / "versions.db"))
+        revision = store.record(file_path, "".join(lines) + "tail\n")
+        assert store.read(file_path, revision) == "".join(lines) + "tail\n"
+    finally:
+        store.close()